@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of per-row versus batch Pydantic validation of NDA labels.
+
+Replicates the bundled train labels to several sizes and times
+`parse_label_to_schema` applied row by row against `parse_labels_to_schema`.
+Both run the schema's Python field validators and build the same models for
+every row, so the single batch call is not reliably faster: from 2,540 to
+101,600 rows the two take about the same time, between 0.75x and 1.15x.
+The batch path exists to report every invalid row in one pass. For speed,
+use the `vectorized` engine, which validates each distinct key=value pair
+once.
+
+    uv run python benchmarks/bench_label_validation.py
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from nda.label_transformer import (
+    parse_label_to_schema,
+    parse_labels_to_schema,
+    sort_label_fields,
+)
+
+LABELS_PATH = (
+    Path(__file__).parents[1]
+    / "src"
+    / "nda"
+    / "static"
+    / "data"
+    / "train"
+    / "expected.tsv"
+)
+
+
+def load_labels(scale: int) -> list[str]:
+    """
+    Return the canonical train labels replicated `scale` times.
+    """
+    labels = pd.read_csv(
+        LABELS_PATH, sep="\t", encoding="utf-8", header=None, names=["labels"]
+    )["labels"]
+    return [sort_label_fields(label) for label in labels] * scale
+
+
+def per_row(labels: list[str]) -> list[dict[str, object]]:
+    """
+    Validate labels one row at a time, as the python engine does.
+    """
+    return [parse_label_to_schema(label) for label in labels]
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """
+    Return the fastest of `repeat` single runs of `func`, in seconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'per-row s':>10} {'batch s':>10} {'speedup':>8}")
+    for scale in args.scales:
+        labels = load_labels(scale)
+        row_s = best_of(partial(per_row, labels), args.repeat)
+        batch_s = best_of(partial(parse_labels_to_schema, labels), args.repeat)
+        print(
+            f"{len(labels):>8} {row_s:>10.4f} {batch_s:>10.4f} {row_s / batch_s:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
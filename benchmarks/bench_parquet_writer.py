@@ -0,0 +1,80 @@
+"""
+Report of parquet write time, file size and read time per writer setting.
+
+Loads and transforms the bundled train partition, replicates it to the requested
+scale, and writes it with each codec, compression level and row-group size.
+
+    uv run python benchmarks/bench_parquet_writer.py
+"""
+
+import argparse
+import tempfile
+import timeit
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from nda import label_transformer
+from nda.data_loader import DataLoader
+from nda.utils import ParquetOptions, to_parquet
+
+DATA_DIR = Path(__file__).parents[1] / "src" / "nda" / "static" / "data"
+
+SETTINGS: dict[str, ParquetOptions] = {
+    "gzip": ParquetOptions(compression="gzip"),
+    "snappy": ParquetOptions(compression="snappy"),
+    "lz4": ParquetOptions(compression="lz4"),
+    "zstd-1": ParquetOptions(compression="zstd", compression_level=1),
+    "zstd-3": ParquetOptions(compression="zstd", compression_level=3),
+    "zstd-9": ParquetOptions(compression="zstd", compression_level=9),
+    "zstd-19": ParquetOptions(compression="zstd", compression_level=19),
+    "none": ParquetOptions(compression="none"),
+    "zstd-3 rg=16": ParquetOptions(
+        compression="zstd", compression_level=3, row_group_size=16
+    ),
+    "zstd-3 rg=128": ParquetOptions(
+        compression="zstd", compression_level=3, row_group_size=128
+    ),
+}
+
+
+def load_train(scale: int) -> pd.DataFrame:
+    """
+    Return the transformed train partition replicated `scale` times.
+    """
+    df = label_transformer.transform(DataLoader(DATA_DIR).load("train"), "train")
+    return pd.concat([df] * scale, ignore_index=True)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """
+    Return the fastest of `repeat` single runs of `func`, in seconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_train(args.scale)
+    print(f"{len(df)} rows")
+    print(f"{'setting':<14} {'write s':>8} {'size MB':>8} {'read s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        path = output_dir / "train" / "data.parquet"
+        for name, options in SETTINGS.items():
+            write_s = best_of(
+                partial(to_parquet, [df], ["train"], output_dir, options), args.repeat
+            )
+            size_mb = path.stat().st_size / 1024**2
+            read_s = best_of(partial(pd.read_parquet, path), args.repeat)
+            print(f"{name:<14} {write_s:>8.3f} {size_mb:>8.2f} {read_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
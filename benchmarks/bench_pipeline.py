@@ -0,0 +1,191 @@
+"""
+Throughput and peak memory of each pipeline stage on synthetic data of several sizes.
+
+For every scale, synthesizes a dataset with `synthesize.py` and runs each stage
+on all partitions: `DataLoader.load`, `label_transformer.transform`,
+`relocate_documents` and `to_parquet`. Records rows/s, MB/s and peak RSS per
+stage to a JSON file, and, given the results of an earlier run as `--baseline`,
+prints the change in each figure.
+
+MB/s counts the bytes a stage consumes or produces: source files on disk for
+loading, label strings for transforming, PDFs for relocating and parquet files
+for storing. Peak RSS is reset before each stage through `/proc/self/clear_refs`
+on Linux; elsewhere it is the peak of the whole run so far.
+
+    uv run python benchmarks/bench_pipeline.py --scales 1 10 100
+"""
+
+import argparse
+import gc
+import json
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from synthesize import PARTITIONS, synthesize
+
+from nda import label_transformer
+from nda.data_loader import DataLoader, Partition
+from nda.metrics import peak_rss_mb, reset_peak_rss
+from nda.utils import parquet_outputs, relocate_documents, to_parquet
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def measure[T](
+    stage: str, rows: int, func: Callable[[], T], size: Callable[[T], int]
+) -> tuple[T, dict[str, Any]]:
+    """
+    Run one stage and return its result and figures; `size` gives its bytes.
+    """
+    gc.collect()
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = peak_rss_mb()
+    megabytes = size(result) / 1024**2
+    print(
+        f"{stage:<10} {rows:>9} {seconds:>9.3f} {rows / seconds:>10.0f} "
+        f"{megabytes / seconds:>8.1f} {peak:>9.1f}"
+    )
+    return result, {
+        "stage": stage,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds,
+        "mb_per_s": megabytes / seconds,
+        "peak_rss_mb": peak,
+    }
+
+
+def run_scale(scale: int, work_dir: Path, link_documents: bool) -> list[dict[str, Any]]:
+    """
+    Synthesize one scale in `work_dir` and return the figures of each stage.
+    """
+    data_dir = work_dir / "data"
+    output_dir = work_dir / "output"
+    counts = synthesize(data_dir, scale, link_documents=link_documents)
+    rows = sum(counts.values())
+    partitions: list[Partition] = list(PARTITIONS)
+    loader = DataLoader(data_dir)
+    source_bytes = sum(
+        path.stat().st_size
+        for partition in partitions
+        for path in (data_dir / partition).iterdir()
+    )
+
+    print(f"\nscale {scale}x")
+    print(
+        f"{'stage':<10} {'rows':>9} {'seconds':>9} {'rows/s':>10} "
+        f"{'MB/s':>8} {'peak MB':>9}"
+    )
+    loaded, load = measure(
+        "load",
+        rows,
+        lambda: [loader.load(partition) for partition in partitions],
+        lambda _: source_bytes,
+    )
+    transformed, transform = measure(
+        "transform",
+        rows,
+        lambda: [
+            label_transformer.transform(df, partition)
+            for df, partition in zip(loaded, partitions, strict=True)
+        ],
+        lambda _: sum(df["labels"].str.len().sum() for df in loaded if "labels" in df),
+    )
+    _, relocate = measure(
+        "relocate",
+        rows,
+        lambda: relocate_documents(loaded, partitions, data_dir, output_dir),
+        lambda _: sum(
+            path.stat().st_size
+            for partition in partitions
+            for path in (output_dir / partition / "documents").iterdir()
+        ),
+    )
+    _, store = measure(
+        "store",
+        rows,
+        lambda: to_parquet(transformed, partitions, output_dir),
+        lambda _: sum(
+            path.stat().st_size
+            for partition in partitions
+            for path in parquet_outputs(output_dir / partition)
+        ),
+    )
+    return [
+        {"scale": scale, **figures} for figures in (load, transform, relocate, store)
+    ]
+
+
+def compare(results: list[dict[str, Any]], baseline: Path) -> None:
+    """
+    Print the change of each figure against the results of an earlier run.
+    """
+    previous = {
+        (r["scale"], r["stage"]): r
+        for r in json.loads(baseline.read_text(encoding="utf-8"))["results"]
+    }
+    print(f"\nchange against {baseline}")
+    print(f"{'scale':>6} {'stage':<10} {'rows/s':>8} {'MB/s':>8} {'peak MB':>8}")
+    for result in results:
+        old = previous.get((result["scale"], result["stage"]))
+        if old is None:
+            continue
+        ratios = [
+            f"{result[key] / old[key] - 1:>+8.1%}"
+            for key in ("rows_per_s", "mb_per_s", "peak_rss_mb")
+        ]
+        print(f"{result['scale']:>6} {result['stage']:<10} {' '.join(ratios)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=RESULTS_DIR / f"pipeline-{version('nda')}.json",
+    )
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--link_documents", action="store_true")
+    parser.add_argument("--work_dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    if not reset_peak_rss():
+        print("Peak RSS cannot be reset here; figures are peaks of the whole run")
+    results: list[dict[str, Any]] = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp:
+            results.extend(run_scale(scale, Path(tmp), args.link_documents))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                "version": version("nda"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "created": datetime.now(UTC).isoformat(timespec="seconds"),
+                "results": results,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"\nResults written to {args.output}")
+    if args.baseline is not None:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
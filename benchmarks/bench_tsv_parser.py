@@ -0,0 +1,86 @@
+"""
+Parse time and memory of the pandas and pyarrow TSV engines of `DataLoader`.
+
+Synthesizes a dataset `--scale` times the size of the bundled one and parses
+every partition with each engine. Reports the fastest of `--repeat` parses, the
+peak RSS reached while parsing and the RSS the parsed dataframes still hold, both
+above the RSS before parsing, then checks that the engines return the same
+dataframes. Peak RSS relies on `/proc/self/clear_refs`, so this runs on Linux.
+
+    uv run python benchmarks/bench_tsv_parser.py --scale 10
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import get_args
+
+import pandas as pd
+from synthesize import PARTITIONS, synthesize
+
+from nda.data_loader import DataLoader, Partition, TsvEngine
+from nda.metrics import PROC_SELF, peak_rss_mb, release_memory, reset_peak_rss
+
+
+def rss_mb() -> float:
+    """
+    Return the current RSS of the process in MB.
+    """
+    status = (PROC_SELF / "status").read_text()
+    line = next(line for line in status.splitlines() if line.startswith("VmRSS"))
+    return int(line.split()[1]) / 1024
+
+
+def parse(loader: DataLoader, partition: Partition, repeat: int) -> None:
+    """
+    Print the fastest parse time and the memory of one partition with one engine.
+    """
+    seconds = []
+    for _ in range(repeat):
+        release_memory()
+        before = rss_mb()
+        reset_peak_rss()
+        start = time.perf_counter()
+        df = loader.load(partition)
+        seconds.append(time.perf_counter() - start)
+        peak = peak_rss_mb() - before
+        release_memory()
+        held = rss_mb() - before
+        del df
+    print(
+        f"{loader.engine:<8} {partition:<7} {min(seconds):>9.3f} "
+        f"{peak:>9.1f} {held:>9.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work_dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    engines: tuple[TsvEngine, ...] = get_args(TsvEngine)
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp:
+        data_dir = Path(tmp)
+        rows = synthesize(data_dir, args.scale, link_documents=True)
+        print(", ".join(f"{partition}: {n} rows" for partition, n in rows.items()))
+        print(f"{'engine':<8} {'part':<7} {'seconds':>9} {'peak MB':>9} {'held MB':>9}")
+        for engine in engines:
+            loader = DataLoader(data_dir, engine=engine)
+            for partition in PARTITIONS:
+                parse(loader, partition, args.repeat)
+
+        for partition in PARTITIONS:
+            expected, *others = (
+                DataLoader(data_dir, engine=engine).load(partition)
+                for engine in engines
+            )
+            for df in others:
+                pd.testing.assert_frame_equal(df, expected)
+        print("Both engines return identical dataframes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Generator of Kleister-shaped datasets at a multiple of the bundled data's size.
+
+Each partition's rows are repeated `scale` times. Every repetition gets PDFs
+whose bytes differ from the sample's by a trailing comment and that are named,
+like Kleister's, after the MD5 of their content, so filenames stay unique and
+pass `--verify`. Inputs are written to `in.tsv.xz` and labels to `expected.tsv`,
+next to a copy of `in-header.tsv`, so the output is a drop-in data directory.
+
+The bundled documents take about 47 MB, so 1000x needs about 47 GB of disk;
+`--link_documents` hard links the samples instead, at the cost of filenames
+that no longer match their content.
+
+    uv run python benchmarks/synthesize.py /tmp/nda-100x --scale 100
+"""
+
+import argparse
+import hashlib
+import lzma
+import os
+import shutil
+from pathlib import Path
+
+from nda.data_loader import Partition
+
+DATA_DIR = Path(__file__).parents[1] / "src" / "nda" / "static" / "data"
+PARTITIONS: tuple[Partition, ...] = ("train", "dev-0", "test-A")
+
+
+def synthetic_name(filename: str, content: bytes | None, copy: int) -> str:
+    """
+    Return the name of a document's `copy`-th repetition: the sample's name for the
+    first, else the MD5 of its marked content (or of its name, if it is missing).
+    """
+    if copy == 0:
+        return filename
+    if content is None:
+        return hashlib.md5(f"{filename}:{copy}".encode()).hexdigest() + ".pdf"
+    return hashlib.md5(content + _marker(copy)).hexdigest() + ".pdf"
+
+
+def synthesize(
+    output_dir: Path,
+    scale: int,
+    data_dir: Path = DATA_DIR,
+    link_documents: bool = False,
+    xz_preset: int = 1,
+) -> dict[str, int]:
+    """
+    Write a dataset `scale` times the size of `data_dir` and return rows per partition.
+    """
+    if scale < 1:
+        raise ValueError(f"scale must be positive, got {scale}")
+    docs = output_dir / "documents"
+    docs.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(data_dir / "in-header.tsv", output_dir / "in-header.tsv")
+    written: set[str] = set()
+    rows: dict[str, int] = {}
+    for partition in PARTITIONS:
+        src = data_dir / partition
+        dst = output_dir / partition
+        dst.mkdir(exist_ok=True)
+        # Rows end at "\n" only; text fields may hold \r, \x0c, \u2028 and the like
+        with lzma.open(src / "in.tsv.xz", "rt", encoding="utf-8", newline="\n") as f:
+            lines = list(f)
+        labelled = (src / "expected.tsv").exists()
+        with lzma.open(
+            dst / "in.tsv.xz", "wt", encoding="utf-8", newline="\n", preset=xz_preset
+        ) as data:
+            for copy in range(scale):
+                for line in lines:
+                    filename, rest = line.split("\t", 1)
+                    name = _write_document(
+                        data_dir / "documents" / filename,
+                        docs,
+                        copy,
+                        link_documents,
+                        written,
+                    )
+                    data.write(f"{name}\t{rest}")
+        if labelled:
+            labels = (src / "expected.tsv").read_bytes()
+            (dst / "expected.tsv").write_bytes(labels * scale)
+        rows[partition] = len(lines) * scale
+    return rows
+
+
+def _write_document(
+    src: Path, docs: Path, copy: int, link: bool, written: set[str]
+) -> str:
+    """
+    Write the `copy`-th repetition of a sample document, once, and return its name.
+    """
+    content = src.read_bytes() if src.exists() else None
+    name = synthetic_name(src.name, content, copy)
+    if content is None or name in written:
+        return name
+    written.add(name)
+    dst = docs / name
+    dst.unlink(missing_ok=True)
+    if link:
+        os.link(src, dst)
+    else:
+        dst.write_bytes(content if copy == 0 else content + _marker(copy))
+    return name
+
+
+def _marker(copy: int) -> bytes:
+    """
+    Return the PDF comment that makes a repetition's bytes unique.
+    """
+    return f"%synthetic copy {copy}\n".encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--link_documents", action="store_true")
+    parser.add_argument("--xz_preset", type=int, default=1)
+    args = parser.parse_args()
+
+    rows = synthesize(
+        args.output_dir,
+        args.scale,
+        link_documents=args.link_documents,
+        xz_preset=args.xz_preset,
+    )
+    print(", ".join(f"{partition}: {n} rows" for partition, n in rows.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,54 @@
 """
 Package exports for the Kleister NDA preparation and delivery pipeline.
+
+Exports are imported on first access, so importing `nda` or a light module such
+as `nda.schema` does not load pandas or pyarrow until they are needed.
 """
 
-from . import label_transformer, utils
-from .data_loader import DataLoader, Partition
-from .schema import NDA
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import label_transformer, utils
+    from .data_loader import DataLoader, Partition
+    from .index import lookup
+    from .reader import read_prepared
+    from .schema import NDA
+
+__all__ = [
+    "NDA",
+    "DataLoader",
+    "Partition",
+    "label_transformer",
+    "lookup",
+    "read_prepared",
+    "utils",
+]
+
+# Module of each export; exports without an attribute name are submodules
+_EXPORTS: dict[str, tuple[str, str | None]] = {
+    "NDA": ("nda.schema", "NDA"),
+    "DataLoader": ("nda.data_loader", "DataLoader"),
+    "Partition": ("nda.data_loader", "Partition"),
+    "label_transformer": ("nda.label_transformer", None),
+    "lookup": ("nda.index", "lookup"),
+    "read_prepared": ("nda.reader", "read_prepared"),
+    "utils": ("nda.utils", None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Import an export on first access and keep it as a module attribute.
+    """
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _EXPORTS[name]
+    module = import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["NDA", "DataLoader", "Partition", "label_transformer", "utils"]
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,131 @@
+"""
+Explicit Arrow types derived from the Pydantic label models.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+from pydantic import BaseModel
+
+from nda.schema import NDA
+
+_SCALARS: dict[str, pa.DataType] = {
+    "string": pa.string(),
+    "integer": pa.int64(),
+    "number": pa.float64(),
+    "boolean": pa.bool_(),
+}
+_FORMATS: dict[str, pa.DataType] = {
+    "date": pa.date32(),
+    "date-time": pa.timestamp("us"),
+}
+
+
+def arrow_type(model: type[BaseModel]) -> pa.DataType:
+    """
+    Return the Arrow struct type matching the JSON schema of a Pydantic model.
+
+    Objects map to structs, arrays to lists and optional values to nullable fields.
+    A string field whose schema declares a `date` or `date-time` format maps to the
+    corresponding temporal type.
+    """
+    schema = model.model_json_schema()
+    return _translate(schema, schema.get("$defs", {}))
+
+
+def labels_array(values: Iterable[dict[str, Any] | None]) -> pa.Array:
+    """
+    Convert `NDA.model_dump()` dictionaries (or None) into an array of `LABELS_SCHEMA_TYPE`.
+
+    Values are converted against the explicit type, so pyarrow does not infer one
+    row by row; ISO date strings are then cast to their temporal fields.
+    """
+    storage = pa.array(list(values), type=_storage_type(LABELS_SCHEMA_TYPE))
+    return _cast(storage, LABELS_SCHEMA_TYPE)
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a partition dataframe to an Arrow table, typing `labels_schema` explicitly.
+    """
+    if "labels_schema" not in df.columns:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    position = df.columns.get_loc("labels_schema")
+    table = pa.Table.from_pandas(df.drop(columns="labels_schema"), preserve_index=False)
+    return table.add_column(
+        position, "labels_schema", labels_array(df["labels_schema"])
+    )
+
+
+def _translate(node: dict[str, Any], defs: dict[str, Any]) -> pa.DataType:
+    """
+    Return the Arrow type of one JSON schema node, resolving references into `defs`.
+    """
+    if node.get("format") in _FORMATS:
+        return _FORMATS[node["format"]]
+    if "$ref" in node:
+        return _translate(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        if len(options) != 1:
+            raise TypeError(f"Cannot map a union of {options} to an Arrow type")
+        return _translate(options[0], defs)
+    kind = node.get("type")
+    if kind == "object":
+        return pa.struct(
+            [
+                pa.field(name, _translate(field, defs))
+                for name, field in node["properties"].items()
+            ]
+        )
+    if kind == "array":
+        return pa.list_(_translate(node["items"], defs))
+    if kind in _SCALARS:
+        return _SCALARS[kind]
+    raise TypeError(f"Cannot map JSON schema type {kind!r} to an Arrow type")
+
+
+def _storage_type(target: pa.DataType) -> pa.DataType:
+    """
+    Return `target` with temporal types replaced by the strings they are parsed from.
+    """
+    if pa.types.is_struct(target):
+        return pa.struct(
+            [field.with_type(_storage_type(field.type)) for field in target]
+        )
+    if pa.types.is_list(target):
+        return pa.list_(_storage_type(target.value_type))
+    if pa.types.is_temporal(target):
+        return pa.string()
+    return target
+
+
+def _cast(array: pa.Array, target: pa.DataType) -> pa.Array:
+    """
+    Cast a nested array to `target`, field by field.
+
+    Struct and list children are cast separately so that the placeholder values
+    under null parents are never parsed.
+    """
+    if array.type == target:
+        return array
+    if pa.types.is_struct(target):
+        children = [
+            _cast(child, field.type)
+            for child, field in zip(array.flatten(), target, strict=True)
+        ]
+        return pa.StructArray.from_arrays(
+            children, fields=list(target), mask=array.is_null()
+        )
+    if pa.types.is_list(target):
+        return pa.ListArray.from_arrays(
+            array.offsets,
+            _cast(array.values, target.value_type),
+            mask=array.is_null(),
+        )
+    return array.cast(target)
+
+
+LABELS_SCHEMA_TYPE = arrow_type(NDA)
@@ -0,0 +1,158 @@
+"""
+Length statistics of the OCR text variants and token-budget batch plans for inference.
+"""
+
+import bisect
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from nda.data_loader import Partition
+from nda.reader import read_prepared
+from nda.utils import JOIN_KEY, TEXT_PREFIX, write_json
+
+BATCH_PLAN_NAME = "batches.json"
+STATS = ("chars", "tokens", "lines")
+
+# Rough characters per token of subword tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+# Line breaks are stored as two-character escapes in the source TSVs
+LINE_BREAK = "\\n"
+
+
+@dataclass(frozen=True)
+class Batch:
+    """
+    Documents sent together to the model, with their estimated token count.
+    """
+
+    filenames: tuple[str, ...]
+    tokens: int
+
+
+def stat_column(stat: str, column: str) -> str:
+    """
+    Return the name of the column holding a length statistic of a text column.
+
+    Statistics are prefixed rather than suffixed, so the split layout keeps them in
+    `meta.parquet` instead of the text variant's own file.
+    """
+    return f"{stat}_{column}"
+
+
+def length_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return `df` with the length statistics of each OCR text variant (`text_*`).
+
+    For every text column, `chars_<column>` counts its characters, `lines_<column>`
+    its lines (line break escapes plus one, zero for empty text) and
+    `tokens_<column>` estimates its tokens as one per `CHARS_PER_TOKEN` characters,
+    rounded up. Each statistic is computed with Arrow kernels over the whole
+    column; missing text counts as empty.
+    """
+    stats: dict[str, np.ndarray] = {}
+    for column in df.columns:
+        if not column.startswith(TEXT_PREFIX):
+            continue
+        text = pc.fill_null(pa.array(df[column], type=pa.large_string()), "")
+        chars = pc.utf8_length(text)
+        empty = pc.equal(chars, 0)
+        lines = pc.if_else(empty, 0, pc.add(pc.count_substring(text, LINE_BREAK), 1))
+        tokens = pc.divide(pc.add(chars, CHARS_PER_TOKEN - 1), CHARS_PER_TOKEN)
+        for stat, values in zip(STATS, (chars, tokens, lines), strict=True):
+            stats[stat_column(stat, column)] = values.to_numpy().astype(np.int64)
+    return df.assign(**stats)
+
+
+def plan_batches(
+    df: pd.DataFrame, budget: int, column: str = "text_best"
+) -> list[Batch]:
+    """
+    Pack the documents of a partition into as few batches as fit `budget` tokens.
+
+    Token counts come from `tokens_<column>` when `df` has it, and are otherwise
+    computed from `column`. Documents are placed largest first, each into the
+    batch it fills most tightly (best-fit decreasing), which keeps the number of
+    batches close to the minimum. A document larger than the budget gets a batch
+    of its own.
+    """
+    if budget < 1:
+        raise ValueError(f"budget must be positive, got {budget}")
+    name = stat_column("tokens", column)
+    if name not in df.columns:
+        df = length_stats(df[[JOIN_KEY, column]])
+    tokens = df[name].to_numpy(dtype=np.int64)
+    filenames = df[JOIN_KEY].tolist()
+
+    members: list[list[int]] = []
+    # (remaining budget, batch) of the batches with room left, by remaining budget
+    free: list[tuple[int, int]] = []
+    for row in np.argsort(-tokens, kind="stable").tolist():
+        size = int(tokens[row])
+        slot = bisect.bisect_left(free, (size, -1))
+        if size > budget or slot == len(free):
+            remaining, batch = budget - size, len(members)
+            members.append([])
+        else:
+            remaining, batch = free.pop(slot)
+            remaining -= size
+        members[batch].append(row)
+        if remaining > 0:
+            bisect.insort(free, (remaining, batch))
+    return [
+        Batch(tuple(filenames[row] for row in rows), int(tokens[rows].sum()))
+        for rows in members
+    ]
+
+
+def write_batch_plan(
+    partition_dir: Path, batches: list[Batch], budget: int, column: str
+) -> dict[str, Any]:
+    """
+    Write and return the batch plan of a partition as `batches.json`.
+
+    Each batch lists the ids of its documents and their estimated tokens; a batch
+    over the budget holds a single document that does not fit on its own.
+    """
+    plan = {
+        "budget": budget,
+        "column": column,
+        "chars_per_token": CHARS_PER_TOKEN,
+        "documents": sum(len(batch.filenames) for batch in batches),
+        "tokens": sum(batch.tokens for batch in batches),
+        "batches": [
+            {
+                "documents": [Path(filename).stem for filename in batch.filenames],
+                "tokens": batch.tokens,
+            }
+            for batch in batches
+        ],
+    }
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    write_json(partition_dir / BATCH_PLAN_NAME, plan)
+    return plan
+
+
+def plan_partition(
+    output_dir: Path, partition: Partition, budget: int, column: str = "text_best"
+) -> dict[str, Any]:
+    """
+    Plan the batches of a prepared partition and write the plan next to its outputs.
+
+    Only `filename` and the token counts are read, from whichever layout and shards
+    the partition was written with, so a new budget is planned without reading any
+    text. Outputs written without length statistics fall back to reading `column`.
+    """
+    name = stat_column("tokens", column)
+    try:
+        df = read_prepared(output_dir, [partition], [JOIN_KEY, name])
+    except KeyError:
+        df = read_prepared(output_dir, [partition], [JOIN_KEY, column])
+    batches = plan_batches(df, budget, column)
+    return write_batch_plan(output_dir / partition, batches, budget, column)
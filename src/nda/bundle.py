@@ -0,0 +1,87 @@
+"""
+Reader for packed document bundles written by `utils.relocate_documents`.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from nda.utils import BUNDLE_INDEX_NAME, BUNDLE_NAME
+
+
+class DocumentBundle:
+    """
+    Random access to the PDFs packed in one partition's (or shard's) bundle.
+
+    `read` fetches a single document with one positioned read; `view` returns a
+    zero-copy slice of a read-only memory map of the bundle. Neither touches the
+    bytes of other documents. Views must be released before the bundle is closed.
+    """
+
+    def __init__(self, folder: Path):
+        self.path = folder / BUNDLE_NAME
+        self.entries: dict[str, dict[str, Any]] = json.loads(
+            (folder / BUNDLE_INDEX_NAME).read_text(encoding="utf-8")
+        )
+        self._fd = os.open(self.path, os.O_RDONLY)
+        self._map: mmap.mmap | None = None
+
+    def __enter__(self) -> "DocumentBundle":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __contains__(self, filename: object) -> bool:
+        return filename in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def read(self, filename: str, verify: bool = False) -> bytes:
+        """
+        Return the bytes of one document, optionally checking them against their MD5.
+        """
+        entry = self.entries[filename]
+        data = os.pread(self._fd, entry["length"], entry["offset"])
+        if len(data) != entry["length"]:
+            raise ValueError(f"Bundle {self.path} is truncated at {filename}")
+        if verify:
+            digest = hashlib.md5(data, usedforsecurity=False).hexdigest()
+            if digest != entry["md5"]:
+                raise ValueError(f"MD5 mismatch for {filename} in {self.path}")
+        return data
+
+    def view(self, filename: str) -> memoryview:
+        """
+        Return a zero-copy view of one document in the memory-mapped bundle.
+        """
+        entry = self.entries[filename]
+        if self._map is None:
+            if entry["length"] == 0:
+                return memoryview(b"")
+            self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        end = entry["offset"] + entry["length"]
+        if end > len(self._map):
+            raise ValueError(f"Bundle {self.path} is truncated at {filename}")
+        return memoryview(self._map)[entry["offset"] : end]
+
+    def close(self) -> None:
+        """
+        Unmap and close the bundle.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
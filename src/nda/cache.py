@@ -0,0 +1,111 @@
+"""
+On-disk cache of parsed partitions stored as memory-mappable Arrow IPC files.
+"""
+
+import hashlib
+import logging
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parsing changes the loaded frames, so older entries miss; version 2
+# reads sources with QUOTE_NONE and only empty fields as missing
+CACHE_FORMAT_VERSION = 2
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def fingerprint(paths: Iterable[Path], chunk_size: int = 1024 * 1024) -> str:
+    """
+    Return a content digest over the given files; missing files contribute a marker.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.name.encode("utf-8"))
+        if not path.exists():
+            digest.update(b"\0absent")
+            continue
+        with path.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PartitionCache:
+    """
+    Stores parsed partition dataframes as uncompressed Arrow IPC (Feather v2) files.
+
+    Entries are keyed by partition name and a fingerprint of the source files, so a
+    changed source misses and replaces the stale entry. Warm reads memory-map the
+    file instead of decoding it again. The total size is capped, evicting the least
+    recently used entries first.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, partition: str, key: str) -> pd.DataFrame | None:
+        """
+        Return the cached dataframe for the partition and key, or None on a miss.
+        """
+        path = self._path(partition, key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        df: pd.DataFrame = feather.read_table(path, memory_map=True).to_pandas()
+        return df
+
+    def put(self, partition: str, key: str, df: pd.DataFrame) -> None:
+        """
+        Store the dataframe, dropping stale entries for the partition and enforcing the size cap.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(partition, key)
+        for stale in self.cache_dir.glob(f"{partition}-*.arrow"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, tmp, compression="uncompressed")
+        tmp.replace(path)
+        self._evict(keep=path)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the hit, miss, and eviction counters.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _path(self, partition: str, key: str) -> Path:
+        """
+        Return the cache file path for a partition and key.
+        """
+        return self.cache_dir / f"{partition}-v{CACHE_FORMAT_VERSION}-{key}.arrow"
+
+    def _evict(self, keep: Path) -> None:
+        """
+        Remove least recently used entries until the cache fits within `max_bytes`.
+        """
+        entries = sorted(
+            (p for p in self.cache_dir.glob("*.arrow") if p != keep),
+            key=lambda p: p.stat().st_mtime_ns,
+        )
+        total = keep.stat().st_size + sum(p.stat().st_size for p in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            entry.unlink()
+            self.evictions += 1
+            logger.debug("Evicted partition cache entry %s", entry.name)
@@ -2,21 +2,74 @@
 DataLoader for reading compressed TSV input files and expected labels by partition.
 """
 
+import csv
+import lzma
+import multiprocessing
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Literal
+from typing import Literal, TypedDict
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pcsv
+from pandas.io.parsers import TextFileReader
+
+from nda.cache import PartitionCache, fingerprint
 
 Partition = Literal["train", "dev-0", "test-A"]
+TsvEngine = Literal["pandas", "pyarrow"]
+
+
+class _TsvOptions(TypedDict):
+    """
+    Keyword arguments of `pd.read_csv` for the dataset's TSV files.
+    """
+
+    sep: str
+    encoding: str
+    header: None
+    dtype: str
+    quoting: Literal[3]
+    keep_default_na: bool
+    na_values: list[str]
+
+
+# The dataset's TSVs are written with QUOTE_NONE and no escaping: every tab and
+# newline is a separator, quote characters are text, every column holds text and
+# only empty fields are missing
+_READ_TSV: _TsvOptions = {
+    "sep": "\t",
+    "encoding": "utf-8",
+    "header": None,
+    "dtype": "str",
+    "quoting": csv.QUOTE_NONE,
+    "keep_default_na": False,
+    "na_values": [""],
+}
 
 
 class DataLoader:
     """
     Loads input and label TSV files for a given dataset partition.
+
+    When a `PartitionCache` is given, parsed partitions are stored on disk and
+    reloaded from it as long as the source files are unchanged.
+
+    The `pandas` engine parses with pandas' C parser; the `pyarrow` engine parses
+    with Arrow's multithreaded CSV reader straight into Arrow string columns,
+    without a Python object per cell. Both return the same dataframe.
     """
 
-    def __init__(self, data_dir: Path):
+    def __init__(
+        self,
+        data_dir: Path,
+        cache: PartitionCache | None = None,
+        engine: TsvEngine = "pandas",
+    ):
         self.data_dir = data_dir
+        self.cache = cache
+        self.engine = engine
         self._column_names = pd.read_csv(
             data_dir / "in-header.tsv", sep="\t", encoding="utf-8", nrows=0
         ).columns.tolist()
@@ -25,6 +78,93 @@ class DataLoader:
         """
         Return the input dataframe for the partition, joined with labels when available.
         """
+        if self.cache is None:
+            return self._parse(partition)
+        key = self.fingerprint(partition)
+        df = self.cache.get(partition, key)
+        if df is None:
+            df = self._parse(partition)
+            self.cache.put(partition, key, df)
+        return df
+
+    def load_many(
+        self, partitions: Sequence[Partition], jobs: int = 1
+    ) -> list[pd.DataFrame]:
+        """
+        Return the dataframes for several partitions in order, parsing up to `jobs` at once.
+
+        Partitions are parsed in separate processes, so each xz decode and TSV parse
+        runs on its own core. Workers are spawned rather than forked, since pyarrow's
+        thread pool makes forking unsafe; the spawn cost only pays off on partitions
+        that take longer to parse than a fresh interpreter takes to import pandas.
+        Cache lookups and stores stay in the calling process.
+        An exception raised while parsing any partition propagates to the caller.
+        """
+        if jobs < 1:
+            raise ValueError(f"jobs must be positive, got {jobs}")
+        if jobs == 1:
+            return [self.load(partition) for partition in partitions]
+
+        results: dict[int, pd.DataFrame] = {}
+        keys: dict[int, str] = {}
+        pending: list[int] = []
+        for i, partition in enumerate(partitions):
+            if self.cache is not None:
+                keys[i] = self.fingerprint(partition)
+                cached = self.cache.get(partition, keys[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+
+        if pending:
+            with ProcessPoolExecutor(
+                max_workers=min(jobs, len(pending)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                parsed = pool.map(self._parse, [partitions[i] for i in pending])
+                for i, df in zip(pending, parsed, strict=True):
+                    if self.cache is not None:
+                        self.cache.put(partitions[i], keys[i], df)
+                    results[i] = df
+        return [results[i] for i in range(len(partitions))]
+
+    def fingerprint(self, partition: Partition) -> str:
+        """
+        Return a content digest of the header, input and label files of the partition.
+        """
+        return fingerprint(
+            [
+                self.data_dir / "in-header.tsv",
+                self.data_dir / partition / "in.tsv.xz",
+                self.data_dir / partition / "expected.tsv",
+            ]
+        )
+
+    def iter_batches(
+        self, partition: Partition = "train", batch_rows: int = 1_000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the partition as consecutive dataframes of at most `batch_rows` rows.
+
+        Input and labels are decompressed and parsed incrementally, so peak memory is
+        bounded by the batch size rather than the partition size. Each batch keeps the
+        row index it would have in `load`, and labels stay aligned row by row.
+        """
+        if batch_rows < 1:
+            raise ValueError(f"batch_rows must be positive, got {batch_rows}")
+        with self._data_reader(partition, batch_rows) as data:
+            if partition == "test-A":
+                yield from data
+                return
+            with self._labels_reader(partition, batch_rows) as labels:
+                for data_batch, labels_batch in zip(data, labels, strict=True):
+                    yield pd.concat([data_batch, labels_batch], axis=1)
+
+    def _parse(self, partition: Partition) -> pd.DataFrame:
+        """
+        Decode and parse the partition from its source files.
+        """
         if partition == "test-A":
             return self._read_data(partition)
         return pd.concat(
@@ -35,23 +175,56 @@ class DataLoader:
         """
         Read the xz-compressed input TSV for the given partition.
         """
+        return self._read_tsv(
+            self.data_dir / partition / "in.tsv.xz", self._column_names
+        )
+
+    def _read_labels(self, partition: Partition) -> pd.DataFrame:
+        """
+        Read the expected.tsv label file for the given partition.
+        """
+        return self._read_tsv(self.data_dir / partition / "expected.tsv", ["labels"])
+
+    def _read_tsv(self, path: Path, names: list[str]) -> pd.DataFrame:
+        """
+        Read a whole TSV file, xz-compressed if its name ends in `.xz`, as strings.
+        """
+        if self.engine == "pandas":
+            return pd.read_csv(path, names=names, **_READ_TSV)
+        # Arrow has no xz codec, so the file is decompressed as it is read
+        with lzma.open(path) if path.suffix == ".xz" else path.open("rb") as source:
+            table = pcsv.read_csv(
+                source,
+                read_options=pcsv.ReadOptions(column_names=names),
+                parse_options=pcsv.ParseOptions(delimiter="\t", quote_char=False),
+                convert_options=pcsv.ConvertOptions(
+                    column_types=dict.fromkeys(names, pa.large_string()),
+                    null_values=_READ_TSV["na_values"],
+                    strings_can_be_null=True,
+                ),
+            )
+        # Release each column's buffers as soon as it is converted
+        df: pd.DataFrame = table.to_pandas(split_blocks=True, self_destruct=True)
+        return df
+
+    def _data_reader(self, partition: Partition, batch_rows: int) -> TextFileReader:
+        """
+        Open a chunked reader over the xz-compressed input TSV for the given partition.
+        """
         return pd.read_csv(
             self.data_dir / partition / "in.tsv.xz",
-            sep="\t",
-            encoding="utf-8",
-            compression="xz",
-            header=None,
             names=self._column_names,
+            chunksize=batch_rows,
+            **_READ_TSV,
         )
 
-    def _read_labels(self, partition: Partition) -> pd.DataFrame:
+    def _labels_reader(self, partition: Partition, batch_rows: int) -> TextFileReader:
         """
-        Read the expected.tsv label file for the given partition.
+        Open a chunked reader over the expected.tsv label file for the given partition.
         """
         return pd.read_csv(
             self.data_dir / partition / "expected.tsv",
-            sep="\t",
-            encoding="utf-8",
-            header=None,
             names=["labels"],
+            chunksize=batch_rows,
+            **_READ_TSV,
         )
@@ -0,0 +1,182 @@
+"""
+Filename index over prepared outputs and random access to single documents.
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import feather
+
+from nda.lru import LRUCache
+from nda.utils import (
+    BUNDLE_INDEX_NAME,
+    BUNDLE_NAME,
+    JOIN_KEY,
+    LAYOUT_NAME,
+    output_folders,
+)
+
+INDEX_NAME = "index.arrow"
+
+INDEX_SCHEMA = pa.schema(
+    [
+        ("filename", pa.string()),
+        ("partition", pa.string()),
+        ("path", pa.string()),
+        ("row_group", pa.int32()),
+        ("row_offset", pa.int32()),
+        ("document", pa.string()),
+        ("document_offset", pa.int64()),
+        ("document_size", pa.int64()),
+    ]
+)
+
+
+class Record(NamedTuple):
+    """
+    One prepared row together with the location of its document.
+
+    `document` is the PDF itself, or the bundle holding it at `document_offset`.
+    """
+
+    partition: str
+    row: dict[str, Any]
+    document: Path
+    document_size: int
+    document_offset: int | None = None
+
+    def read_document(self) -> bytes:
+        """
+        Return the bytes of the document, reading only its range of a bundle.
+        """
+        if self.document_offset is None:
+            return self.document.read_bytes()
+        with self.document.open("rb") as f:
+            return os.pread(f.fileno(), self.document_size, self.document_offset)
+
+
+def write_index(output_dir: Path, partitions: Sequence[str]) -> int:
+    """
+    Write the filename index of every partition in the output directory.
+
+    Each row maps a `filename` to the folder holding its row (the partition or one
+    of its shards), the parquet row group and the offset within it, and the path
+    and byte size of its PDF, or the bundle and byte range holding it. Only parquet
+    footers, the `filename` column and bundle indexes are read. Returns the number
+    of indexed rows.
+    """
+    columns: dict[str, list[Any]] = {name: [] for name in INDEX_SCHEMA.names}
+    for partition in partitions:
+        for target in output_folders(output_dir / partition):
+            if (target / LAYOUT_NAME).exists():
+                _index_target(target, output_dir, partition, columns)
+    table = pa.table(columns, schema=INDEX_SCHEMA)
+    tmp = output_dir / f".{INDEX_NAME}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    tmp.replace(output_dir / INDEX_NAME)
+    rows: int = table.num_rows
+    return rows
+
+
+def lookup(
+    output_dir: Path, filename: str, columns: Sequence[str] | None = None
+) -> Record:
+    """
+    Return the prepared row and document location of `filename`.
+
+    The index is read through a memory map once and kept in a small in-process
+    cache; after that a lookup reads a single row group from each memory-mapped
+    parquet file it needs, whatever the size of the partition. `columns` restricts
+    the row to those columns; with the split layout, files holding none of them
+    are not opened. Raises `KeyError` if the filename is not indexed.
+    """
+    index_path = output_dir / INDEX_NAME
+    entries = _INDEXES.get_or_compute(
+        (index_path, index_path.stat().st_mtime_ns), lambda: _load_index(index_path)
+    )
+    entry = entries[filename]
+    target = output_dir / entry["path"]
+    layout = json.loads((target / LAYOUT_NAME).read_text(encoding="utf-8"))
+    row: dict[str, Any] = {}
+    for name, file_columns in layout["files"].items():
+        wanted = [
+            column
+            for column in file_columns
+            if column not in row and (columns is None or column in columns)
+        ]
+        if not wanted:
+            continue
+        group = pq.ParquetFile(target / name, memory_map=True).read_row_group(
+            entry["row_group"], columns=wanted
+        )
+        row.update(group.slice(entry["row_offset"], 1).to_pylist()[0])
+    return Record(
+        entry["partition"],
+        row,
+        output_dir / entry["document"],
+        entry["document_size"],
+        entry["document_offset"],
+    )
+
+
+def _index_target(
+    target: Path, output_dir: Path, partition: str, columns: dict[str, list[Any]]
+) -> None:
+    """
+    Append the index rows of one partition or shard folder to `columns`.
+
+    All files of a folder hold the same rows and are written with the same row
+    group size, so the row group and offset found in the first file apply to all.
+    """
+    layout = json.loads((target / LAYOUT_NAME).read_text(encoding="utf-8"))
+    first = pq.ParquetFile(target / next(iter(layout["files"])), memory_map=True)
+    relative = target.relative_to(output_dir).as_posix()
+    bundle_index = target / BUNDLE_INDEX_NAME
+    bundle: dict[str, dict[str, Any]] | None = (
+        json.loads(bundle_index.read_text(encoding="utf-8"))
+        if bundle_index.exists()
+        else None
+    )
+    for row_group in range(first.metadata.num_row_groups):
+        filenames = (
+            first.read_row_group(row_group, columns=[JOIN_KEY])
+            .column(JOIN_KEY)
+            .to_pylist()
+        )
+        for offset, filename in enumerate(filenames):
+            columns["filename"].append(filename)
+            columns["partition"].append(partition)
+            columns["path"].append(relative)
+            columns["row_group"].append(row_group)
+            columns["row_offset"].append(offset)
+            if bundle is None:
+                document = target / "documents" / filename
+                columns["document"].append(f"{relative}/documents/{filename}")
+                columns["document_offset"].append(None)
+                columns["document_size"].append(
+                    document.stat().st_size if document.exists() else 0
+                )
+            else:
+                entry = bundle.get(filename, {"offset": None, "length": 0})
+                columns["document"].append(f"{relative}/{BUNDLE_NAME}")
+                columns["document_offset"].append(entry["offset"])
+                columns["document_size"].append(entry["length"])
+
+
+def _load_index(path: Path) -> dict[str, dict[str, Any]]:
+    """
+    Read the index at `path` into a mapping from filename to its first entry.
+    """
+    table = feather.read_table(path, memory_map=True)
+    entries: dict[str, dict[str, Any]] = {}
+    for entry in table.to_pylist():
+        entries.setdefault(entry["filename"], entry)
+    return entries
+
+
+_INDEXES: LRUCache[tuple[Path, int], dict[str, dict[str, Any]]] = LRUCache(8)
@@ -2,16 +2,49 @@
 Label transformation pipeline from raw TSV strings to structured NDA schema records.
 """
 
+import logging
 from collections import defaultdict
-from typing import Any
+from collections.abc import Callable, Sequence
+from typing import Any, Literal, NamedTuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pydantic import TypeAdapter, ValidationError
 
 from nda.data_loader import Partition
+from nda.lru import LRUCache
 from nda.schema import NDA, Party
 
+logger = logging.getLogger(__name__)
 
-def transform(df: pd.DataFrame, partition: Partition) -> pd.DataFrame:
+Engine = Literal["python", "vectorized", "batch"]
+
+SCHEMA_ORDER = ("effective_date", "jurisdiction", "party", "term")
+SCALAR_FIELDS = ("effective_date", "jurisdiction", "term")
+
+_NDA_LIST = TypeAdapter(list[NDA])
+
+LabelCache = LRUCache[tuple[str, str], Any]
+
+
+class LabelError(NamedTuple):
+    """
+    A validation failure for one field of one label row.
+    """
+
+    row: int
+    field: str
+    message: str
+
+
+def transform(
+    df: pd.DataFrame,
+    partition: Partition,
+    engine: Engine = "python",
+    cache: LabelCache | None = None,
+) -> pd.DataFrame:
     """
     Add three label columns forming a round-trip validation pipeline.
 
@@ -20,25 +53,59 @@ def transform(df: pd.DataFrame, partition: Partition) -> pd.DataFrame:
       the effective ground truth, stored as dict for DataFrame compatibility.
     - `labels_serialized`: schema serialised back to key=value; canonical == serialized
       confirms consistent parsing and correct exclusion of decoy keys.
+
+    The `python` engine applies the per-row functions below; the `vectorized` engine
+    tokenizes the whole column at once and produces identical output. The `batch`
+    engine validates the whole column in one Pydantic call and, instead of raising,
+    logs the rows that fail validation and leaves their schema and serialized
+    labels empty.
+
+    An optional `LabelCache` memoizes sorting and parsing per distinct label string
+    for the `python` engine. Repeated labels then share one `labels_schema` dict,
+    so callers must not mutate those dicts in place.
     """
+    if cache is not None and engine != "python":
+        raise ValueError(
+            f"a label cache is only supported by the python engine, got {engine!r}"
+        )
     if partition == "test-A":
         return df
+    if engine == "vectorized":
+        return _transform_vectorized(df)
+    if engine == "batch":
+        return _transform_batch(df, partition)
+    sort = _memoize(sort_label_fields, cache)
+    parse = _memoize(parse_label_to_schema, cache)
     return (
-        df.assign(labels_canonical=lambda df: df.labels.apply(sort_label_fields))
-        .assign(
-            labels_schema=lambda df: df.labels_canonical.apply(parse_label_to_schema)
-        )
+        df.assign(labels_canonical=lambda df: df.labels.apply(sort))
+        .assign(labels_schema=lambda df: df.labels_canonical.apply(parse))
         .assign(
             labels_serialized=lambda df: df.labels_schema.apply(label_schema_to_string)
         )
     )
 
 
+def _memoize[T](
+    func: Callable[[str], T], cache: LabelCache | None
+) -> Callable[[str], T]:
+    """
+    Wrap a per-row label function so results are cached by function name and input.
+    """
+    if cache is None:
+        return func
+
+    def memoized(string: str) -> T:
+        result: T = cache.get_or_compute((func.__name__, string), lambda: func(string))
+        return result
+
+    return memoized
+
+
 def sort_label_fields(string: str) -> str:
     """
     Reorder key=value pairs to match the canonical NDA schema field order.
     """
-    schema_order = ["effective_date", "jurisdiction", "party", "term"]
+    schema_order = list(SCHEMA_ORDER)
 
     pairs: list[tuple[str, str]] = []
     for part in string.strip().split():
@@ -64,26 +131,58 @@ def parse_label_to_schema(string: str) -> dict[str, Any]:
     """
     Parse a raw label string into a validated NDA model dictionary.
     """
+    return NDA.model_validate(_label_to_record(string)).model_dump()
+
+
+def parse_labels_to_schema(
+    strings: Sequence[str],
+) -> tuple[list[dict[str, Any] | None], list[LabelError]]:
+    """
+    Parse and validate a batch of raw label strings with a single Pydantic call.
+
+    Rows that fail validation yield None in place of their dictionary and one
+    `LabelError` per failing field, rather than aborting the whole batch.
+    """
+    records = [_label_to_record(string) for string in strings]
+    try:
+        return _NDA_LIST.dump_python(_NDA_LIST.validate_python(records)), []
+    except ValidationError as exc:
+        errors = [
+            LabelError(
+                row=int(error["loc"][0]),
+                field=".".join(str(part) for part in error["loc"][1:]),
+                message=error["msg"],
+            )
+            for error in exc.errors()
+        ]
+
+    invalid = {error.row for error in errors}
+    valid = [i for i in range(len(records)) if i not in invalid]
+    dumped = _NDA_LIST.dump_python(
+        _NDA_LIST.validate_python([records[i] for i in valid])
+    )
+    results: list[dict[str, Any] | None] = [None] * len(records)
+    for i, record in zip(valid, dumped, strict=True):
+        results[i] = record
+    return results, errors
+
+
+def _label_to_record(string: str) -> dict[str, Any]:
+    """
+    Split a raw label string into an unvalidated NDA field dictionary.
+    """
     result: defaultdict[str, list[str]] = defaultdict(list)
 
     for token in string.strip().split():
         key, _, value = token.partition("=")
         result[key].append(value)
 
-    effective_date = result.get("effective_date", [None])[0]
-    jurisdiction = result.get("jurisdiction", [None])[0]
-    term = result.get("term", [None])[0]
-    parties = result.get("party", [])
-    party = [Party(name=p) for p in parties]
-
-    nda = NDA(
-        effective_date=effective_date,
-        jurisdiction=jurisdiction,
-        term=term,
-        party=party,
-    )
-
-    return nda.model_dump()
+    return {
+        "effective_date": result.get("effective_date", [None])[0],
+        "jurisdiction": result.get("jurisdiction", [None])[0],
+        "term": result.get("term", [None])[0],
+        "party": [{"name": p} for p in result.get("party", [])],
+    }
 
 
 def label_schema_to_string(nda_dict: dict[str, Any]) -> str:
@@ -105,3 +204,143 @@ def label_schema_to_string(nda_dict: dict[str, Any]) -> str:
         parts.append(f"term={term}")
 
     return " ".join(parts)
+
+
+def _transform_batch(df: pd.DataFrame, partition: Partition) -> pd.DataFrame:
+    """
+    Build the three label columns, validating all rows in one batch.
+    """
+    canonical = df["labels"].apply(sort_label_fields)
+    schema, errors = parse_labels_to_schema(canonical.tolist())
+    if errors:
+        logger.warning(
+            "Partition '%s': %d of %d label rows failed validation: %s",
+            partition,
+            len({error.row for error in errors}),
+            len(df),
+            errors,
+        )
+    serialized = [
+        None if record is None else label_schema_to_string(record) for record in schema
+    ]
+    return df.assign(
+        labels_canonical=canonical,
+        labels_schema=pd.Series(schema, index=df.index, dtype=object),
+        labels_serialized=pd.Series(serialized, index=df.index, dtype="str"),
+    )
+
+
+def _transform_vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the three label columns with Arrow string kernels and array operations.
+
+    Labels are tokenized once into a flat array of key=value pairs tagged with their
+    row. Canonical ordering is a stable sort on (row, schema rank of the key), rows
+    are re-serialized with list joins, and validation runs through the Pydantic
+    models once per distinct pair rather than once per row.
+    """
+    n_rows = len(df)
+    labels = pa.array(df["labels"], pa.string())
+    if isinstance(labels, pa.ChunkedArray):
+        labels = labels.combine_chunks()
+    lists = pc.utf8_split_whitespace(pc.utf8_trim_whitespace(labels))
+    tokens = pc.list_flatten(lists)
+    rows = pc.list_parent_indices(lists).to_numpy()
+    non_empty = pc.not_equal(tokens, "")
+    tokens = tokens.filter(non_empty)
+    rows = rows[non_empty.to_numpy(zero_copy_only=False)]
+
+    parts = pc.extract_regex(tokens, r"(?P<key>[^=]*)=(?P<value>.*)")
+    if parts.null_count:
+        malformed = tokens.filter(pc.is_null(parts))[0].as_py()
+        raise ValueError(f"label token {malformed!r} is not a key=value pair")
+    keys = pc.struct_field(parts, "key")
+
+    rank = (
+        pc.index_in(keys, value_set=pa.array(SCHEMA_ORDER))
+        .fill_null(len(SCHEMA_ORDER))
+        .to_numpy()
+    )
+    order = np.lexsort((rank, rows))
+    rows, rank = rows[order], rank[order]
+    tokens, keys = tokens.take(order), keys.take(order)
+    canonical = pc.binary_join(_row_lists(rows, tokens, n_rows), " ")
+
+    # Keep schema keys only, and the first occurrence of each scalar key per row.
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (rank[1:] != rank[:-1])
+    party_rank = SCHEMA_ORDER.index("party")
+    kept = np.flatnonzero((rank < len(SCHEMA_ORDER)) & (first | (rank == party_rank)))
+    rows, rank, tokens, keys = (
+        rows[kept],
+        rank[kept],
+        tokens.take(kept),
+        keys.take(kept),
+    )
+    normalized = _normalize_tokens(tokens)
+    serialized = pc.binary_join(
+        _row_lists(rows, pc.binary_join_element_wise(keys, normalized, "="), n_rows),
+        " ",
+    )
+
+    scalars: dict[str, np.ndarray] = {}
+    for key in SCALAR_FIELDS:
+        mask = rank == SCHEMA_ORDER.index(key)
+        scalars[key] = np.full(n_rows, None, dtype=object)
+        scalars[key][rows[mask]] = normalized.filter(mask).to_numpy(
+            zero_copy_only=False
+        )
+    is_party = rank == party_rank
+    parties = _row_lists(rows[is_party], normalized.filter(is_party), n_rows)
+    schema: list[dict[str, Any]] = [
+        {
+            "effective_date": effective_date,
+            "jurisdiction": jurisdiction,
+            "party": [{"name": name} for name in names],
+            "term": term,
+        }
+        for effective_date, jurisdiction, names, term in zip(
+            scalars["effective_date"],
+            scalars["jurisdiction"],
+            parties.to_pylist(),
+            scalars["term"],
+            strict=True,
+        )
+    ]
+
+    return df.assign(
+        labels_canonical=pd.Series(canonical, index=df.index, dtype="str"),
+        labels_schema=pd.Series(schema, index=df.index, dtype=object),
+        labels_serialized=pd.Series(serialized, index=df.index, dtype="str"),
+    )
+
+
+def _normalize_tokens(tokens: pa.Array) -> pa.Array:
+    """
+    Return the validated, normalized value of each key=value token.
+
+    Each distinct token is validated once through the Pydantic models, so a
+    `ValidationError` surfaces exactly as with the per-row functions.
+    """
+    distinct = pc.unique(tokens)
+    normalized: list[str] = []
+    for token in distinct.to_pylist():
+        key, _, value = token.partition("=")
+        if key == "party":
+            normalized.append(Party(name=value).name)
+        else:
+            normalized.append(getattr(NDA.model_validate({key: value}), key))
+    return pa.array(normalized, pa.string()).take(
+        pc.index_in(tokens, value_set=distinct)
+    )
+
+
+def _row_lists(rows: np.ndarray, values: pa.Array, n_rows: int) -> pa.ListArray:
+    """
+    Group values into one list per row, yielding an empty list for rows without values.
+
+    `rows` must be sorted, so the values of each row form one contiguous list slice.
+    """
+    offsets = np.zeros(n_rows + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return pa.ListArray.from_arrays(offsets, values)
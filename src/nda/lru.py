@@ -0,0 +1,62 @@
+"""
+Thread-safe, size-bounded LRU cache with hit, miss, and eviction counters.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class LRUCache[K: Hashable, V]:
+    """
+    Maps keys to computed values, evicting the least recently used entry when full.
+
+    Lookups and updates hold a lock, so one cache can be shared across threads. The
+    value factory runs outside the lock; concurrent misses on the same key may both
+    compute it, and the last result wins.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_compute(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = factory()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the hit, miss, and eviction counters.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -2,18 +2,43 @@
 Prepares and delivers the Kleister NDA dataset for multimodal KIE tasks by:
     - Loading raw data for all partitions
     - Parsing ground truth labels into a validated schema
+    - Computing length statistics of the OCR text and optionally planning batches
     - Relocating source documents into an output directory, organized by partition
     - Persisting prepared dataframes as parquet files in each output partition directory
+
+Heavy dependencies (pandas, pyarrow, pydantic) are imported by the stages that use
+them, so `nda --help` and argument errors return without loading them.
 """
 
+from __future__ import annotations
+
 import argparse
 import logging
+from collections.abc import Iterable, Sequence
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from nda.metrics import RunMetrics, release_memory
+from nda.profiling import StageProfiler
+from nda.scheduler import Task, run_tasks
 
-from nda import label_transformer, utils
-from nda.data_loader import DataLoader, Partition
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from nda.cache import PartitionCache
+    from nda.data_loader import Partition, TsvEngine
+    from nda.label_transformer import Engine, LabelCache
+    from nda.manifest import RunManifest
+    from nda.shards import ShardSize
+    from nda.utils import (
+        CheckMode,
+        DocumentsFormat,
+        Layout,
+        LinkMode,
+        ParquetOptions,
+        RelocationStats,
+    )
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,48 +66,577 @@ def parse_args() -> argparse.Namespace:
         default=OUTPUT_DIR,
         help=f"Directory where prepared outputs are delivered (default: {OUTPUT_DIR}).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--cache_dir",
+        type=Path,
+        default=None,
+        help="Directory for the parsed-partition cache (default: caching disabled).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help="Number of partitions to load concurrently in separate processes (default: 1).",
+    )
+    parser.add_argument(
+        "--tsv_engine",
+        choices=["pandas", "pyarrow"],
+        default="pandas",
+        help="Parser of the source TSV files; both produce the same dataframes (default: pandas).",
+    )
+    parser.add_argument(
+        "--label_engine",
+        choices=["python", "vectorized", "batch"],
+        default="python",
+        help="Label transformation engine (default: python).",
+    )
+    parser.add_argument(
+        "--label_cache_size",
+        type=int,
+        default=0,
+        help="Memoize up to this many parsed labels with the python engine (default: 0, off).",
+    )
+    parser.add_argument(
+        "--link_mode",
+        choices=["copy", "hardlink", "symlink", "reflink", "auto"],
+        default="copy",
+        help="How documents are placed in the output; unsupported modes fall back to copy (default: copy).",
+    )
+    parser.add_argument(
+        "--relocate_workers",
+        type=positive_int,
+        default=8,
+        help="Number of threads placing documents concurrently (default: 8).",
+    )
+    parser.add_argument(
+        "--relocate_check",
+        choices=["stat", "hash"],
+        default="stat",
+        help="How unchanged documents are detected and skipped on re-runs (default: stat).",
+    )
+    parser.add_argument(
+        "--documents_format",
+        choices=["files", "bundle"],
+        default="files",
+        help="Place documents as individual files, or pack them into one bundle file with a byte-offset index (default: files).",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check each document against the MD5 in its filename, and for truncation, while placing it.",
+    )
+    parser.add_argument(
+        "--parquet_compression",
+        choices=["gzip", "zstd", "snappy", "lz4", "brotli", "none"],
+        default="gzip",
+        help="Parquet compression codec (default: gzip).",
+    )
+    parser.add_argument(
+        "--parquet_compression_level",
+        type=int,
+        default=None,
+        help="Codec-specific compression level (default: the codec's default).",
+    )
+    parser.add_argument(
+        "--parquet_row_group_size",
+        type=int,
+        default=None,
+        help="Maximum number of rows per parquet row group (default: pyarrow's default).",
+    )
+    parser.add_argument(
+        "--parquet_dictionary",
+        nargs="*",
+        default=None,
+        metavar="COLUMN",
+        help="Dictionary-encode only these columns; pass no columns to disable (default: all).",
+    )
+    parser.add_argument(
+        "--parquet_page_index",
+        action="store_true",
+        help="Write parquet page indexes so readers can skip pages within row groups.",
+    )
+    parser.add_argument(
+        "--parquet_layout",
+        choices=["single", "split"],
+        default="single",
+        help="Write one data.parquet per partition, or split the OCR text columns into files of their own (default: single).",
+    )
+    parser.add_argument(
+        "--store_jobs",
+        type=positive_int,
+        default=1,
+        help="Number of shards of a partition written to parquet concurrently; --stage_workers sets how many partitions are stored at once (default: 1).",
+    )
+    parser.add_argument(
+        "--shard_size",
+        type=shard_size,
+        default=None,
+        help="Split each partition into shards of at most this many rows (e.g. 500) or bytes (e.g. 64MB) (default: no sharding).",
+    )
+    parser.add_argument(
+        "--batch_token_budget",
+        type=positive_int,
+        default=None,
+        help="Plan inference batches of at most this many estimated tokens per partition, written to batches.json (default: no plan).",
+    )
+    parser.add_argument(
+        "--batch_text_column",
+        choices=["text_best", "text_djvu", "text_tesseract", "text_textract"],
+        default="text_best",
+        help="Text variant whose token estimates the batch plan uses (default: text_best).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every partition, ignoring the run manifest of previous runs.",
+    )
+    parser.add_argument(
+        "--stage_workers",
+        type=positive_int,
+        default=1,
+        help="Number of partition stages (labels, documents, parquet) run concurrently (default: 1).",
+    )
+    parser.add_argument(
+        "--low_memory",
+        action="store_true",
+        help="Load, transform, relocate and store one partition at a time, releasing it before the next.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="+",
+        choices=["cpu", "memory"],
+        default=None,
+        help="Profile each stage with cProfile (cpu) and/or tracemalloc (memory) (default: off).",
+    )
+    parser.add_argument(
+        "--profile_dir",
+        type=Path,
+        default=Path("profiles"),
+        help="Directory for the per-stage .pstats files and memory reports (default: ./profiles).",
+    )
+    parser.add_argument(
+        "--profile_top",
+        type=int,
+        default=25,
+        help="Number of allocation sites listed in each memory report (default: 25).",
+    )
+    parser.add_argument(
+        "--metrics_out",
+        type=Path,
+        default=None,
+        help="Write wall and CPU time, rows, bytes, files and peak RSS of each stage to this JSON file.",
+    )
+    args = parser.parse_args()
+    if args.label_cache_size < 0:
+        parser.error(
+            f"--label_cache_size must not be negative, got {args.label_cache_size}"
+        )
+    if args.label_cache_size and args.label_engine != "python":
+        parser.error("--label_cache_size only applies to --label_engine python")
+    return args
 
 
-def load_data() -> list[pd.DataFrame]:
+def positive_int(value: str) -> int:
     """
-    Load raw data for all partitions from the data directory.
+    Parse a count that must be at least one, such as a number of workers.
     """
-    loader = DataLoader(DATA_DIR)
-    dataframes = [loader.load(partition) for partition in PARTITIONS]
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {number}")
+    return number
+
+
+def shard_size(value: str) -> ShardSize:
+    """
+    Parse a --shard_size value, importing the sharding module only when it is given.
+    """
+    from nda.shards import parse_shard_size
+
+    return parse_shard_size(value)
+
+
+def load_data(
+    partitions: Sequence[Partition] = PARTITIONS,
+    cache: PartitionCache | None = None,
+    jobs: int = 1,
+    engine: TsvEngine = "pandas",
+) -> list[pd.DataFrame]:
+    """
+    Load raw data for the given partitions from the data directory.
+    """
+    from nda.data_loader import DataLoader
+
+    loader = DataLoader(DATA_DIR, cache=cache, engine=engine)
+    dataframes = loader.load_many(partitions, jobs=jobs)
     return dataframes
 
 
 def parse_labels(
     dataframes: list[pd.DataFrame],
+    partitions: Sequence[Partition] = PARTITIONS,
+    engine: Engine = "python",
+    cache: LabelCache | None = None,
 ) -> list[pd.DataFrame]:
     """
-    Apply label transformations to all partition dataframes.
+    Apply label transformations to the partition dataframes.
     """
+    from nda import label_transformer
+
     transformed = [
-        label_transformer.transform(df, partition)
-        for df, partition in zip(dataframes, PARTITIONS, strict=True)
+        label_transformer.transform(df, partition, engine=engine, cache=cache)
+        for df, partition in zip(dataframes, partitions, strict=True)
     ]
     return transformed
 
 
-def relocate_documents(dataframes: list[pd.DataFrame], output_dir: Path) -> None:
+def relocate_documents(
+    dataframes: list[pd.DataFrame],
+    output_dir: Path,
+    partitions: Sequence[Partition] = PARTITIONS,
+    link_mode: LinkMode = "copy",
+    workers: int = 8,
+    check: CheckMode = "stat",
+    shards: dict[Partition, list[range]] | None = None,
+    documents_format: DocumentsFormat = "files",
+    verify: bool = False,
+) -> dict[Partition, RelocationStats]:
     """
-    Copy source documents into the output directory, organized by partition.
+    Copy or link source documents into the output directory, organized by partition.
     """
-    utils.relocate_documents(
+    from nda import utils
+
+    return utils.relocate_documents(
         dataframes,
-        PARTITIONS,
+        partitions,
         DATA_DIR,
         output_dir,
+        link_mode,
+        workers,
+        check,
+        shards,
+        documents_format,
+        verify,
+    )
+
+
+def store_parquets(
+    dataframes: list[pd.DataFrame],
+    output_dir: Path,
+    partitions: Sequence[Partition] = PARTITIONS,
+    options: ParquetOptions | None = None,
+    jobs: int = 1,
+    layout: Layout = "single",
+    shards: dict[Partition, list[range]] | None = None,
+) -> None:
+    """
+    Persist the partition dataframes as parquet files in the output directory.
+    """
+    from nda import utils
+
+    utils.to_parquet(dataframes, partitions, output_dir, options, jobs, layout, shards)
+
+
+def shard_partitions(
+    dataframes: list[pd.DataFrame],
+    output_dir: Path,
+    partitions: Sequence[Partition],
+    shard_size: ShardSize | None,
+) -> dict[Partition, list[range]]:
+    """
+    Plan the shards of each partition and clear outputs left by a different sharding.
+
+    The shard manifest is written as soon as the plan is known, so a run interrupted
+    part-way keeps the shard folders it already filled.
+    """
+    from nda.shards import plan_shards, prune_shards, write_shard_manifest
+
+    shards: dict[Partition, list[range]] = {}
+    for df, partition in zip(dataframes, partitions, strict=True):
+        if shard_size is not None:
+            shards[partition] = plan_shards(df, shard_size, DATA_DIR / "documents")
+        prune_shards(output_dir / partition, shards.get(partition, []))
+        if partition in shards:
+            write_shard_manifest(df, output_dir / partition, shards[partition])
+    return shards
+
+
+def parquet_options(args: argparse.Namespace) -> ParquetOptions:
+    """
+    Return the parquet writer options selected on the command line.
+    """
+    from nda.utils import ParquetOptions
+
+    dictionary = args.parquet_dictionary
+    return ParquetOptions(
+        compression=args.parquet_compression,
+        compression_level=args.parquet_compression_level,
+        row_group_size=args.parquet_row_group_size,
+        use_dictionary=True if dictionary is None else tuple(dictionary) or False,
+        write_page_index=args.parquet_page_index,
+    )
+
+
+def stage_outputs(output_dir: Path, partition: Partition, stage: str) -> str:
+    """
+    Return the fingerprint of the files a stage produces for a partition.
+    """
+    from nda import utils
+    from nda.batches import BATCH_PLAN_NAME
+    from nda.manifest import tree_fingerprint
+
+    targets = utils.output_folders(output_dir / partition)
+    if stage == "data":
+        return tree_fingerprint(
+            [
+                *(path for target in targets for path in utils.parquet_outputs(target)),
+                output_dir / partition / BATCH_PLAN_NAME,
+            ]
+        )
+    return tree_fingerprint(
+        [
+            path
+            for target in targets
+            for path in (
+                target / "documents",
+                target / "documents.json",
+                target / utils.BUNDLE_NAME,
+                target / utils.BUNDLE_INDEX_NAME,
+            )
+        ]
     )
 
 
-def store_parquets(dataframes: list[pd.DataFrame], output_dir: Path) -> None:
+def stage_inputs(args: argparse.Namespace) -> dict[tuple[Partition, str], str]:
+    """
+    Return the input fingerprint of the data and documents stages of every partition.
+
+    Data inputs cover the source TSVs, the package code and the options that shape
+    the parquet output and the batch plan; documents inputs cover the source TSVs
+    (which list the documents), the source documents directory and the placement
+    options. Both cover the shard size, and byte-bounded shards also depend on
+    document sizes.
+    """
+    from nda.data_loader import DataLoader
+    from nda.manifest import code_fingerprint, digest, tree_fingerprint
+
+    loader = DataLoader(DATA_DIR)
+    code = code_fingerprint()
+    documents = tree_fingerprint([DATA_DIR / "documents"])
+    sharding = repr(args.shard_size)
+    if args.shard_size is not None and args.shard_size.unit == "bytes":
+        sharding = digest(sharding, documents)
+    inputs: dict[tuple[Partition, str], str] = {}
+    for partition in PARTITIONS:
+        source = loader.fingerprint(partition)
+        inputs[partition, "data"] = digest(
+            source,
+            code,
+            args.label_engine,
+            repr(parquet_options(args)),
+            args.parquet_layout,
+            sharding,
+            repr(args.batch_token_budget),
+            args.batch_text_column,
+        )
+        inputs[partition, "documents"] = digest(
+            source,
+            code,
+            documents,
+            args.link_mode,
+            args.relocate_check,
+            args.documents_format,
+            str(args.verify),
+            sharding,
+        )
+    return inputs
+
+
+def rows_per_partition(
+    dataframes: Sequence[pd.DataFrame], partitions: Sequence[Partition]
+) -> dict[str, int]:
     """
-    Persist all partition dataframes as parquet files in the output directory.
+    Return the row count of each partition's dataframe.
     """
-    utils.to_parquet(dataframes, PARTITIONS, output_dir)
+    return {
+        partition: len(df) for df, partition in zip(dataframes, partitions, strict=True)
+    }
+
+
+def file_bytes(paths: Iterable[Path]) -> int:
+    """
+    Return the total size of the files among `paths` that exist.
+    """
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+class PartitionStages:
+    """
+    The labels, lengths, documents and store stages of each partition, as tasks.
+
+    A partition's labels are parsed and its text measured before its parquet files
+    are written, while its documents are relocated independently, so with several
+    workers the I/O of relocation overlaps with label parsing and parquet encoding.
+    Each stage times itself and records its fingerprints in the run manifest as
+    soon as it ends.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        manifest: RunManifest,
+        inputs: dict[tuple[Partition, str], str],
+        metrics: RunMetrics,
+        dataframes: dict[Partition, pd.DataFrame],
+        shards: dict[Partition, list[range]],
+        label_cache: LabelCache | None,
+    ):
+        self.args = args
+        self.manifest = manifest
+        self.inputs = inputs
+        self.metrics = metrics
+        self.dataframes = dataframes
+        self.shards = shards
+        self.label_cache = label_cache
+        self.parsed: dict[Partition, pd.DataFrame] = {}
+
+    def tasks(self, stale: dict[str, list[Partition]]) -> list[Task]:
+        """
+        Return the tasks of the stale stages of the loaded partitions, partition by
+        partition.
+        """
+        tasks: list[Task] = []
+        for partition in self.dataframes:
+            if partition in stale["documents"]:
+                tasks.append(
+                    Task(f"documents:{partition}", partial(self.documents, partition))
+                )
+            if partition in stale["data"]:
+                tasks.append(
+                    Task(f"labels:{partition}", partial(self.labels, partition))
+                )
+                tasks.append(
+                    Task(
+                        f"lengths:{partition}",
+                        partial(self.lengths, partition),
+                        after=(f"labels:{partition}",),
+                    )
+                )
+                tasks.append(
+                    Task(
+                        f"store:{partition}",
+                        partial(self.store, partition),
+                        after=(f"lengths:{partition}",),
+                    )
+                )
+        return tasks
+
+    def labels(self, partition: Partition) -> None:
+        """
+        Parse and validate the labels of one partition.
+        """
+        with self.metrics.stage("labels", partition) as step:
+            (self.parsed[partition],) = parse_labels(
+                [self.dataframes[partition]],
+                [partition],
+                self.args.label_engine,
+                self.label_cache,
+            )
+            step.rows = {partition: len(self.parsed[partition])}
+
+    def lengths(self, partition: Partition) -> None:
+        """
+        Add the length statistics of each text variant of one partition.
+        """
+        from nda.batches import length_stats
+
+        with self.metrics.stage("lengths", partition) as step:
+            self.parsed[partition] = length_stats(self.parsed[partition])
+            step.rows = {partition: len(self.parsed[partition])}
+
+    def documents(self, partition: Partition) -> None:
+        """
+        Relocate the documents of one partition and record the stage.
+        """
+        with self.metrics.stage("documents", partition) as step:
+            stats = relocate_documents(
+                [self.dataframes[partition]],
+                self.args.output_dir,
+                [partition],
+                self.args.link_mode,
+                self.args.relocate_workers,
+                self.args.relocate_check,
+                self.shards,
+                self.args.documents_format,
+                self.args.verify,
+            )[partition]
+            self._record(partition, "documents")
+            step.rows = {partition: len(self.dataframes[partition])}
+            step.input_bytes = step.output_bytes = stats.bytes
+            step.files = {
+                **stats.modes,
+                "skipped": stats.skipped,
+                "missing": len(stats.missing),
+            }
+
+    def store(self, partition: Partition) -> None:
+        """
+        Write the parquet files and the batch plan of one partition, and record the
+        stage.
+        """
+        from nda import utils
+        from nda.batches import BATCH_PLAN_NAME, plan_batches, write_batch_plan
+
+        with self.metrics.stage("store", partition) as step:
+            store_parquets(
+                [self.parsed[partition]],
+                self.args.output_dir,
+                [partition],
+                parquet_options(self.args),
+                self.args.store_jobs,
+                self.args.parquet_layout,
+                self.shards,
+            )
+            plan_path = self.args.output_dir / partition / BATCH_PLAN_NAME
+            budget = self.args.batch_token_budget
+            if budget is None:
+                plan_path.unlink(missing_ok=True)
+            else:
+                column = self.args.batch_text_column
+                plan = write_batch_plan(
+                    plan_path.parent,
+                    plan_batches(self.parsed[partition], budget, column),
+                    budget,
+                    column,
+                )
+                logger.info(
+                    "Partition '%s': planned %d batches of up to %d tokens",
+                    partition,
+                    len(plan["batches"]),
+                    budget,
+                )
+            self._record(partition, "data")
+            written = [
+                path
+                for target in utils.output_folders(self.args.output_dir / partition)
+                for path in utils.parquet_outputs(target)
+            ]
+            step.rows = {partition: len(self.parsed[partition])}
+            step.output_bytes = file_bytes(written)
+            step.files = {"written": len(written)}
+
+    def _record(self, partition: Partition, stage: str) -> None:
+        """
+        Record the input and output fingerprints of a completed stage.
+        """
+        self.manifest.record(
+            partition,
+            stage,
+            self.inputs[partition, stage],
+            stage_outputs(self.args.output_dir, partition, stage),
+        )
 
 
 def main() -> None:
@@ -92,18 +646,127 @@ def main() -> None:
     logger.info("Starting the Kleister NDA dataset preparation")
     args = parse_args()
 
-    logger.info("1. Loading TSV data into dataframes")
-    dataframes = load_data()
+    from nda import utils
+    from nda.cache import PartitionCache
+    from nda.index import INDEX_NAME, write_index
+    from nda.label_transformer import LabelCache
+    from nda.manifest import RunManifest
+    from nda.shards import write_shard_manifest
+
+    manifest = RunManifest(args.output_dir)
+    inputs = stage_inputs(args)
+    stale: dict[str, list[Partition]] = {"data": [], "documents": []}
+    for partition in PARTITIONS:
+        for stage, partitions in stale.items():
+            outputs = stage_outputs(args.output_dir, partition, stage)
+            if not args.force and manifest.is_current(
+                partition, stage, inputs[partition, stage], outputs
+            ):
+                logger.info(
+                    "Skipping %s stage of partition '%s': inputs and outputs unchanged",
+                    stage,
+                    partition,
+                )
+            else:
+                partitions.append(partition)
+    to_load = [p for p in PARTITIONS if p in stale["data"] or p in stale["documents"]]
+
+    profiler = (
+        StageProfiler(args.profile_dir, args.profile, args.profile_top)
+        if args.profile
+        else None
+    )
+    metrics = RunMetrics(profiler)
+
+    workers = args.stage_workers
+    if profiler is not None and workers > 1:
+        logger.info("Profiling runs one stage at a time; ignoring --stage_workers")
+        workers = 1
+    cache = PartitionCache(args.cache_dir) if args.cache_dir else None
+    label_cache = LabelCache(args.label_cache_size) if args.label_cache_size else None
+    jobs = args.jobs
+    if args.low_memory:
+        logger.info("Low-memory mode: processing one partition at a time")
+        groups = [[partition] for partition in to_load]
+        jobs = 1
+    else:
+        # A run that skips every partition loads nothing
+        groups = [to_load] if to_load else []
+    for group in groups:
+        logger.info("1. Loading TSV data into dataframes: %s", ", ".join(group))
+        with metrics.stage("load", group[0] if args.low_memory else None) as step:
+            dataframes = load_data(group, cache, jobs, args.tsv_engine)
+            shards = shard_partitions(
+                dataframes, args.output_dir, group, args.shard_size
+            )
+            step.rows = rows_per_partition(dataframes, group)
+            step.input_bytes = file_bytes(
+                DATA_DIR / partition / name
+                for partition in group
+                for name in ("in.tsv.xz", "expected.tsv")
+            )
+
+        logger.info(
+            "2. Parsing labels, measuring text, relocating documents and persisting "
+            "parquet files per partition, on %d worker(s)",
+            workers,
+        )
+        stages = PartitionStages(
+            args,
+            manifest,
+            inputs,
+            metrics,
+            dict(zip(group, dataframes, strict=True)),
+            shards,
+            label_cache,
+        )
+        run_tasks(stages.tasks(stale), workers)
+
+        for partition, ranges in shards.items():
+            shard_manifest = write_shard_manifest(
+                dataframes[group.index(partition)],
+                args.output_dir / partition,
+                ranges,
+            )
+            logger.info(
+                "Partition '%s': wrote %d shards of up to %d rows and %d bytes",
+                partition,
+                len(ranges),
+                max(shard["rows"] for shard in shard_manifest["shards"]),
+                max(shard["bytes"] for shard in shard_manifest["shards"]),
+            )
+        # Drop the group's frames before the next one is loaded
+        del dataframes, stages
+        release_memory()
 
-    logger.info("2. Parsing and validating labels")
-    dataframes = parse_labels(dataframes)
+    if to_load or not (args.output_dir / INDEX_NAME).exists():
+        with metrics.stage("index") as step:
+            indexed = write_index(args.output_dir, PARTITIONS)
+            step.rows = {"all": indexed}
+            step.output_bytes = file_bytes([args.output_dir / INDEX_NAME])
+        logger.info("Indexed %d rows for random access", indexed)
+    else:
+        logger.info("Skipping index: no partition was rebuilt")
 
-    logger.info("3. Relocating source documents to output directory")
-    relocate_documents(dataframes, args.output_dir)
+    if cache is not None:
+        logger.info("Partition cache: %s", cache.stats())
+    if label_cache is not None:
+        logger.info("Label cache: %s", label_cache.stats())
 
-    logger.info("4. Persisting dataframes as parquet files")
-    store_parquets(dataframes, args.output_dir)
+    if metrics.stages:
+        logger.info("Stage metrics:")
+        for line in metrics.summary():
+            logger.info("  %s", line)
+    if args.low_memory:
+        # Partitions share the process otherwise, so their peaks are not their own
+        for name, peak in metrics.partition_peaks().items():
+            logger.info("Peak RSS of partition '%s': %.1f MB", name, peak)
+    if args.metrics_out is not None:
+        utils.write_json(args.metrics_out, metrics.to_dict())
+        logger.info("Metrics written to: %s", args.metrics_out)
 
+    if profiler is not None:
+        logger.info("Stage profiles written to: %s", args.profile_dir)
     logger.info("The preparation has completed")
     logger.info("Data is available in: %s", args.output_dir)
 
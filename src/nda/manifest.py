@@ -0,0 +1,114 @@
+"""
+Run manifest recording per-stage fingerprints so unchanged partitions can be skipped.
+"""
+
+import hashlib
+import json
+import threading
+from collections.abc import Iterable
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from nda.cache import fingerprint
+from nda.utils import write_json
+
+MANIFEST_NAME = "run-manifest.json"
+
+# Modules whose code determines the content of the prepared outputs.
+CODE_MODULES = (
+    "arrow_schema.py",
+    "batches.py",
+    "data_loader.py",
+    "label_transformer.py",
+    "main.py",
+    "schema.py",
+    "shards.py",
+    "sinks.py",
+    "utils.py",
+)
+
+
+def digest(*parts: str) -> str:
+    """
+    Return a digest combining several strings, e.g. fingerprints and option values.
+    """
+    combined = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        combined.update(part.encode("utf-8"))
+        combined.update(b"\0")
+    return combined.hexdigest()
+
+
+def tree_fingerprint(paths: Iterable[Path]) -> str:
+    """
+    Return a digest of the names, sizes and mtimes of files under the given paths.
+
+    Only metadata is read, so fingerprinting large output trees takes milliseconds.
+    Missing paths contribute a marker.
+    """
+    combined = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                combined.update(f"{file}\0absent\n".encode())
+                continue
+            if file.is_file():
+                combined.update(
+                    f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode()
+                )
+    return combined.hexdigest()
+
+
+def code_fingerprint() -> str:
+    """
+    Return a digest of the package version and the source of output-defining modules.
+    """
+    try:
+        version = metadata.version("nda")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    package_dir = Path(__file__).parent
+    return digest(version, fingerprint(package_dir / name for name in CODE_MODULES))
+
+
+class RunManifest:
+    """
+    Fingerprints of the inputs and outputs of each stage, per partition, of the last run.
+
+    The manifest lives in the output directory and is rewritten after every recorded
+    stage, so a run interrupted part-way still skips the stages it completed. Stages
+    may be recorded from several threads.
+    """
+
+    def __init__(self, output_dir: Path):
+        self.path = output_dir / MANIFEST_NAME
+        try:
+            self._entries: dict[str, Any] = json.loads(
+                self.path.read_text(encoding="utf-8")
+            )
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+        self._lock = threading.Lock()
+
+    def is_current(self, partition: str, stage: str, inputs: str, outputs: str) -> bool:
+        """
+        Return whether the stage last ran with these inputs and its outputs are untouched.
+        """
+        entry: dict[str, str] | None = self._entries.get(partition, {}).get(stage)
+        return entry == {"inputs": inputs, "outputs": outputs}
+
+    def record(self, partition: str, stage: str, inputs: str, outputs: str) -> None:
+        """
+        Record the fingerprints of a completed stage and persist the manifest.
+        """
+        with self._lock:
+            self._entries.setdefault(partition, {})[stage] = {
+                "inputs": inputs,
+                "outputs": outputs,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, self._entries)
@@ -0,0 +1,200 @@
+"""
+Per-stage metrics of a pipeline run: wall and CPU time, rows, bytes, files and peak RSS.
+"""
+
+import ctypes
+import gc
+import resource
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext, suppress
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from nda.profiling import StageProfiler
+
+PROC_SELF = Path("/proc/self")
+
+
+@dataclass
+class StageMetrics:
+    """
+    What one stage of the pipeline did and what it cost.
+
+    `cpu_s` covers every thread of the process plus any worker processes that
+    finished during the stage. `peak_rss_mb` is the peak resident memory of the
+    process during the stage on Linux, and the peak of the whole run elsewhere.
+    Both include any stages that ran at the same time. `start_s` is the time the
+    stage started, in seconds since the run's first stage started.
+    """
+
+    name: str
+    partition: str | None = None
+    start_s: float = 0.0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    rows: dict[str, int] = field(default_factory=dict)
+    input_bytes: int = 0
+    output_bytes: int = 0
+    files: dict[str, int] = field(default_factory=dict)
+
+
+class RunMetrics:
+    """
+    Collects the metrics of each stage of a run, in the order the stages started.
+
+    Stages may run concurrently from several threads. The peak RSS is only reset
+    when no other stage is running, so an overlapping stage reports the peak since
+    the earliest of them started.
+
+    With a `StageProfiler`, each stage is also profiled; without one, no profiler
+    is started.
+    """
+
+    def __init__(self, profiler: StageProfiler | None = None) -> None:
+        self.stages: list[StageMetrics] = []
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started: tuple[float, float] | None = None
+        self._ended = (0.0, 0.0)
+
+    @contextmanager
+    def stage(self, name: str, partition: str | None = None) -> Iterator[StageMetrics]:
+        """
+        Time the enclosed block as a stage; the block fills in rows, bytes and files.
+
+        The stage is recorded even if the block raises.
+        """
+        metrics = StageMetrics(name, partition)
+        label = name if partition is None else f"{name}-{partition}"
+        profile: AbstractContextManager[None] = (
+            nullcontext() if self.profiler is None else self.profiler.profile(label)
+        )
+        with self._lock:
+            if self._active == 0:
+                reset_peak_rss()
+            self._active += 1
+            wall = time.perf_counter()
+            cpu = _cpu_seconds()
+            if self._started is None:
+                self._started = (wall, cpu)
+            metrics.start_s = wall - self._started[0]
+            self.stages.append(metrics)
+        try:
+            with profile:
+                yield metrics
+        finally:
+            end = (time.perf_counter(), _cpu_seconds())
+            metrics.wall_s = end[0] - wall
+            metrics.cpu_s = end[1] - cpu
+            metrics.peak_rss_mb = peak_rss_mb()
+            with self._lock:
+                self._active -= 1
+                self._ended = max(self._ended, end)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Return the metrics as JSON-serializable data, with run totals.
+
+        The totals span from the start of the first stage to the end of the last.
+        """
+        started = self._started or self._ended
+        return {
+            "wall_s": self._ended[0] - started[0],
+            "cpu_s": self._ended[1] - started[1],
+            "peak_rss_mb": max((s.peak_rss_mb for s in self.stages), default=0.0),
+            "partition_peak_rss_mb": self.partition_peaks(),
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+    def partition_peaks(self) -> dict[str, float]:
+        """
+        Return the highest peak RSS of the stages of each partition, in MB.
+
+        Stages spanning all partitions are left out. When partitions are processed
+        one at a time, this is the memory each partition needs on its own.
+        """
+        peaks: dict[str, float] = {}
+        for stage in self.stages:
+            if stage.partition is not None:
+                peaks[stage.partition] = max(
+                    peaks.get(stage.partition, 0.0), stage.peak_rss_mb
+                )
+        return peaks
+
+    def summary(self) -> list[str]:
+        """
+        Return the lines of a table with one row per stage.
+        """
+        lines = [
+            f"{'stage':<10} {'partition':<9} {'start s':>8} {'wall s':>8} "
+            f"{'cpu s':>8} {'rows':>8} {'in MB':>8} {'out MB':>8} {'files':>7} "
+            f"{'peak MB':>8}"
+        ]
+        for stage in self.stages:
+            lines.append(
+                f"{stage.name:<10} {stage.partition or 'all':<9} "
+                f"{stage.start_s:>8.2f} {stage.wall_s:>8.2f} {stage.cpu_s:>8.2f} "
+                f"{sum(stage.rows.values()):>8} {stage.input_bytes / 1024**2:>8.1f} "
+                f"{stage.output_bytes / 1024**2:>8.1f} {sum(stage.files.values()):>7} "
+                f"{stage.peak_rss_mb:>8.1f}"
+            )
+        return lines
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak RSS of the process to its current RSS; return whether that worked.
+
+    Only Linux supports this, through `/proc/self/clear_refs`.
+    """
+    try:
+        (PROC_SELF / "clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak RSS of the process in MB, since the last reset where supported.
+    """
+    try:
+        status = (PROC_SELF / "status").read_text()
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KiB elsewhere
+        return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+    line = next(line for line in status.splitlines() if line.startswith("VmHWM"))
+    return int(line.split()[1]) / 1024
+
+
+def release_memory() -> None:
+    """
+    Return the memory of dropped objects to the operating system where possible.
+
+    Collects reference cycles, releases the blocks Arrow's allocator keeps cached
+    and, with glibc, trims the free memory at the top of the C heap, so the next
+    stage starts from an RSS close to the memory still in use.
+    """
+    import pyarrow as pa
+
+    gc.collect()
+    pa.default_memory_pool().release_unused()
+    if sys.platform == "linux":
+        # Other C libraries, such as musl, have no malloc_trim
+        with suppress(OSError, AttributeError):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+
+
+def _cpu_seconds() -> float:
+    """
+    Return the CPU time used so far by the process and its finished children.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
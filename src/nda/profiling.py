@@ -0,0 +1,85 @@
+"""
+Optional CPU and memory profiling of pipeline stages with cProfile and tracemalloc.
+"""
+
+import cProfile
+import tracemalloc
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Literal
+
+ProfileMode = Literal["cpu", "memory"]
+
+# Allocations made by the profilers themselves or by the import machinery
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class StageProfiler:
+    """
+    Profiles stages into `directory`: `<stage>.pstats` with the `cpu` mode, and
+    `<stage>-memory.txt`, the top allocation sites, with the `memory` mode.
+
+    cProfile only sees the thread that runs the stage, so time spent in worker
+    threads shows up as waits on their futures; tracemalloc traces every thread.
+    """
+
+    def __init__(
+        self, directory: Path, modes: Collection[ProfileMode], top: int = 25
+    ) -> None:
+        if not modes:
+            raise ValueError("at least one profile mode is required")
+        self.directory = directory
+        self.modes = frozenset(modes)
+        self.top = top
+
+    @contextmanager
+    def profile(self, stage: str) -> Iterator[None]:
+        """
+        Profile the enclosed block and write its reports when it exits.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        cpu = cProfile.Profile() if "cpu" in self.modes else None
+        if "memory" in self.modes:
+            tracemalloc.start()
+        if cpu is not None:
+            cpu.enable()
+        try:
+            yield
+        finally:
+            if cpu is not None:
+                cpu.disable()
+                cpu.dump_stats(self.directory / f"{stage}.pstats")
+            if "memory" in self.modes:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self._write_memory_report(stage, snapshot, current, peak)
+
+    def _write_memory_report(
+        self, stage: str, snapshot: tracemalloc.Snapshot, current: int, peak: int
+    ) -> None:
+        """
+        Write the peak traced memory and the sites holding the most memory at the end.
+        """
+        statistics = snapshot.filter_traces(_IGNORED_FRAMES).statistics("lineno")
+        lines = [
+            f"Stage '{stage}': peak traced memory {peak / 1024**2:.1f} MB, "
+            f"{current / 1024**2:.1f} MB still allocated at the end",
+            f"Top {self.top} allocation sites still holding memory:",
+        ]
+        for rank, stat in enumerate(statistics[: self.top], start=1):
+            frame = stat.traceback[0]
+            lines.append(
+                f"{rank:>4}. {stat.size / 1024**2:>9.2f} MB {stat.count:>9} blocks  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        (self.directory / f"{stage}-memory.txt").write_text(
+            "\n".join(lines) + "\n", encoding="utf-8"
+        )
@@ -0,0 +1,214 @@
+"""
+Reader for prepared outputs with column projection, filter pushdown and memory mapping.
+"""
+
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Literal, overload
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from nda.data_loader import Partition
+from nda.lru import LRUCache
+from nda.utils import JOIN_KEY, LAYOUT_NAME, output_folders
+
+Output = Literal["pandas", "arrow"]
+type Predicate = tuple[str, str, Any]
+type Filters = pc.Expression | Sequence[Predicate] | Sequence[Sequence[Predicate]]
+TableCache = LRUCache[tuple[Any, ...], pa.Table]
+
+PARTITIONS: tuple[Partition, ...] = ("train", "dev-0", "test-A")
+
+
+@overload
+def read_prepared(
+    output_dir: Path,
+    partitions: Sequence[Partition] = ...,
+    columns: Sequence[str] | None = ...,
+    filters: Filters | None = ...,
+    output: Literal["pandas"] = ...,
+    cache: TableCache | None = ...,
+) -> pd.DataFrame: ...
+
+
+@overload
+def read_prepared(
+    output_dir: Path,
+    partitions: Sequence[Partition] = ...,
+    columns: Sequence[str] | None = ...,
+    filters: Filters | None = ...,
+    *,
+    output: Literal["arrow"],
+    cache: TableCache | None = ...,
+) -> pa.Table: ...
+
+
+def read_prepared(
+    output_dir: Path,
+    partitions: Sequence[Partition] = PARTITIONS,
+    columns: Sequence[str] | None = None,
+    filters: Filters | None = None,
+    output: Output = "pandas",
+    cache: TableCache | None = None,
+) -> pd.DataFrame | pa.Table:
+    """
+    Read prepared partitions, with any layout or sharding, as one table.
+
+    Only the requested `columns` are decoded, and only from the files that hold
+    them. `filters` is a pyarrow expression, e.g.
+    `pc.field("labels_schema", "jurisdiction") == "California"`, or a list of
+    `(column, op, value)` tuples, where a dotted column such as
+    `labels_schema.jurisdiction` names a nested struct field (a list of such lists
+    is their disjunction); it is pushed down to the parquet reader, which
+    skips row groups whose statistics rule it out. With the split layout, filters
+    may only reference columns of `meta.parquet`; the text files are then read for
+    the matching filenames only. Partitions lacking a filtered column (labels in
+    `test-A`) contribute no rows. Files are memory-mapped.
+
+    A `partition` column is appended. With a `TableCache`, each folder's result is
+    kept in memory, keyed by the requested columns and filter and by the folder's
+    `layout.json` modification time, so rewritten outputs are never served stale.
+    """
+    expression = (
+        filters
+        if filters is None or isinstance(filters, pc.Expression)
+        else _to_expression(filters)
+    )
+    tables: list[pa.Table] = []
+    unbound: list[str] = []
+    for partition in partitions:
+        for folder in output_folders(output_dir / partition):
+            layout_path = folder / LAYOUT_NAME
+            if not layout_path.exists():
+                continue
+            key = (
+                str(folder),
+                layout_path.stat().st_mtime_ns,
+                None if columns is None else tuple(columns),
+                str(expression),
+            )
+            read = _FolderRead(folder, columns, expression)
+            table = read() if cache is None else cache.get_or_compute(key, read)
+            if table is None:
+                unbound.append(folder.name)
+                continue
+            tables.append(
+                table.append_column(
+                    "partition", pa.array([partition] * table.num_rows, pa.string())
+                )
+            )
+    if not tables:
+        if unbound:
+            raise ValueError(f"filters {expression} do not apply to any partition")
+        raise FileNotFoundError(f"No prepared outputs found in {output_dir}")
+    combined = pa.concat_tables(tables, promote_options="default")
+    missing = [c for c in columns or [] if c not in combined.column_names]
+    if missing:
+        raise KeyError(f"Columns not found in the prepared outputs: {missing}")
+    if output == "arrow":
+        return combined
+    df: pd.DataFrame = combined.to_pandas()
+    return df
+
+
+class _FolderRead:
+    """
+    Reads one partition or shard folder; called directly or as a cache factory.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        columns: Sequence[str] | None,
+        expression: pc.Expression | None,
+    ):
+        self.folder = folder
+        self.columns = columns
+        self.expression = expression
+
+    def __call__(self) -> pa.Table | None:
+        """
+        Return the folder's matching rows, or None if the filter does not apply to it.
+        """
+        layout = json.loads((self.folder / LAYOUT_NAME).read_text(encoding="utf-8"))
+        files: dict[str, list[str]] = layout["files"]
+        available = [column for names in files.values() for column in names]
+        wanted = [
+            column
+            for column in dict.fromkeys(self.columns or available)
+            if column in available
+        ]
+        first, *others = files
+        if self.expression is not None and not _binds(
+            self.folder / first, self.expression
+        ):
+            return None
+
+        seen = set(files[first])
+        needed: dict[str, list[str]] = {}
+        for name in others:
+            needed[name] = [c for c in files[name] if c in wanted and c not in seen]
+            seen.update(files[name])
+        join = any(needed.values())
+        read_first = [
+            c for c in files[first] if c in wanted or (join and c == JOIN_KEY)
+        ]
+        table = _read(self.folder / first, read_first, self.expression)
+        columns = {name: table.column(name) for name in read_first}
+        keys = columns[JOIN_KEY].combine_chunks() if join else None
+        for name in others:
+            if not needed[name]:
+                continue
+            part = _read(
+                self.folder / name,
+                [JOIN_KEY, *needed[name]],
+                None if self.expression is None else pc.field(JOIN_KEY).isin(keys),
+            )
+            if not part.column(JOIN_KEY).combine_chunks().equals(keys):
+                raise ValueError(f"Rows of {name} are not aligned with {first}")
+            columns.update({column: part.column(column) for column in needed[name]})
+        return pa.table({column: columns[column] for column in wanted})
+
+
+def _to_expression(filters: Sequence[Any]) -> pc.Expression:
+    """
+    Convert `(column, op, value)` filters to an expression, resolving dotted
+    columns to nested struct fields.
+    """
+    disjunction = [filters] if filters and isinstance(filters[0], tuple) else filters
+    return pq.filters_to_expression(
+        [
+            [
+                (tuple(column.split(".")) if "." in column else column, op, value)
+                for column, op, value in conjunction
+            ]
+            for conjunction in disjunction
+        ]
+    )
+
+
+def _binds(path: Path, expression: pc.Expression) -> bool:
+    """
+    Return whether every field the expression references exists in the file.
+
+    The check filters an empty table with the file's schema, so no data is read.
+    """
+    try:
+        pq.read_schema(path).empty_table().filter(expression)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return False
+    return True
+
+
+def _read(path: Path, columns: list[str], expression: pc.Expression | None) -> pa.Table:
+    """
+    Read the columns of a memory-mapped parquet file, pushing the filter down.
+    """
+    table: pa.Table = pq.read_table(
+        path, columns=columns, filters=expression, memory_map=True
+    )
+    return table
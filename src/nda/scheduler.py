@@ -0,0 +1,74 @@
+"""
+Runs pipeline stages as a dependency graph on a bounded pool of threads.
+"""
+
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Task:
+    """
+    A named unit of work that may start once the tasks named in `after` have finished.
+    """
+
+    name: str
+    func: Callable[[], Any]
+    after: tuple[str, ...] = ()
+
+
+def run_tasks(tasks: Sequence[Task], workers: int = 1) -> dict[str, Any]:
+    """
+    Run every task after its dependencies and return each task's result by name.
+
+    At most `workers` tasks run at once, and ready tasks start in the order given,
+    so one worker runs them in that order. When a task fails, tasks after it in
+    that order no longer start, running ones finish, and the exception of the
+    earliest failed task is raised. Tasks before the failure still run, so with
+    tasks given in dependency order the error is the one a single worker would
+    raise, however the threads interleave.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be positive, got {workers}")
+    order = {task.name: i for i, task in enumerate(tasks)}
+    if len(order) != len(tasks):
+        raise ValueError("task names must be unique")
+    for task in tasks:
+        unknown = [name for name in task.after if name not in order]
+        if unknown:
+            raise ValueError(f"task {task.name!r} depends on unknown tasks {unknown}")
+
+    results: dict[str, Any] = {}
+    failures: dict[str, BaseException] = {}
+    pending = list(tasks)
+    running: dict[Future[Any], Task] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            cutoff = min(map(order.__getitem__, failures), default=len(tasks))
+            for task in list(pending):
+                if len(running) == workers:
+                    break
+                if order[task.name] < cutoff and all(
+                    name in results for name in task.after
+                ):
+                    pending.remove(task)
+                    running[pool.submit(task.func)] = task
+            if not running:
+                if failures:
+                    break
+                raise ValueError(
+                    f"tasks {[task.name for task in pending]} depend on each other"
+                )
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    results[task.name] = future.result()
+                else:
+                    failures[task.name] = error
+    if failures:
+        raise failures[min(failures, key=order.__getitem__)]
+    return results
@@ -29,6 +29,7 @@ class NDA(BaseModel):
     effective_date: str | None = Field(
         None,
         description="Date in `YYYY-MM-DD` format, at which point the contract is legally binding.",
+        json_schema_extra={"format": "date"},
     )
     jurisdiction: str | None = Field(
         None,
@@ -0,0 +1,184 @@
+"""
+Planning of size-bounded output shards and the shard manifest used for fan-out.
+"""
+
+import json
+import re
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from nda.utils import (
+    BUNDLE_INDEX_NAME,
+    BUNDLE_NAME,
+    SHARD_PREFIX,
+    parquet_outputs,
+    shard_name,
+    write_json,
+)
+
+SHARD_MANIFEST_NAME = "manifest.json"
+
+_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+    "KIB": 1024,
+    "MIB": 1024**2,
+    "GIB": 1024**3,
+}
+
+
+@dataclass(frozen=True)
+class ShardSize:
+    """
+    Upper bound on the size of one shard, in rows or in bytes.
+    """
+
+    limit: int
+    unit: Literal["rows", "bytes"]
+
+
+def parse_shard_size(value: str) -> ShardSize:
+    """
+    Parse a shard size such as `500` (rows) or `64MB`, `1.5GiB`, `100000B` (bytes).
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]i?B|B)?\s*", value, re.IGNORECASE)
+    if match is None:
+        raise ValueError(
+            f"shard size must be a row count or a byte size, got {value!r}"
+        )
+    number, unit = match.groups()
+    if unit is None:
+        if "." in number:
+            raise ValueError(f"a row count must be a whole number, got {value!r}")
+        size = ShardSize(int(number), "rows")
+    else:
+        size = ShardSize(int(float(number) * _UNITS[unit.upper()]), "bytes")
+    if size.limit < 1:
+        raise ValueError(f"shard size must be positive, got {value!r}")
+    return size
+
+
+def plan_shards(df: pd.DataFrame, size: ShardSize, documents_dir: Path) -> list[range]:
+    """
+    Split the rows of a partition into consecutive ranges of at most `size`.
+
+    Byte sizes are estimated per row as the UTF-8 length of its string values plus
+    the size of its source document, which approximates what a worker downloads.
+    A single row larger than the limit gets a shard of its own.
+    """
+    if size.unit == "rows":
+        return [
+            range(start, min(start + size.limit, len(df)))
+            for start in range(0, len(df), size.limit)
+        ]
+    ranges: list[range] = []
+    start = total = 0
+    for row, weight in enumerate(_row_bytes(df, documents_dir)):
+        if row > start and total + weight > size.limit:
+            ranges.append(range(start, row))
+            start, total = row, 0
+        total += weight
+    if start < len(df):
+        ranges.append(range(start, len(df)))
+    return ranges
+
+
+def prune_shards(partition_dir: Path, ranges: list[range]) -> None:
+    """
+    Remove outputs of a previous run whose sharding differs from `ranges`.
+
+    Shard folders are kept only if the shard manifest already describes the same
+    row ranges, so a re-run or an interrupted run reuses documents in place. With
+    shards, unsharded files at the top of the partition are removed; without,
+    every shard folder and the shard manifest are.
+    """
+    try:
+        previous = [
+            shard["rows"]
+            for shard in json.loads(
+                (partition_dir / SHARD_MANIFEST_NAME).read_text(encoding="utf-8")
+            )["shards"]
+        ]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        previous = None
+    if not ranges or previous != [len(rows) for rows in ranges]:
+        for shard_dir in partition_dir.glob(f"{SHARD_PREFIX}*"):
+            shutil.rmtree(shard_dir)
+    if ranges:
+        for path in parquet_outputs(partition_dir):
+            path.unlink()
+        shutil.rmtree(partition_dir / "documents", ignore_errors=True)
+        for name in ("documents.json", BUNDLE_NAME, BUNDLE_INDEX_NAME):
+            (partition_dir / name).unlink(missing_ok=True)
+    else:
+        (partition_dir / SHARD_MANIFEST_NAME).unlink(missing_ok=True)
+
+
+def write_shard_manifest(
+    df: pd.DataFrame, partition_dir: Path, ranges: list[range]
+) -> dict[str, Any]:
+    """
+    Write and return the manifest listing every shard of a partition.
+
+    Each entry gives the shard path relative to the partition, its row count, the
+    bytes it occupies on disk (documents counted at the size of their target) and
+    the ids of its documents, so a scheduler can dispatch shards without listing.
+    """
+    shards = []
+    for index, rows in enumerate(ranges):
+        shard_dir = partition_dir / shard_name(index)
+        filenames = df["filename"].iloc[rows.start : rows.stop].unique().tolist()
+        shards.append(
+            {
+                "path": shard_dir.name,
+                "rows": len(rows),
+                "bytes": sum(
+                    path.stat().st_size
+                    for path in shard_dir.rglob("*")
+                    if path.is_file()
+                ),
+                "documents": [Path(filename).stem for filename in filenames],
+            }
+        )
+    manifest = {"rows": len(df), "shards": shards}
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    write_json(partition_dir / SHARD_MANIFEST_NAME, manifest)
+    return manifest
+
+
+def _row_bytes(df: pd.DataFrame, documents_dir: Path) -> list[int]:
+    """
+    Return the estimated byte size of each row: string values plus its source document.
+    """
+    total = pa.array([0] * len(df), type=pa.int64())
+    for column in df.columns:
+        values = pa.array(df[column])
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            total = pc.add(total, pc.fill_null(pc.binary_length(values), 0))
+    sizes = {
+        filename: _file_size(documents_dir / filename)
+        for filename in df["filename"].unique()
+    }
+    return [
+        weight + sizes[filename]
+        for weight, filename in zip(total.to_pylist(), df["filename"], strict=True)
+    ]
+
+
+def _file_size(path: Path) -> int:
+    """
+    Return the size of a file, or zero if it does not exist.
+    """
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,429 @@
+"""
+Destinations of the prepared outputs: the output sink interface and an object-store sink.
+
+Outputs are addressed by `/`-separated keys relative to the output root, such as
+`train/documents/<md5>.pdf` or `train/shard-00000/data.parquet`. The local
+filesystem sink is `LocalSink`; `ObjectStoreSink` delivers to any store with the
+small `ObjectStore` interface, uploading files while the pipeline is still
+producing the next ones.
+"""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager, ExitStack, contextmanager, suppress
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from types import TracebackType
+from typing import BinaryIO, ClassVar, Literal, Protocol, cast
+
+if sys.platform == "linux":
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+LinkMode = Literal["copy", "hardlink", "symlink", "reflink", "auto"]
+
+# Outputs written through `open` stay in memory up to this size, then spill to disk
+SPOOL_SIZE = 16 * 1024 * 1024
+
+# ioctl request number for FICLONE (_IOW(0x94, 9, int)) from <linux/fs.h>
+FICLONE = 0x40049409
+
+
+class OutputSink(ABC):
+    """
+    Where the pipeline writes its outputs, by key.
+
+    Writes may complete in the background; `flush` waits for every pending write
+    and raises the first error, and reads only see writes that have completed.
+    """
+
+    # How files written through `open` are reported among the placement modes
+    copy_mode: ClassVar[str]
+
+    @abstractmethod
+    def put_file(self, key: str, src: Path, link_mode: LinkMode = "copy") -> str:
+        """
+        Place the local file `src` at `key` and return the placement mode used.
+        """
+
+    @abstractmethod
+    def open(
+        self, key: str, source: Path | None = None
+    ) -> AbstractContextManager[BinaryIO]:
+        """
+        Return a context manager yielding a binary file whose content is stored at
+        `key` once the block exits without an error. `source` names the local file
+        the content is copied from, if any, so sinks can carry over its metadata.
+        """
+
+    @abstractmethod
+    def read_bytes(self, key: str) -> bytes | None:
+        """
+        Return the content stored at `key`, or None if there is none.
+        """
+
+    @abstractmethod
+    def size(self, key: str) -> int | None:
+        """
+        Return the size in bytes of the content stored at `key`, or None if there is none.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Delete the content stored at `key` and everything stored under `key/`.
+        """
+
+    @abstractmethod
+    def listdir(self, key: str) -> list[str]:
+        """
+        Return the sorted names of the contents stored directly under `key/`.
+        """
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        """
+        Store `data` at `key`.
+        """
+        with self.open(key) as out:
+            out.write(data)
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Wait for pending writes and raise the first error among them.
+        """
+
+
+class LocalSink(OutputSink):
+    """
+    Writes outputs as files under `root`, each through a temporary name that is
+    renamed into place, so readers never see a partial file.
+
+    `put_file` honours every link mode, falling back to a copy where the
+    filesystem refuses one (see `nda.utils.relocate_documents`). Writes are synchronous.
+    """
+
+    copy_mode: ClassVar[str] = "copy"
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        """
+        Return the local path of `key`.
+        """
+        return self.root / key
+
+    def put_file(self, key: str, src: Path, link_mode: LinkMode = "copy") -> str:
+        dst = self._target(key)
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        mode = _place(src, tmp, link_mode)
+        tmp.replace(dst)
+        return mode
+
+    @contextmanager
+    def open(self, key: str, source: Path | None = None) -> Iterator[BinaryIO]:
+        dst = self._target(key)
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        # A link left by an interrupted run would be written through to its source
+        tmp.unlink(missing_ok=True)
+        with tmp.open("wb") as out:
+            yield out
+        if source is not None:
+            shutil.copystat(source, tmp)
+        tmp.replace(dst)
+
+    def read_bytes(self, key: str) -> bytes | None:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def size(self, key: str) -> int | None:
+        # Follows symlinks, so a link to a missing source has no size
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+
+    def listdir(self, key: str) -> list[str]:
+        path = self.path(key)
+        return sorted(child.name for child in path.iterdir()) if path.is_dir() else []
+
+    def flush(self) -> None:
+        pass
+
+    def _target(self, key: str) -> Path:
+        """
+        Return the local path of `key`, creating its parent directories.
+        """
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+class ObjectStore(Protocol):
+    """
+    The operations `ObjectStoreSink` needs from an object store client.
+
+    Keys are full object names; a thin adapter maps these onto a client such as
+    boto3's `upload_fileobj`, `get_object`, `head_object`, `delete_objects` and
+    `list_objects_v2`; `upload_fileobj` streams `body` and switches to multipart
+    uploads for large objects. Implementations must be safe to call from several
+    threads.
+    """
+
+    def put(self, key: str, body: BinaryIO) -> None:
+        """
+        Upload the content of `body`, read from its current position, as `key`.
+        """
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Return the content of `key`, or None if there is no such object.
+        """
+
+    def size(self, key: str) -> int | None:
+        """
+        Return the size of `key`, or None if there is no such object.
+        """
+
+    def delete(self, keys: list[str]) -> None:
+        """
+        Delete the objects named in `keys`, ignoring those that do not exist.
+        """
+
+    def list(self, prefix: str) -> list[str]:
+        """
+        Return the keys of every object whose key starts with `prefix`.
+        """
+
+
+class MemoryStore:
+    """
+    An in-memory `ObjectStore`, standing in for a real one in tests and dry runs.
+    """
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, body: BinaryIO) -> None:
+        data = body.read()
+        with self._lock:
+            self.objects[key] = data
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self.objects.get(key)
+
+    def size(self, key: str) -> int | None:
+        data = self.get(key)
+        return None if data is None else len(data)
+
+    def delete(self, keys: list[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self.objects.pop(key, None)
+
+    def list(self, prefix: str) -> list[str]:
+        with self._lock:
+            return sorted(key for key in self.objects if key.startswith(prefix))
+
+
+class ObjectStoreSink(OutputSink):
+    """
+    Delivers outputs to an object store, under `prefix`, with concurrent uploads.
+
+    Uploads run in the background on up to `max_concurrency` threads, so the
+    pipeline keeps placing documents and encoding parquet files while earlier
+    outputs are in flight. At most `max_pending` uploads are queued or running at
+    once; writers block beyond that, which bounds the memory held by outputs
+    waiting for upload. Local files are uploaded straight from their source,
+    and content written through `open` is spooled in memory, or on disk past
+    `SPOOL_SIZE`, until its upload ends. Link modes do not apply: every file is
+    uploaded. Call `flush`, or use the sink as a context manager, to wait for the
+    uploads and surface their errors.
+    """
+
+    copy_mode: ClassVar[str] = "upload"
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        prefix: str = "",
+        max_concurrency: int = 8,
+        max_pending: int | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+        max_pending = max_pending or 2 * max_concurrency
+        if max_pending < max_concurrency:
+            raise ValueError(
+                f"max_pending must be at least max_concurrency, got {max_pending}"
+            )
+        self.store = store
+        self.prefix = prefix.strip("/")
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending: list[Future[None]] = []
+
+    def put_file(self, key: str, src: Path, link_mode: LinkMode = "copy") -> str:
+        self._submit(key, src.open("rb"))
+        return self.copy_mode
+
+    @contextmanager
+    def _spool(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Yield a spooled file that is uploaded to `key` when the block succeeds.
+        """
+        with ExitStack() as cleanup:
+            spool = cast(
+                BinaryIO,
+                cleanup.enter_context(SpooledTemporaryFile(max_size=SPOOL_SIZE)),
+            )
+            yield spool
+            spool.seek(0)
+            # The upload closes the spool from here on
+            cleanup.pop_all()
+        self._submit(key, spool)
+
+    def open(
+        self, key: str, source: Path | None = None
+    ) -> AbstractContextManager[BinaryIO]:
+        return self._spool(key)
+
+    def read_bytes(self, key: str) -> bytes | None:
+        return self.store.get(self._key(key))
+
+    def size(self, key: str) -> int | None:
+        return self.store.size(self._key(key))
+
+    def delete(self, key: str) -> None:
+        name = self._key(key)
+        self.store.delete([name, *self.store.list(f"{name}/")])
+
+    def listdir(self, key: str) -> list[str]:
+        prefix = f"{self._key(key)}/"
+        return sorted(
+            {name[len(prefix) :].split("/", 1)[0] for name in self.store.list(prefix)}
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        errors = [error for future in pending if (error := future.exception())]
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        """
+        Wait for the pending uploads, stop the upload threads and raise the first error.
+        """
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self) -> ObjectStoreSink:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc is None:
+            self.close()
+            return
+        # Keep the error that stopped the block rather than a later upload error
+        with suppress(Exception):
+            self.close()
+
+    def _key(self, key: str) -> str:
+        """
+        Return the object name of an output key.
+        """
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _submit(self, key: str, body: BinaryIO) -> None:
+        """
+        Queue the upload of `body` as `key`, waiting for a free slot first.
+        """
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._upload, self._key(key), body)
+        except BaseException:
+            self._slots.release()
+            body.close()
+            raise
+        with self._lock:
+            self._pending.append(future)
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _upload(self, name: str, body: BinaryIO) -> None:
+        """
+        Upload one object and close its body.
+        """
+        with body:
+            self.store.put(name, body)
+
+
+def _place(src: Path, dst: Path, link_mode: LinkMode) -> str:
+    """
+    Place `src` at `dst` with the first workable mode and return the mode used.
+    """
+    attempts: dict[LinkMode, list[str]] = {
+        "copy": [],
+        "hardlink": ["hardlink"],
+        "symlink": ["symlink"],
+        "reflink": ["reflink"],
+        "auto": ["reflink", "hardlink"],
+    }
+    dst.unlink(missing_ok=True)
+    for mode in attempts[link_mode]:
+        try:
+            if mode == "hardlink":
+                os.link(src, dst)
+            elif mode == "symlink":
+                dst.symlink_to(src.resolve())
+            else:
+                _reflink(src, dst)
+            return mode
+        except OSError as exc:
+            logger.debug("Could not %s %s: %s", mode, src.name, exc)
+            dst.unlink(missing_ok=True)
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """
+    Clone `src` into `dst` as a copy-on-write reflink, preserving file metadata.
+    """
+    if sys.platform != "linux":
+        raise OSError(errno.EOPNOTSUPP, "reflink is only supported on Linux")
+    with src.open("rb") as src_f, dst.open("wb") as dst_f:
+        fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+    shutil.copystat(src, dst)
@@ -2,59 +2,548 @@
 Utilities for relocating PDF documents and persisting partition dataframes as parquet files.
 """
 
+import hashlib
+import json
 import logging
-import shutil
-from collections.abc import Sequence
+import os
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, BinaryIO, Literal, NamedTuple
 
 import pandas as pd
+import pyarrow.parquet as pq
 
+from nda.arrow_schema import to_table
 from nda.data_loader import Partition
+from nda.sinks import LinkMode as LinkMode
+from nda.sinks import LocalSink as LocalSink
+from nda.sinks import OutputSink
 
 logger = logging.getLogger(__name__)
 
+CheckMode = Literal["stat", "hash"]
+Layout = Literal["single", "split"]
+DocumentsFormat = Literal["files", "bundle"]
+
+LAYOUT_NAME = "layout.json"
+SHARD_PREFIX = "shard-"
+BUNDLE_NAME = "documents.bundle"
+BUNDLE_INDEX_NAME = "documents.bundle.json"
+JOIN_KEY = "filename"
+TEXT_PREFIX = "text_"
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# A complete PDF ends with this marker, which readers look for in its last KiB
+PDF_EOF = b"%%EOF"
+PDF_EOF_WINDOW = 1024
+
+
+@dataclass
+class RelocationStats:
+    """
+    Outcome of relocating one partition's documents.
+    """
+
+    modes: Counter[str] = field(default_factory=Counter)
+    skipped: int = 0
+    missing: list[str] = field(default_factory=list)
+    bytes: int = 0
+    verified: int = 0
+    mismatched: list[str] = field(default_factory=list)
+    truncated: list[str] = field(default_factory=list)
+
+    def update(self, other: "RelocationStats") -> None:
+        """
+        Add the outcome of another batch of documents, e.g. another shard.
+        """
+        self.modes.update(other.modes)
+        self.skipped += other.skipped
+        self.missing.extend(other.missing)
+        self.bytes += other.bytes
+        self.verified += other.verified
+        self.mismatched.extend(other.mismatched)
+        self.truncated.extend(other.truncated)
+
+    def record(self, filename: str, content: "Content") -> None:
+        """
+        Count a verified document and flag it if its content is wrong.
+        """
+        self.verified += 1
+        if not content.complete:
+            self.truncated.append(filename)
+        elif Path(filename).stem != content.md5:
+            self.mismatched.append(filename)
+
+
+class Content(NamedTuple):
+    """
+    What one streaming pass over a document learned about it.
+    """
+
+    md5: str
+    size: int
+    expected_size: int
+    tail: bytes
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether the whole file was read and it ends with a PDF end-of-file marker.
+        """
+        return self.size == self.expected_size and PDF_EOF in self.tail
+
 
 def relocate_documents(
     dataframes: Sequence[pd.DataFrame],
     partitions: Sequence[Partition],
     data_dir: Path,
-    output_dir: Path,
-) -> None:
+    output_dir: Path | OutputSink,
+    link_mode: LinkMode = "copy",
+    workers: int = 8,
+    check: CheckMode = "stat",
+    shards: Mapping[Partition, Sequence[range]] | None = None,
+    documents_format: DocumentsFormat = "files",
+    verify: bool = False,
+) -> dict[Partition, RelocationStats]:
     """
-    Copy each partition's referenced PDFs from the raw documents directory to the output.
+    Place each partition's referenced PDFs from the raw documents directory in the output.
+
+    `link_mode` selects how files are placed: a full copy, a hard link, a symbolic
+    link to the source, or a copy-on-write reflink. `auto` tries reflink, then hard
+    link, then copy. Any mode that the filesystem rejects (for example a hard link
+    across devices) falls back to a copy, and the modes actually used are reported
+    per partition.
+
+    Files are placed concurrently by up to `workers` threads, each written under a
+    temporary name and atomically renamed. A `documents.json` manifest next to the
+    partition's `documents/` folder records the source size and mtime (and, with
+    `check="hash"`, the MD5) of every placed file; files whose source still matches
+    their entry are skipped, so an interrupted run resumes where it stopped.
+
+    With `documents_format="bundle"`, the PDFs are instead concatenated in one
+    sequential write into an uncompressed `documents.bundle`, with a
+    `documents.bundle.json` index of each file's offset, length and MD5; read
+    them back with `nda.bundle.DocumentBundle`. Outputs of the other format are
+    removed.
+
+    When `shards` gives row ranges for a partition, each range gets its own
+    `shard-NNNNN/` documents folder or bundle instead.
+
+    With `verify`, every document is checked against the MD5 its filename is
+    named after and for truncation (a size that changed while reading, or no
+    `%%EOF` marker in its last KiB). Copies and bundles compute the MD5 in the
+    same chunked pass that writes them; links and skipped files are read once.
+    Problems are logged and reported in the stats; the documents are still placed.
+
+    `output_dir` may also be an `OutputSink`, such as `nda.sinks.ObjectStoreSink`,
+    which uploads each document from its source while the next ones are placed;
+    link modes only apply to local directories. Either way, the documents have
+    been delivered when this returns.
     """
+    sink = as_sink(output_dir)
+    shards = shards or {}
+    stats: dict[Partition, RelocationStats] = {}
     for df, partition in zip(dataframes, partitions, strict=True):
-        src_docs = data_dir / "documents"
-        dst_docs = output_dir / partition / "documents"
-        dst_docs.mkdir(parents=True, exist_ok=True)
-        filenames = df["filename"].unique()
-        missing = []
-        for filename in filenames:
-            src_file = src_docs / filename
-            dst_file = dst_docs / filename
-            if src_file.exists():
-                shutil.copy2(src_file, dst_file)
+        filenames = df["filename"].unique().tolist()
+        partition_stats = RelocationStats()
+        for shard_df, target in _shard_targets(df, partition, shards.get(partition)):
+            shard_filenames = shard_df["filename"].unique().tolist()
+            if documents_format == "bundle":
+                sink.delete(f"{target}/documents")
+                sink.delete(f"{target}/documents.json")
+                target_stats = _write_bundle(
+                    shard_filenames, data_dir / "documents", sink, target, verify
+                )
             else:
-                missing.append(filename)
-        if missing:
+                sink.delete(f"{target}/{BUNDLE_NAME}")
+                sink.delete(f"{target}/{BUNDLE_INDEX_NAME}")
+                target_stats = _relocate_files(
+                    shard_filenames,
+                    data_dir / "documents",
+                    sink,
+                    f"{target}/documents",
+                    f"{target}/documents.json",
+                    link_mode,
+                    workers,
+                    check,
+                    verify,
+                )
+            partition_stats.update(target_stats)
+        if partition_stats.missing:
             logger.warning(
                 "Partition '%s': %d of %d documents not found: %s",
                 partition,
-                len(missing),
+                len(partition_stats.missing),
                 len(filenames),
-                missing,
+                partition_stats.missing,
             )
+        for problem, names in [
+            ("do not match the MD5 in their filename", partition_stats.mismatched),
+            ("are truncated", partition_stats.truncated),
+        ]:
+            if names:
+                logger.warning(
+                    "Partition '%s': %d of %d verified documents %s: %s",
+                    partition,
+                    len(names),
+                    partition_stats.verified,
+                    problem,
+                    names,
+                )
+        logger.info(
+            "Partition '%s': placed %d documents (%s), skipped %d unchanged",
+            partition,
+            partition_stats.modes.total(),
+            ", ".join(
+                f"{mode}={n}" for mode, n in sorted(partition_stats.modes.items())
+            )
+            or "none",
+            partition_stats.skipped,
+        )
+        stats[partition] = partition_stats
+    return stats
+
+
+def _relocate_files(
+    filenames: Sequence[str],
+    src_docs: Path,
+    sink: OutputSink,
+    dst_docs: str,
+    manifest_key: str,
+    link_mode: LinkMode,
+    workers: int,
+    check: CheckMode,
+    verify: bool = False,
+) -> RelocationStats:
+    """
+    Place files from `src_docs` under the `dst_docs` key concurrently, skipping
+    unchanged files.
+
+    The manifest is rewritten even when placement fails part-way, so entries for
+    the files that did complete survive an interrupted run; it is written after
+    the sink has delivered every file.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be positive, got {workers}")
+    manifest = _read_manifest(sink.read_bytes(manifest_key))
+    stats = RelocationStats()
+
+    def relocate(
+        filename: str,
+    ) -> tuple[str, str | None, dict[str, Any], Content | None]:
+        src_file = src_docs / filename
+        dst_key = f"{dst_docs}/{filename}"
+        try:
+            src_stat = src_file.stat()
+        except FileNotFoundError:
+            return filename, None, {}, None
+        # Hash checks identify content by size and MD5 alone, so touching a
+        # source or checking it out afresh does not place it again
+        entry: dict[str, Any] = {"size": src_stat.st_size, "link_mode": link_mode}
+        content = None
+        if check == "hash":
+            with src_file.open("rb") as src:
+                content = _stream(src, src_stat.st_size)
+            entry["md5"] = content.md5
+        else:
+            entry["mtime_ns"] = src_stat.st_mtime_ns
+        if manifest.get(filename) == entry and sink.size(dst_key) == entry["size"]:
+            if verify and content is None:
+                with src_file.open("rb") as src:
+                    content = _stream(src, src_stat.st_size)
+            return filename, "skipped", entry, content
+        if verify and content is None and link_mode == "copy":
+            with src_file.open("rb") as src, sink.open(dst_key, src_file) as out:
+                content = _stream(src, src_stat.st_size, out)
+            mode = sink.copy_mode
+        else:
+            mode = sink.put_file(dst_key, src_file, link_mode)
+            if verify and content is None:
+                with src_file.open("rb") as src:
+                    content = _stream(src, src_stat.st_size)
+        return filename, mode, entry, content
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for filename, outcome, entry, content in pool.map(relocate, filenames):
+                if outcome is None:
+                    stats.missing.append(filename)
+                    continue
+                if verify and content is not None:
+                    stats.record(filename, content)
+                manifest[filename] = entry
+                if outcome == "skipped":
+                    stats.skipped += 1
+                else:
+                    stats.modes[outcome] += 1
+                    stats.bytes += entry["size"]
+        sink.flush()
+    finally:
+        sink.write_bytes(manifest_key, _json_bytes(manifest))
+        sink.flush()
+    return stats
+
+
+def _write_bundle(
+    filenames: Sequence[str],
+    src_docs: Path,
+    sink: OutputSink,
+    target: str,
+    verify: bool = False,
+) -> RelocationStats:
+    """
+    Concatenate files from `src_docs` into the bundle under `target` and index them.
+
+    The bundle is streamed to the sink, hashing each document on the way, and
+    stored before its index is written.
+    """
+    stats = RelocationStats()
+    entries: dict[str, dict[str, Any]] = {}
+    with sink.open(f"{target}/{BUNDLE_NAME}") as out:
+        for filename in filenames:
+            try:
+                src = (src_docs / filename).open("rb")
+            except FileNotFoundError:
+                stats.missing.append(filename)
+                continue
+            offset = out.tell()
+            with src:
+                content = _stream(src, os.fstat(src.fileno()).st_size, out)
+            entries[filename] = {
+                "offset": offset,
+                "length": content.size,
+                "md5": content.md5,
+            }
+            stats.modes["bundle"] += 1
+            stats.bytes += content.size
+            if verify:
+                stats.record(filename, content)
+    sink.flush()
+    sink.write_bytes(f"{target}/{BUNDLE_INDEX_NAME}", _json_bytes(entries))
+    sink.flush()
+    return stats
+
+
+def _read_manifest(data: bytes | None) -> dict[str, Any]:
+    """
+    Return the relocation manifest in `data`, or an empty one if absent or unreadable.
+    """
+    if data is None:
+        return {}
+    try:
+        manifest: dict[str, Any] = json.loads(data)
+    except json.JSONDecodeError:
+        return {}
+    return manifest
+
+
+def write_json(path: Path, data: Any) -> None:
+    """
+    Write `data` as JSON to `path` atomically through a temporary file.
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(_json_bytes(data))
+    tmp.replace(path)
+
+
+def _json_bytes(data: Any) -> bytes:
+    """
+    Return `data` as the indented, key-sorted JSON the pipeline writes.
+    """
+    return json.dumps(data, indent=2, sort_keys=True).encode("utf-8")
+
+
+def as_sink(output: Path | OutputSink) -> OutputSink:
+    """
+    Return `output` as a sink: a local directory becomes a `LocalSink`.
+    """
+    return output if isinstance(output, OutputSink) else LocalSink(output)
+
+
+def _stream(
+    src: BinaryIO,
+    expected_size: int,
+    out: BinaryIO | None = None,
+    chunk_size: int = COPY_CHUNK_SIZE,
+) -> Content:
+    """
+    Read `src` once in chunks, hashing it and writing it to `out` if given.
+
+    hashlib releases the GIL on large buffers, so threads hash files in parallel.
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    size = 0
+    tail = b""
+    while chunk := src.read(chunk_size):
+        digest.update(chunk)
+        if out is not None:
+            out.write(chunk)
+        size += len(chunk)
+        tail = (
+            chunk[-PDF_EOF_WINDOW:]
+            if len(chunk) >= PDF_EOF_WINDOW
+            else (tail + chunk)[-PDF_EOF_WINDOW:]
+        )
+    return Content(digest.hexdigest(), size, expected_size, tail)
+
+
+@dataclass(frozen=True)
+class ParquetOptions:
+    """
+    Writer settings passed through to `pyarrow.parquet.write_table`.
+
+    `use_dictionary` and `write_statistics` accept either a flag for all columns or
+    the names of the columns to apply them to. `write_page_index` adds page-level
+    column and offset indexes, so readers can skip pages as well as row groups.
+    """
+
+    compression: str = "gzip"
+    compression_level: int | None = None
+    row_group_size: int | None = None
+    use_dictionary: bool | tuple[str, ...] = True
+    write_statistics: bool | tuple[str, ...] = True
+    write_page_index: bool = False
+
+    def writer_kwargs(self) -> dict[str, Any]:
+        """
+        Return the options as keyword arguments for the pyarrow parquet writer.
+        """
+        return {
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "row_group_size": self.row_group_size,
+            "use_dictionary": _flag_or_list(self.use_dictionary),
+            "write_statistics": _flag_or_list(self.write_statistics),
+            "write_page_index": self.write_page_index,
+        }
+
+
+def _flag_or_list(value: bool | tuple[str, ...]) -> bool | list[str]:
+    """
+    Convert a per-column option to the bool-or-list form pyarrow expects.
+    """
+    return value if isinstance(value, bool) else list(value)
 
 
 def to_parquet(
     dataframes: Sequence[pd.DataFrame],
     partitions: Sequence[Partition],
-    output_dir: Path,
+    output_dir: Path | OutputSink,
+    options: ParquetOptions | None = None,
+    jobs: int = 1,
+    layout: Layout = "single",
+    shards: Mapping[Partition, Sequence[range]] | None = None,
 ) -> None:
     """
-    Write each dataframe as a gzip-compressed parquet file under its partition output directory.
+    Write each dataframe as parquet under its partition output directory.
+
+    With the `single` layout each partition is one `data.parquet`. With `split`,
+    the OCR text columns (`text_*`) go to one `<column>.parquet` each, next to a
+    `meta.parquet` holding every other column; all files keep the same row order
+    and carry `filename`, so a reader fetches only the text variants it needs.
+    Either way a `layout.json` lists the files, their columns and the join key.
+    When `shards` gives row ranges for a partition, each range is written this way
+    to its own `shard-NNNNN/` folder instead.
+
+    A `labels_schema` column is written as a typed struct (see `nda.arrow_schema`)
+    rather than inferred from its dictionaries, so readers can filter on its fields.
+    Files are gzip-compressed unless `options` say otherwise. With `jobs` above one,
+    up to `jobs` outputs, whether different partitions or the shards of one
+    partition, are written concurrently in threads; they overlap because pyarrow
+    releases the GIL while encoding and compressing.
+
+    `output_dir` may also be an `OutputSink`; with `nda.sinks.ObjectStoreSink`,
+    each file is uploaded while the next one is encoded, and all of them have been
+    delivered when this returns.
+    """
+    if jobs < 1:
+        raise ValueError(f"jobs must be positive, got {jobs}")
+    sink = as_sink(output_dir)
+    writer_kwargs = (options or ParquetOptions()).writer_kwargs()
+    shards = shards or {}
+    targets = [
+        target
+        for df, partition in zip(dataframes, partitions, strict=True)
+        for target in _shard_targets(df, partition, shards.get(partition))
+    ]
+
+    def write(target: tuple[pd.DataFrame, str]) -> None:
+        df, key = target
+        groups = _column_groups(df.columns.tolist(), layout)
+        for stale in sink.listdir(key):
+            if stale.endswith(".parquet") and stale not in groups:
+                sink.delete(f"{key}/{stale}")
+        for name, columns in groups.items():
+            with sink.open(f"{key}/{name}") as out:
+                pq.write_table(to_table(df[columns]), out, **writer_kwargs)
+        sink.write_bytes(
+            f"{key}/{LAYOUT_NAME}",
+            _json_bytes(
+                {
+                    "layout": layout,
+                    "join_key": JOIN_KEY,
+                    "rows": len(df),
+                    "files": groups,
+                }
+            ),
+        )
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(write, targets))
+    sink.flush()
+
+
+def parquet_outputs(partition_dir: Path) -> list[Path]:
+    """
+    Return the parquet files and the layout manifest found in a partition directory.
     """
-    for df, partition in zip(dataframes, partitions, strict=True):
-        partition_dir = output_dir / partition
-        partition_dir.mkdir(parents=True, exist_ok=True)
-        df.to_parquet(partition_dir / "data.parquet", index=False, compression="gzip")
+    files = sorted(partition_dir.glob("*.parquet"))
+    layout = partition_dir / LAYOUT_NAME
+    return [*files, layout] if layout.exists() else files
+
+
+def output_folders(partition_dir: Path) -> list[Path]:
+    """
+    Return the folders holding a partition's outputs: the partition and its shards.
+    """
+    return [partition_dir, *sorted(partition_dir.glob(f"{SHARD_PREFIX}*"))]
+
+
+def shard_name(index: int) -> str:
+    """
+    Return the folder name of the shard at `index` within a partition.
+    """
+    return f"{SHARD_PREFIX}{index:05d}"
+
+
+def _shard_targets(
+    df: pd.DataFrame, partition: str, ranges: Sequence[range] | None
+) -> list[tuple[pd.DataFrame, str]]:
+    """
+    Return the rows and output key of each shard, or the whole partition unsharded.
+    """
+    if ranges is None:
+        return [(df, partition)]
+    return [
+        (df.iloc[rows.start : rows.stop], f"{partition}/{shard_name(index)}")
+        for index, rows in enumerate(ranges)
+    ]
+
+
+def _column_groups(columns: list[str], layout: Layout) -> dict[str, list[str]]:
+    """
+    Return the columns written to each parquet file of a partition, by file name.
+    """
+    if layout == "single":
+        return {"data.parquet": columns}
+    text = [column for column in columns if column.startswith(TEXT_PREFIX)]
+    meta = [column for column in columns if column not in text]
+    if text and JOIN_KEY not in meta:
+        raise ValueError(f"The split layout needs a '{JOIN_KEY}' column")
+    groups = {"meta.parquet": meta}
+    groups.update({f"{column}.parquet": [JOIN_KEY, column] for column in text})
+    return groups
@@ -0,0 +1,111 @@
+"""
+Tests for arrow_schema.py
+(arrow_type, labels_array, to_table)
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+from pydantic import BaseModel, Field
+
+from nda.arrow_schema import LABELS_SCHEMA_TYPE, arrow_type, labels_array, to_table
+from nda.utils import to_parquet
+
+LABEL = {
+    "effective_date": "2001-04-18",
+    "jurisdiction": "Oregon",
+    "party": [{"name": "Eric_Dean_Sprunk"}, {"name": "Nike_Inc."}],
+    "term": None,
+}
+
+
+class TestArrowType:
+    def test_translates_nda_model(self) -> None:
+        expected = pa.struct(
+            [
+                ("effective_date", pa.date32()),
+                ("jurisdiction", pa.string()),
+                ("party", pa.list_(pa.struct([("name", pa.string())]))),
+                ("term", pa.string()),
+            ]
+        )
+        assert expected == LABELS_SCHEMA_TYPE
+
+    def test_translates_scalars_and_formats(self) -> None:
+        class Model(BaseModel):
+            count: int
+            ratio: float | None
+            flag: bool
+            at: str = Field(json_schema_extra={"format": "date-time"})
+
+        assert arrow_type(Model) == pa.struct(
+            [
+                ("count", pa.int64()),
+                ("ratio", pa.float64()),
+                ("flag", pa.bool_()),
+                ("at", pa.timestamp("us")),
+            ]
+        )
+
+    def test_rejects_unions(self) -> None:
+        class Model(BaseModel):
+            value: int | str
+
+        with pytest.raises(TypeError, match="union"):
+            arrow_type(Model)
+
+    def test_rejects_untyped_fields(self) -> None:
+        class Model(BaseModel):
+            value: object
+
+        with pytest.raises(TypeError, match="Cannot map"):
+            arrow_type(Model)
+
+
+class TestLabelsArray:
+    def test_parses_dates_and_keeps_nulls(self) -> None:
+        empty: dict[str, Any] = {
+            "effective_date": None,
+            "jurisdiction": None,
+            "party": [],
+            "term": "1_years",
+        }
+        array = labels_array([LABEL, None, empty])
+
+        assert array.type == LABELS_SCHEMA_TYPE
+        assert array.to_pylist() == [
+            {**LABEL, "effective_date": date(2001, 4, 18)},
+            None,
+            empty,
+        ]
+
+
+class TestToTable:
+    def test_types_labels_schema_in_place(self) -> None:
+        df = pd.DataFrame({"filename": ["a.pdf"], "labels_schema": [LABEL], "x": [1]})
+        table = to_table(df)
+        assert table.column_names == ["filename", "labels_schema", "x"]
+        assert table.schema.field("labels_schema").type == LABELS_SCHEMA_TYPE
+
+    def test_without_labels_schema(self) -> None:
+        table = to_table(pd.DataFrame({"filename": ["a.pdf"]}))
+        assert table.column_names == ["filename"]
+
+    def test_parquet_filters_on_label_fields(self, tmp_path: Path) -> None:
+        later = {**LABEL, "effective_date": "2010-01-01", "party": [{"name": "Acme"}]}
+        df = pd.DataFrame(
+            {"filename": ["a.pdf", "b.pdf"], "labels_schema": [LABEL, later]}
+        )
+        to_parquet([df], ["train"], tmp_path)
+
+        table = pq.read_table(
+            tmp_path / "train" / "data.parquet",
+            filters=pc.field("labels_schema", "effective_date") > date(2005, 1, 1),
+        )
+        assert table.column("filename").to_pylist() == ["b.pdf"]
@@ -0,0 +1,142 @@
+"""
+Tests for batches.py
+(length_stats, plan_batches, write_batch_plan, plan_partition)
+"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from nda.batches import (
+    BATCH_PLAN_NAME,
+    Batch,
+    length_stats,
+    plan_batches,
+    plan_partition,
+    write_batch_plan,
+)
+from nda.utils import Layout, to_parquet
+
+
+def documents(*tokens: int) -> pd.DataFrame:
+    """Build a partition whose documents have the given token counts."""
+    return pd.DataFrame(
+        {
+            "filename": [f"d{i}.pdf" for i in range(len(tokens))],
+            "text_best": ["abcd" * n for n in tokens],
+        }
+    )
+
+
+class TestLengthStats:
+    def test_counts_chars_tokens_and_lines(self) -> None:
+        df = pd.DataFrame(
+            {
+                "filename": ["a.pdf", "b.pdf", "c.pdf", "d.pdf"],
+                "text_best": ["ab\\ncd\\nef", "é" * 9, "", None],
+                "labels": ["x", "y", "z", "w"],
+            }
+        )
+
+        stats = length_stats(df)
+
+        assert stats["chars_text_best"].tolist() == [10, 9, 0, 0]
+        assert stats["tokens_text_best"].tolist() == [3, 3, 0, 0]
+        assert stats["lines_text_best"].tolist() == [3, 1, 0, 0]
+        assert "chars_labels" not in stats.columns
+        assert list(df.columns) == ["filename", "text_best", "labels"]
+
+    def test_one_set_per_text_variant(self) -> None:
+        df = pd.DataFrame(
+            {"filename": ["a.pdf"], "text_djvu": ["a"], "text_best": ["ab"]}
+        )
+        stats = length_stats(df)
+        assert stats.columns.tolist()[3:] == [
+            "chars_text_djvu",
+            "tokens_text_djvu",
+            "lines_text_djvu",
+            "chars_text_best",
+            "tokens_text_best",
+            "lines_text_best",
+        ]
+        assert stats["chars_text_best"].dtype == "int64"
+
+    def test_split_layout_keeps_stats_with_meta(self, tmp_path: Path) -> None:
+        to_parquet([length_stats(documents(1, 2))], ["train"], tmp_path, layout="split")
+        layout = json.loads((tmp_path / "train" / "layout.json").read_text())
+        assert layout["files"]["text_best.parquet"] == ["filename", "text_best"]
+        assert "tokens_text_best" in layout["files"]["meta.parquet"]
+
+
+class TestPlanBatches:
+    def test_packs_tightly_under_the_budget(self) -> None:
+        batches = plan_batches(length_stats(documents(5, 4, 3, 3, 2, 2, 1)), 10)
+
+        assert sorted(batch.tokens for batch in batches) == [10, 10]
+        placed = [name for batch in batches for name in batch.filenames]
+        assert sorted(placed) == [f"d{i}.pdf" for i in range(7)]
+
+    def test_largest_documents_first(self) -> None:
+        batches = plan_batches(documents(1, 6, 3), 6)
+        assert batches == [Batch(("d1.pdf",), 6), Batch(("d2.pdf", "d0.pdf"), 4)]
+
+    def test_oversized_document_gets_its_own_batch(self) -> None:
+        batches = plan_batches(documents(2, 12, 3), 10)
+        assert batches == [Batch(("d1.pdf",), 12), Batch(("d2.pdf", "d0.pdf"), 5)]
+
+    def test_uses_the_requested_variant(self) -> None:
+        df = documents(4, 4).assign(text_djvu=["a", "abcd" * 8])
+        assert len(plan_batches(df, 8)) == 1
+        assert len(plan_batches(df, 8, "text_djvu")) == 2
+
+    def test_empty_partition(self) -> None:
+        assert plan_batches(documents(), 10) == []
+
+    def test_rejects_invalid_budget(self) -> None:
+        with pytest.raises(ValueError, match="budget"):
+            plan_batches(documents(1), 0)
+
+
+class TestBatchPlan:
+    def test_writes_plan(self, tmp_path: Path) -> None:
+        batches = [Batch(("ab12.pdf", "cd34.pdf"), 7), Batch(("ef56.pdf",), 9)]
+
+        plan = write_batch_plan(tmp_path / "train", batches, 10, "text_best")
+
+        assert json.loads((tmp_path / "train" / BATCH_PLAN_NAME).read_text()) == plan
+        assert plan["documents"] == 3
+        assert plan["tokens"] == 16
+        assert plan["batches"][0] == {"documents": ["ab12", "cd34"], "tokens": 7}
+
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_plans_prepared_partition(self, tmp_path: Path, layout: Layout) -> None:
+        df = length_stats(documents(5, 4, 3, 3, 2, 2, 1))
+        to_parquet(
+            [df],
+            ["train"],
+            tmp_path,
+            layout=layout,
+            shards={"train": [range(0, 3), range(3, 7)]},
+        )
+
+        plan = plan_partition(tmp_path, "train", 10)
+
+        expected = plan_batches(df, 10)
+        assert [batch["tokens"] for batch in plan["batches"]] == [
+            batch.tokens for batch in expected
+        ]
+        assert (tmp_path / "train" / BATCH_PLAN_NAME).exists()
+
+    def test_split_layout_plans_without_reading_text(self, tmp_path: Path) -> None:
+        to_parquet([length_stats(documents(3, 9))], ["train"], tmp_path, layout="split")
+        (tmp_path / "train" / "text_best.parquet").unlink()
+
+        plan = plan_partition(tmp_path, "train", 10)
+
+        assert plan["tokens"] == 12
+
+    def test_falls_back_to_text_without_stats(self, tmp_path: Path) -> None:
+        to_parquet([documents(3, 9)], ["train"], tmp_path)
+        assert plan_partition(tmp_path, "train", 10)["tokens"] == 12
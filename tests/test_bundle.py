@@ -0,0 +1,125 @@
+"""
+Tests for bundle.py
+(DocumentBundle) and the bundle documents format of relocate_documents
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from nda.bundle import DocumentBundle
+from nda.utils import relocate_documents
+
+CONTENTS = {"alpha.pdf": b"%PDF-alpha", "beta.pdf": b"%PDF-beta", "empty.pdf": b""}
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    docs = tmp_path / "data" / "documents"
+    docs.mkdir(parents=True)
+    for name, content in CONTENTS.items():
+        (docs / name).write_bytes(content)
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def partition_dir(data_dir: Path, tmp_path: Path) -> Path:
+    df = pd.DataFrame({"filename": [*CONTENTS, "alpha.pdf", "missing.pdf"]})
+    relocate_documents(
+        [df], ["train"], data_dir, tmp_path / "output", documents_format="bundle"
+    )
+    return tmp_path / "output" / "train"
+
+
+class TestBundleFormat:
+    def test_packs_documents_in_order(self, partition_dir: Path) -> None:
+        bundle = (partition_dir / "documents.bundle").read_bytes()
+        assert bundle == b"".join(CONTENTS.values())
+
+    def test_indexes_offsets_lengths_and_md5(self, partition_dir: Path) -> None:
+        index = json.loads((partition_dir / "documents.bundle.json").read_text())
+        assert index["beta.pdf"] == {
+            "offset": 10,
+            "length": 9,
+            "md5": hashlib.md5(b"%PDF-beta").hexdigest(),
+        }
+        assert "missing.pdf" not in index
+
+    def test_reports_bundled_and_missing(self, data_dir: Path, tmp_path: Path) -> None:
+        df = pd.DataFrame({"filename": ["alpha.pdf", "missing.pdf"]})
+        stats = relocate_documents(
+            [df], ["train"], data_dir, tmp_path, documents_format="bundle"
+        )
+        assert stats["train"].modes == {"bundle": 1}
+        assert stats["train"].bytes == len(CONTENTS["alpha.pdf"])
+        assert stats["train"].missing == ["missing.pdf"]
+
+    def test_switching_format_removes_other_outputs(
+        self, data_dir: Path, partition_dir: Path
+    ) -> None:
+        df = pd.DataFrame({"filename": ["alpha.pdf"]})
+        output_dir = partition_dir.parent
+
+        relocate_documents([df], ["train"], data_dir, output_dir)
+        assert not (partition_dir / "documents.bundle").exists()
+        assert not (partition_dir / "documents.bundle.json").exists()
+
+        relocate_documents(
+            [df], ["train"], data_dir, output_dir, documents_format="bundle"
+        )
+        assert not (partition_dir / "documents").exists()
+        assert not (partition_dir / "documents.json").exists()
+
+
+class TestDocumentBundle:
+    def test_reads_single_documents(self, partition_dir: Path) -> None:
+        with DocumentBundle(partition_dir) as bundle:
+            assert len(bundle) == 3
+            assert "beta.pdf" in bundle
+            for name, content in CONTENTS.items():
+                assert bundle.read(name, verify=True) == content
+
+    def test_views_without_copying(self, partition_dir: Path) -> None:
+        with DocumentBundle(partition_dir) as bundle:
+            view = bundle.view("beta.pdf")
+            assert view.readonly
+            assert view.tobytes() == b"%PDF-beta"
+            view.release()
+
+    def test_views_empty_document(self, tmp_path: Path) -> None:
+        (tmp_path / "documents.bundle").write_bytes(b"")
+        (tmp_path / "documents.bundle.json").write_text(
+            json.dumps({"empty.pdf": {"offset": 0, "length": 0, "md5": ""}})
+        )
+        with DocumentBundle(tmp_path) as bundle:
+            assert bundle.view("empty.pdf").tobytes() == b""
+
+    def test_unknown_document(self, partition_dir: Path) -> None:
+        with DocumentBundle(partition_dir) as bundle, pytest.raises(KeyError):
+            bundle.read("missing.pdf")
+
+    def test_detects_corruption(self, partition_dir: Path) -> None:
+        path = partition_dir / "documents.bundle"
+        path.write_bytes(path.read_bytes().replace(b"beta", b"BETA"))
+        with DocumentBundle(partition_dir) as bundle:
+            assert bundle.read("beta.pdf") == b"%PDF-BETA"
+            with pytest.raises(ValueError, match="MD5 mismatch"):
+                bundle.read("beta.pdf", verify=True)
+
+    def test_detects_truncation(self, partition_dir: Path) -> None:
+        path = partition_dir / "documents.bundle"
+        path.write_bytes(path.read_bytes()[:12])
+        with DocumentBundle(partition_dir) as bundle:
+            with pytest.raises(ValueError, match="truncated"):
+                bundle.read("beta.pdf")
+            with pytest.raises(ValueError, match="truncated"):
+                bundle.view("beta.pdf")
+
+    def test_close_is_idempotent(self, partition_dir: Path) -> None:
+        bundle = DocumentBundle(partition_dir)
+        bundle.view("alpha.pdf").release()
+        bundle.close()
+        bundle.close()
@@ -0,0 +1,119 @@
+"""
+Tests for cache.py
+(fingerprint, PartitionCache: Arrow IPC partition cache)
+"""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from nda import cache as cache_module
+from nda.cache import PartitionCache, fingerprint
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> PartitionCache:
+    return PartitionCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame({"filename": ["a.pdf", "b.pdf"], "labels": ["x", None]})
+
+
+class TestFingerprint:
+    def test_same_content_same_digest(self, tmp_path: Path) -> None:
+        (tmp_path / "a").write_text("hello", encoding="utf-8")
+        assert fingerprint([tmp_path / "a"]) == fingerprint([tmp_path / "a"])
+
+    def test_changed_content_changes_digest(self, tmp_path: Path) -> None:
+        path = tmp_path / "a"
+        path.write_text("hello", encoding="utf-8")
+        before = fingerprint([path])
+        path.write_text("world", encoding="utf-8")
+        assert fingerprint([path]) != before
+
+    def test_missing_file_differs_from_empty_file(self, tmp_path: Path) -> None:
+        missing = fingerprint([tmp_path / "a"])
+        (tmp_path / "a").write_bytes(b"")
+        assert fingerprint([tmp_path / "a"]) != missing
+
+
+class TestPartitionCache:
+    def test_miss_on_empty_cache(self, cache: PartitionCache) -> None:
+        assert cache.get("train", "k1") is None
+        assert cache.stats() == {"hits": 0, "misses": 1, "evictions": 0}
+
+    def test_round_trip(self, cache: PartitionCache, df: pd.DataFrame) -> None:
+        cache.put("train", "k1", df)
+        result = cache.get("train", "k1")
+        assert result is not None
+        pd.testing.assert_frame_equal(result, df)
+        assert cache.hits == 1
+
+    def test_different_key_misses(
+        self, cache: PartitionCache, df: pd.DataFrame
+    ) -> None:
+        cache.put("train", "k1", df)
+        assert cache.get("train", "k2") is None
+
+    def test_put_replaces_stale_entry(
+        self, cache: PartitionCache, df: pd.DataFrame
+    ) -> None:
+        cache.put("train", "k1", df)
+        cache.put("train", "k2", df)
+        assert len(list(cache.cache_dir.glob("train-*.arrow"))) == 1
+        assert cache.get("train", "k1") is None
+
+    def test_older_format_misses_and_is_replaced(
+        self,
+        cache: PartitionCache,
+        df: pd.DataFrame,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        version = cache_module.CACHE_FORMAT_VERSION
+        monkeypatch.setattr(cache_module, "CACHE_FORMAT_VERSION", version - 1)
+        cache.put("train", "k1", df)
+        monkeypatch.setattr(cache_module, "CACHE_FORMAT_VERSION", version)
+
+        assert cache.get("train", "k1") is None
+        cache.put("train", "k1", df)
+        assert [p.name for p in cache.cache_dir.glob("train-*.arrow")] == [
+            f"train-v{version}-k1.arrow"
+        ]
+
+    def test_other_partitions_untouched(
+        self, cache: PartitionCache, df: pd.DataFrame
+    ) -> None:
+        cache.put("train", "k1", df)
+        cache.put("dev-0", "k1", df)
+        assert cache.get("train", "k1") is not None
+
+    def test_evicts_least_recently_used(self, tmp_path: Path, df: pd.DataFrame) -> None:
+        probe = PartitionCache(tmp_path / "probe")
+        probe.put("train", "k", df)
+        entry_size = next(probe.cache_dir.glob("*.arrow")).stat().st_size
+
+        cache = PartitionCache(tmp_path / "cache", max_bytes=2 * entry_size)
+        cache.put("train", "k", df)
+        cache.put("dev-0", "k", df)
+        # Distinct past mtimes, as filesystem clocks can give both writes the same
+        for age, partition in enumerate(["dev-0", "train"], start=1):
+            path = next(cache.cache_dir.glob(f"{partition}-*.arrow"))
+            os.utime(path, ns=(0, 10**9 * (100 - age)))
+        assert cache.get("train", "k") is not None
+        cache.put("test-A", "k", df)
+
+        assert cache.evictions == 1
+        assert cache.get("dev-0", "k") is None
+        assert cache.get("train", "k") is not None
+        assert cache.get("test-A", "k") is not None
+
+    def test_oversized_entry_is_kept(self, tmp_path: Path, df: pd.DataFrame) -> None:
+        cache = PartitionCache(tmp_path / "cache", max_bytes=1)
+        cache.put("train", "k", df)
+        cache.put("dev-0", "k", df)
+        assert cache.evictions == 1
+        assert cache.get("dev-0", "k") is not None
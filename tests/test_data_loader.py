@@ -6,9 +6,13 @@ Tests for data_loader.py
 import lzma
 from pathlib import Path
 
+import pandas as pd
 import pytest
 
-from nda.data_loader import DataLoader
+from nda.cache import PartitionCache
+from nda.data_loader import DataLoader, Partition, TsvEngine
+
+STATIC_DATA = Path(__file__).parents[1] / "src" / "nda" / "static" / "data"
 
 
 def _write_xz(path: Path, content: str) -> None:
@@ -95,3 +99,156 @@ class TestLoadTest:
     def test_values_match_fixture_data(self, loader: DataLoader) -> None:
         df = loader.load("test-A")
         assert df["col_a"].tolist() == ["dave"]
+
+
+class TestIterBatches:
+    def test_batches_are_bounded(self, loader: DataLoader) -> None:
+        batches = list(loader.iter_batches("train", batch_rows=1))
+        assert [len(batch) for batch in batches] == [1, 1]
+
+    def test_concatenated_batches_match_load(self, loader: DataLoader) -> None:
+        batches = list(loader.iter_batches("train", batch_rows=1))
+        pd.testing.assert_frame_equal(pd.concat(batches), loader.load("train"))
+
+    def test_labels_stay_aligned(self, loader: DataLoader) -> None:
+        batches = list(loader.iter_batches("train", batch_rows=1))
+        assert batches[1]["col_a"].tolist() == ["bob"]
+        assert batches[1]["labels"].tolist() == ["neg"]
+
+    def test_test_a_batches_exclude_labels(self, loader: DataLoader) -> None:
+        batches = list(loader.iter_batches("test-A"))
+        assert len(batches) == 1
+        assert list(batches[0].columns) == ["col_a", "col_b"]
+
+    def test_batch_larger_than_partition(self, loader: DataLoader) -> None:
+        batches = list(loader.iter_batches("dev-0", batch_rows=10))
+        assert len(batches) == 1
+        assert batches[0]["labels"].tolist() == ["pos"]
+
+    def test_rejects_non_positive_batch_rows(self, loader: DataLoader) -> None:
+        with pytest.raises(ValueError, match="batch_rows"):
+            next(loader.iter_batches("train", batch_rows=0))
+
+    def test_label_count_mismatch_raises(self, loader: DataLoader) -> None:
+        (loader.data_dir / "train" / "expected.tsv").write_text(
+            "pos\n", encoding="utf-8"
+        )
+        with pytest.raises(ValueError):
+            list(loader.iter_batches("train", batch_rows=1))
+
+
+class TestCachedLoad:
+    @pytest.fixture
+    def cache(self, tmp_path: Path) -> PartitionCache:
+        return PartitionCache(tmp_path / "cache")
+
+    def test_cold_load_misses_then_warm_load_hits(
+        self, data_dir: Path, cache: PartitionCache
+    ) -> None:
+        loader = DataLoader(data_dir, cache=cache)
+        loader.load("train")
+        loader.load("train")
+        assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+    def test_warm_load_matches_uncached(
+        self, data_dir: Path, cache: PartitionCache, loader: DataLoader
+    ) -> None:
+        cached = DataLoader(data_dir, cache=cache)
+        cached.load("dev-0")
+        pd.testing.assert_frame_equal(cached.load("dev-0"), loader.load("dev-0"))
+
+    def test_test_a_is_cached_without_labels(
+        self, data_dir: Path, cache: PartitionCache
+    ) -> None:
+        loader = DataLoader(data_dir, cache=cache)
+        loader.load("test-A")
+        assert list(loader.load("test-A").columns) == ["col_a", "col_b"]
+        assert cache.hits == 1
+
+    def test_changed_labels_invalidate_entry(
+        self, data_dir: Path, cache: PartitionCache
+    ) -> None:
+        loader = DataLoader(data_dir, cache=cache)
+        loader.load("train")
+        (data_dir / "train" / "expected.tsv").write_text("neg\npos\n", encoding="utf-8")
+        df = loader.load("train")
+        assert df["labels"].tolist() == ["neg", "pos"]
+        assert cache.misses == 2
+
+    def test_fingerprint_depends_on_partition(self, loader: DataLoader) -> None:
+        assert loader.fingerprint("train") != loader.fingerprint("dev-0")
+
+
+class TestTsvEngines:
+    PARTITIONS: tuple[Partition, ...] = ("train", "dev-0", "test-A")
+
+    @pytest.mark.parametrize("partition", PARTITIONS)
+    def test_engines_match_on_bundled_data(self, partition: Partition) -> None:
+        expected = DataLoader(STATIC_DATA).load(partition)
+        result = DataLoader(STATIC_DATA, engine="pyarrow").load(partition)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_pyarrow_returns_arrow_backed_strings(self, data_dir: Path) -> None:
+        df = DataLoader(data_dir, engine="pyarrow").load("train")
+        assert all(isinstance(df[c].array, pd.arrays.ArrowStringArray) for c in df)
+
+    @pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+    def test_quotes_are_text(self, data_dir: Path, engine: TsvEngine) -> None:
+        _write_xz(data_dir / "test-A" / "in.tsv.xz", '"dave\t4" and "5\n')
+        df = DataLoader(data_dir, engine=engine).load("test-A")
+        assert df.iloc[0].tolist() == ['"dave', '4" and "5']
+
+    @pytest.mark.parametrize("engine", ["pandas", "pyarrow"])
+    def test_only_empty_fields_are_missing(
+        self, data_dir: Path, engine: TsvEngine
+    ) -> None:
+        _write_xz(data_dir / "test-A" / "in.tsv.xz", "NA\t\nnull\t4\n")
+        df = DataLoader(data_dir, engine=engine).load("test-A")
+        assert df["col_a"].tolist() == ["NA", "null"]
+        assert df["col_b"].isna().tolist() == [True, False]
+
+    def test_engines_match_on_fixture(self, data_dir: Path) -> None:
+        expected = DataLoader(data_dir).load_many(self.PARTITIONS)
+        result = DataLoader(data_dir, engine="pyarrow").load_many(self.PARTITIONS)
+        for left, right in zip(result, expected, strict=True):
+            pd.testing.assert_frame_equal(left, right)
+
+
+class TestLoadMany:
+    PARTITIONS: tuple[Partition, ...] = ("train", "dev-0", "test-A")
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_results_follow_partition_order(
+        self, loader: DataLoader, jobs: int
+    ) -> None:
+        dataframes = loader.load_many(self.PARTITIONS, jobs=jobs)
+        assert [df["col_a"].tolist() for df in dataframes] == [
+            ["alice", "bob"],
+            ["carol"],
+            ["dave"],
+        ]
+
+    def test_parallel_matches_sequential(self, loader: DataLoader) -> None:
+        sequential = loader.load_many(self.PARTITIONS)
+        parallel = loader.load_many(self.PARTITIONS, jobs=3)
+        for expected, result in zip(sequential, parallel, strict=True):
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_parallel_uses_and_fills_cache(
+        self, data_dir: Path, tmp_path: Path
+    ) -> None:
+        cache = PartitionCache(tmp_path / "cache")
+        loader = DataLoader(data_dir, cache=cache)
+        loader.load("train")
+        loader.load_many(self.PARTITIONS, jobs=2)
+        loader.load_many(self.PARTITIONS, jobs=2)
+        assert cache.stats() == {"hits": 4, "misses": 3, "evictions": 0}
+
+    def test_parallel_propagates_errors(self, loader: DataLoader) -> None:
+        (loader.data_dir / "dev-0" / "in.tsv.xz").unlink()
+        with pytest.raises(FileNotFoundError):
+            loader.load_many(self.PARTITIONS, jobs=2)
+
+    def test_rejects_non_positive_jobs(self, loader: DataLoader) -> None:
+        with pytest.raises(ValueError, match="jobs"):
+            loader.load_many(self.PARTITIONS, jobs=0)
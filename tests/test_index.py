@@ -0,0 +1,169 @@
+"""
+Tests for index.py
+(write_index, lookup)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pyarrow import feather
+
+import nda
+from nda.data_loader import Partition
+from nda.index import INDEX_NAME, write_index
+from nda.utils import Layout, ParquetOptions, relocate_documents, to_parquet
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "filename": [f"d{i}.pdf" for i in range(5)],
+            "keys": ["party"] * 5,
+            "text_best": [f"best {i}" for i in range(5)],
+            "text_djvu": [f"djvu {i}" for i in range(5)],
+        }
+    )
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    docs = tmp_path / "data" / "documents"
+    docs.mkdir(parents=True)
+    for i in range(5):
+        (docs / f"d{i}.pdf").write_bytes(b"%PDF" * (i + 1))
+    return tmp_path / "data"
+
+
+def _prepare(
+    df: pd.DataFrame,
+    data_dir: Path,
+    output_dir: Path,
+    layout: Layout = "single",
+    shards: dict[Partition, list[range]] | None = None,
+) -> None:
+    """Write the train partition in row groups of two rows and index it."""
+    relocate_documents([df], ["train"], data_dir, output_dir, shards=shards)
+    options = ParquetOptions(row_group_size=2)
+    to_parquet([df], ["train"], output_dir, options, layout=layout, shards=shards)
+    write_index(output_dir, ["train", "dev-0"])
+
+
+class TestWriteIndex:
+    def test_maps_filenames_to_row_groups(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir)
+
+        index = feather.read_table(output_dir / INDEX_NAME).to_pylist()
+
+        assert [entry["filename"] for entry in index] == list(df["filename"])
+        assert [(e["row_group"], e["row_offset"]) for e in index] == [
+            (0, 0),
+            (0, 1),
+            (1, 0),
+            (1, 1),
+            (2, 0),
+        ]
+        assert index[3]["path"] == "train"
+        assert index[3]["document"] == "train/documents/d3.pdf"
+        assert index[3]["document_size"] == 16
+
+    def test_indexes_shards(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir, shards={"train": [range(0, 3), range(3, 5)]})
+
+        index = feather.read_table(output_dir / INDEX_NAME).to_pylist()
+
+        assert index[3]["path"] == "train/shard-00001"
+        assert (index[3]["row_group"], index[3]["row_offset"]) == (0, 0)
+
+    def test_empty_output(self, tmp_path: Path) -> None:
+        assert write_index(tmp_path, ["train"]) == 0
+
+
+class TestLookup:
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_returns_row_and_document(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path, layout: Layout
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir, layout)
+
+        record = nda.lookup(output_dir, "d3.pdf")
+
+        assert record.partition == "train"
+        assert record.row == df.iloc[3].to_dict()
+        assert record.document == output_dir / "train" / "documents" / "d3.pdf"
+        assert record.document.read_bytes() == b"%PDF" * 4
+        assert record.document_size == 16
+
+    def test_projects_columns(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir, "split")
+        (output_dir / "train" / "text_djvu.parquet").unlink()
+
+        record = nda.lookup(output_dir, "d4.pdf", columns=["text_best"])
+
+        assert record.row == {"text_best": "best 4"}
+
+    def test_reads_sharded_rows(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir, shards={"train": [range(0, 3), range(3, 5)]})
+
+        record = nda.lookup(output_dir, "d4.pdf")
+
+        assert record.row["text_best"] == "best 4"
+        assert record.document.parent.parent.name == "shard-00001"
+
+    def test_reads_documents_from_bundle(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        relocate_documents(
+            [df], ["train"], data_dir, output_dir, documents_format="bundle"
+        )
+        to_parquet([df], ["train"], output_dir)
+        write_index(output_dir, ["train"])
+
+        record = nda.lookup(output_dir, "d2.pdf", columns=["filename"])
+
+        assert record.document == output_dir / "train" / "documents.bundle"
+        assert (record.document_offset, record.document_size) == (12, 12)
+        assert record.read_document() == b"%PDF" * 3
+
+    def test_reads_documents_from_files(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir)
+        record = nda.lookup(output_dir, "d1.pdf")
+        assert record.document_offset is None
+        assert record.read_document() == b"%PDF" * 2
+
+    def test_sees_rewritten_index(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir)
+        nda.lookup(output_dir, "d0.pdf")
+
+        _prepare(df.assign(keys="term"), data_dir, output_dir)
+
+        assert nda.lookup(output_dir, "d0.pdf").row["keys"] == "term"
+
+    def test_unknown_filename(
+        self, df: pd.DataFrame, data_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        _prepare(df, data_dir, output_dir)
+        with pytest.raises(KeyError):
+            nda.lookup(output_dir, "missing.pdf")
@@ -0,0 +1,65 @@
+"""
+Tests for __init__.py
+(lazy exports, cold import time of the package and the CLI)
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import nda
+
+HEAVY = ("pandas", "pyarrow", "pydantic")
+
+# Cumulative cold import time allowed for the CLI module; pandas alone takes
+# several times this long, so eagerly importing any heavy dependency fails
+IMPORT_BUDGET_US = 150_000
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+class TestLazyExports:
+    def test_exports_resolve(self) -> None:
+        from nda.data_loader import DataLoader
+        from nda.index import lookup
+
+        assert nda.DataLoader is DataLoader
+        assert nda.lookup is lookup
+        assert nda.utils.__name__ == "nda.utils"
+
+    def test_unknown_attribute(self) -> None:
+        with pytest.raises(AttributeError, match="nope"):
+            nda.nope  # noqa: B018
+
+    def test_dir_lists_exports(self) -> None:
+        assert set(nda.__all__) <= set(dir(nda))
+
+
+class TestColdImport:
+    @pytest.mark.parametrize("module", ["nda", "nda.main"])
+    def test_does_not_load_heavy_dependencies(self, module: str) -> None:
+        result = _run(
+            f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+        )
+        assert result.stdout.strip() == ""
+
+    def test_schema_does_not_load_pandas(self) -> None:
+        result = _run("import sys, nda.schema; print('pandas' in sys.modules)")
+        assert result.stdout.strip() == "False"
+
+    def test_cli_import_time_within_budget(self) -> None:
+        result = _run("import nda.main", "-X", "importtime")
+        line = next(
+            line for line in result.stderr.splitlines() if line.endswith("| nda.main")
+        )
+        cumulative_us = int(line.split("|")[1])
+        assert cumulative_us < IMPORT_BUDGET_US
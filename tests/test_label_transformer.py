@@ -1,20 +1,29 @@
 """
 Tests for label_transformer.py
-(sort_label_fields, parse_label_to_schema, label_schema_to_string, transform)
+(sort_label_fields, parse_label_to_schema, parse_labels_to_schema,
+label_schema_to_string, transform)
 """
 
+import logging
+from pathlib import Path
 from typing import Any
 
 import pandas as pd
 import pytest
+from pydantic import ValidationError
 
+import nda
 from nda.label_transformer import (
+    LabelCache,
     label_schema_to_string,
     parse_label_to_schema,
+    parse_labels_to_schema,
     sort_label_fields,
     transform,
 )
 
+DATA_DIR = Path(nda.__file__).parent / "static" / "data"
+
 
 class TestSortLabelFields:
     def test_already_canonical_order_unchanged(self) -> None:
@@ -189,3 +198,139 @@ class TestTransform:
         )
         result = transform(df, "train")
         assert result["labels_canonical"].iloc[0] == result["labels_serialized"].iloc[0]
+
+
+class TestVectorizedEngine:
+    LABELS = [
+        "effective_date=2020-01-01 jurisdiction=California party=Acme term=2_years",
+        "term=2_years party=Acme effective_date=2020-01-01 jurisdiction=California",
+        "party=Acme term=1_year party=Globex",
+        "decoy=noise effective_date=2020-01-01",
+        "  term=1_year  ",
+        "",
+        "jurisdiction=New:York jurisdiction=Texas party=Corp:LLC",
+        "decoy=a=b party=MPB",
+    ]
+
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"filename": [f"{i}.pdf" for i in range(len(self.LABELS))]},
+        ).assign(labels=self.LABELS)
+
+    def test_matches_python_engine(self, df: pd.DataFrame) -> None:
+        expected = transform(df, "train")
+        result = transform(df, "train", engine="vectorized")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_matches_python_engine_on_bundled_labels(self) -> None:
+        path = DATA_DIR / "train" / "expected.tsv"
+        df = pd.read_csv(path, sep="\t", header=None, names=["labels"])
+        expected = transform(df, "train")
+        result = transform(df, "train", engine="vectorized")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_preserves_non_default_index(self, df: pd.DataFrame) -> None:
+        df.index = pd.RangeIndex(100, 100 + len(df))
+        expected = transform(df, "dev-0")
+        result = transform(df, "dev-0", engine="vectorized")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_handles_concatenated_frames(self, df: pd.DataFrame) -> None:
+        combined = pd.concat([df, df], ignore_index=True)
+        expected = transform(combined, "train")
+        result = transform(combined, "train", engine="vectorized")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_invalid_value_raises_validation_error(self) -> None:
+        df = pd.DataFrame({"labels": ["effective_date=01/02/2020"]})
+        with pytest.raises(ValidationError, match="YYYY-MM-DD"):
+            transform(df, "train", engine="vectorized")
+
+    def test_token_without_equals_raises(self) -> None:
+        df = pd.DataFrame({"labels": ["party=Acme orphan"]})
+        with pytest.raises(ValueError, match="orphan"):
+            transform(df, "train", engine="vectorized")
+
+    def test_test_a_returns_dataframe_unchanged(self) -> None:
+        df = pd.DataFrame({"filename": ["a.pdf"]})
+        result = transform(df, "test-A", engine="vectorized")
+        pd.testing.assert_frame_equal(result, df)
+
+
+class TestParseLabelsToSchema:
+    def test_matches_per_row_parsing(self) -> None:
+        strings = ["party=Acme term=1_year", "", "jurisdiction=New:York decoy=x"]
+        results, errors = parse_labels_to_schema(strings)
+        assert results == [parse_label_to_schema(s) for s in strings]
+        assert errors == []
+
+    def test_invalid_rows_reported_not_raised(self) -> None:
+        strings = ["party=Acme", "effective_date=01/02/2020", "term=forever"]
+        results, errors = parse_labels_to_schema(strings)
+        assert results[0] == parse_label_to_schema("party=Acme")
+        assert results[1] is None
+        assert results[2] is None
+        assert [(e.row, e.field) for e in errors] == [
+            (1, "effective_date"),
+            (2, "term"),
+        ]
+        assert "YYYY-MM-DD" in errors[0].message
+
+    def test_all_rows_invalid(self) -> None:
+        results, errors = parse_labels_to_schema(["term=x", "effective_date=x"])
+        assert results == [None, None]
+        assert len(errors) == 2
+
+    def test_empty_batch(self) -> None:
+        assert parse_labels_to_schema([]) == ([], [])
+
+
+class TestBatchEngine:
+    def test_matches_python_engine_on_bundled_labels(self) -> None:
+        path = DATA_DIR / "dev-0" / "expected.tsv"
+        df = pd.read_csv(path, sep="\t", header=None, names=["labels"])
+        expected = transform(df, "dev-0")
+        result = transform(df, "dev-0", engine="batch")
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_invalid_rows_logged_and_left_empty(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        df = pd.DataFrame({"labels": ["party=Acme", "term=forever"]})
+        with caplog.at_level(logging.WARNING):
+            result = transform(df, "train", engine="batch")
+        assert "1 of 2" in caplog.text
+        assert result["labels_schema"].iloc[1] is None
+        assert pd.isna(result["labels_serialized"].iloc[1])
+        assert result["labels_serialized"].iloc[0] == "party=Acme"
+
+
+class TestLabelCache:
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"labels": ["party=Acme term=1_year", "term=1_year party=Acme"] * 3}
+        )
+
+    def test_cached_output_matches_uncached(self, df: pd.DataFrame) -> None:
+        cache = LabelCache(16)
+        result = transform(df, "train", cache=cache)
+        pd.testing.assert_frame_equal(result, transform(df, "train"))
+
+    def test_repeated_labels_hit_cache(self, df: pd.DataFrame) -> None:
+        cache = LabelCache(16)
+        transform(df, "train", cache=cache)
+        # two distinct raw labels sort to one canonical label
+        assert cache.misses == 3
+        assert cache.hits == 9
+
+    def test_cache_is_bounded(self, df: pd.DataFrame) -> None:
+        cache = LabelCache(1)
+        transform(df, "train", cache=cache)
+        assert len(cache) == 1
+        assert cache.evictions > 0
+
+    def test_cache_rejected_for_other_engines(self, df: pd.DataFrame) -> None:
+        with pytest.raises(ValueError, match="python engine"):
+            transform(df, "train", engine="vectorized", cache=LabelCache(16))
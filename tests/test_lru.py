@@ -0,0 +1,61 @@
+"""
+Tests for lru.py
+(LRUCache: bounded, thread-safe memoization)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nda.lru import LRUCache
+
+
+class TestLRUCache:
+    def test_miss_computes_and_stores(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(2)
+        assert cache.get_or_compute("a", lambda: 1) == 1
+        assert len(cache) == 1
+        assert cache.stats() == {"hits": 0, "misses": 1, "evictions": 0}
+
+    def test_hit_skips_factory(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.get_or_compute("a", lambda: 1)
+        assert cache.get_or_compute("a", lambda: 2) == 1
+        assert cache.hits == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("c", lambda: 3)
+        assert cache.evictions == 1
+        assert cache.get_or_compute("a", lambda: -1) == 1
+        assert cache.get_or_compute("b", lambda: -2) == -2
+
+    def test_rejects_non_positive_size(self) -> None:
+        with pytest.raises(ValueError, match="max_size"):
+            LRUCache(0)
+
+    def test_factory_errors_are_not_cached(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(2)
+
+        def fail() -> int:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("a", fail)
+        assert cache.get_or_compute("a", lambda: 1) == 1
+
+    def test_shared_across_threads(self) -> None:
+        cache: LRUCache[int, int] = LRUCache(8)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(
+                    lambda i: cache.get_or_compute(i % 4, lambda: i % 4), range(200)
+                )
+            )
+        assert results == [i % 4 for i in range(200)]
+        stats = cache.stats()
+        assert stats["hits"] + stats["misses"] == 200
+        assert len(cache) == 4
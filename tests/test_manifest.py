@@ -0,0 +1,112 @@
+"""
+Tests for manifest.py
+(digest, tree_fingerprint, code_fingerprint, RunManifest)
+"""
+
+import os
+from importlib import metadata
+from pathlib import Path
+
+import pytest
+
+from nda import manifest
+from nda.manifest import (
+    CODE_MODULES,
+    MANIFEST_NAME,
+    RunManifest,
+    code_fingerprint,
+    digest,
+    tree_fingerprint,
+)
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    """Create a small directory tree with two files."""
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("a", encoding="utf-8")
+    (root / "sub" / "b.txt").write_text("b", encoding="utf-8")
+    return root
+
+
+class TestDigest:
+    def test_deterministic(self) -> None:
+        assert digest("a", "b") == digest("a", "b")
+
+    def test_part_boundaries_matter(self) -> None:
+        assert digest("ab", "c") != digest("a", "bc")
+
+
+class TestTreeFingerprint:
+    def test_stable_without_changes(self, tree: Path) -> None:
+        assert tree_fingerprint([tree]) == tree_fingerprint([tree])
+
+    def test_changes_when_file_modified(self, tree: Path) -> None:
+        before = tree_fingerprint([tree])
+        (tree / "sub" / "b.txt").write_text("bb", encoding="utf-8")
+        assert tree_fingerprint([tree]) != before
+
+    def test_changes_when_mtime_changes(self, tree: Path) -> None:
+        before = tree_fingerprint([tree])
+        os.utime(tree / "a.txt", ns=(0, 0))
+        assert tree_fingerprint([tree]) != before
+
+    def test_changes_when_file_added(self, tree: Path) -> None:
+        before = tree_fingerprint([tree])
+        (tree / "c.txt").write_text("c", encoding="utf-8")
+        assert tree_fingerprint([tree]) != before
+
+    def test_missing_path_differs_from_existing(self, tree: Path) -> None:
+        assert tree_fingerprint([tree / "a.txt"]) != tree_fingerprint(
+            [tree / "missing.txt"]
+        )
+
+
+class TestCodeFingerprint:
+    def test_stable(self) -> None:
+        assert code_fingerprint() == code_fingerprint()
+
+    def test_covers_the_modules_that_shape_outputs(self) -> None:
+        package_dir = Path(manifest.__file__).parent
+        assert {"main.py", "utils.py", "sinks.py"} <= set(CODE_MODULES)
+        assert all((package_dir / name).is_file() for name in CODE_MODULES)
+
+    def test_tolerates_uninstalled_package(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def not_found(name: str) -> str:
+            raise metadata.PackageNotFoundError(name)
+
+        installed = code_fingerprint()
+        monkeypatch.setattr(metadata, "version", not_found)
+        assert code_fingerprint() != installed
+
+
+class TestRunManifest:
+    def test_empty_manifest_is_never_current(self, tmp_path: Path) -> None:
+        manifest = RunManifest(tmp_path)
+        assert not manifest.is_current("train", "data", "in", "out")
+
+    def test_recorded_stage_is_current(self, tmp_path: Path) -> None:
+        manifest = RunManifest(tmp_path)
+        manifest.record("train", "data", "in", "out")
+        assert manifest.is_current("train", "data", "in", "out")
+        assert not manifest.is_current("train", "documents", "in", "out")
+
+    def test_changed_inputs_or_outputs_are_stale(self, tmp_path: Path) -> None:
+        manifest = RunManifest(tmp_path)
+        manifest.record("train", "data", "in", "out")
+        assert not manifest.is_current("train", "data", "in2", "out")
+        assert not manifest.is_current("train", "data", "in", "out2")
+
+    def test_persists_across_instances(self, tmp_path: Path) -> None:
+        RunManifest(tmp_path / "out").record("dev-0", "documents", "in", "out")
+        assert (tmp_path / "out" / MANIFEST_NAME).exists()
+        assert RunManifest(tmp_path / "out").is_current(
+            "dev-0", "documents", "in", "out"
+        )
+
+    def test_corrupt_manifest_starts_empty(self, tmp_path: Path) -> None:
+        (tmp_path / MANIFEST_NAME).write_text("{oops", encoding="utf-8")
+        assert not RunManifest(tmp_path).is_current("train", "data", "in", "out")
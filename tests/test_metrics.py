@@ -0,0 +1,175 @@
+"""
+Tests for metrics.py
+(RunMetrics, StageMetrics, peak RSS, release_memory)
+"""
+
+import ctypes
+import json
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+from nda import metrics
+from nda.metrics import RunMetrics
+
+
+class TestRunMetrics:
+    def test_records_stages_in_order(self) -> None:
+        run = RunMetrics()
+        with run.stage("load") as stage:
+            stage.rows = {"train": 3, "dev-0": 2}
+            stage.input_bytes = 2 * 1024**2
+        with run.stage("store") as stage:
+            stage.output_bytes = 1024
+            stage.files = {"written": 2}
+
+        assert [stage.name for stage in run.stages] == ["load", "store"]
+        assert run.stages[0].rows == {"train": 3, "dev-0": 2}
+        assert run.stages[1].files == {"written": 2}
+
+    def test_measures_time_and_memory(self) -> None:
+        run = RunMetrics()
+        with run.stage("work"):
+            sum(i * i for i in range(200_000))
+
+        stage = run.stages[0]
+        assert stage.wall_s > 0
+        assert stage.cpu_s > 0
+        assert stage.peak_rss_mb > 0
+
+    def test_records_failed_stage(self) -> None:
+        run = RunMetrics()
+        with pytest.raises(RuntimeError), run.stage("broken"):
+            raise RuntimeError
+        assert [stage.name for stage in run.stages] == ["broken"]
+
+    def test_serializes_with_totals(self) -> None:
+        run = RunMetrics()
+        for name in ("load", "store"):
+            with run.stage(name) as stage:
+                stage.rows = {"train": 1}
+
+        data = json.loads(json.dumps(run.to_dict()))
+
+        last = run.stages[-1]
+        assert data["wall_s"] == pytest.approx(last.start_s + last.wall_s)
+        assert data["peak_rss_mb"] == max(s.peak_rss_mb for s in run.stages)
+        assert data["stages"][1]["name"] == "store"
+        assert data["stages"][1]["rows"] == {"train": 1}
+
+    def test_empty_run(self) -> None:
+        assert RunMetrics().to_dict()["peak_rss_mb"] == 0.0
+
+    def test_summary_has_a_row_per_stage(self) -> None:
+        run = RunMetrics()
+        with run.stage("load") as stage:
+            stage.rows = {"train": 254, "dev-0": 83}
+            stage.input_bytes = 3 * 1024**2
+        with run.stage("store", "train"):
+            pass
+
+        header, load, store = run.summary()
+
+        assert header.split() == [
+            "stage",
+            "partition",
+            "start",
+            "s",
+            "wall",
+            "s",
+            "cpu",
+            "s",
+            "rows",
+            "in",
+            "MB",
+            "out",
+            "MB",
+            "files",
+            "peak",
+            "MB",
+        ]
+        assert load.split()[:2] == ["load", "all"]
+        assert load.split()[5:7] == ["337", "3.0"]
+        assert store.split()[:2] == ["store", "train"]
+
+    def test_partition_peaks(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        peaks = iter([100.0, 40.0, 60.0, 30.0, 120.0])
+        monkeypatch.setattr(metrics, "peak_rss_mb", lambda: next(peaks))
+        run = RunMetrics()
+        for name, partition in [
+            ("load", "train"),
+            ("labels", "train"),
+            ("store", "train"),
+            ("load", "dev-0"),
+            ("index", None),
+        ]:
+            with run.stage(name, partition):
+                pass
+
+        assert run.partition_peaks() == {"train": 100.0, "dev-0": 30.0}
+        assert run.to_dict()["partition_peak_rss_mb"] == {"train": 100.0, "dev-0": 30.0}
+
+    def test_overlapping_stages(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        resets: list[str] = []
+        monkeypatch.setattr(metrics, "reset_peak_rss", lambda: resets.append("x"))
+        run = RunMetrics()
+        both = threading.Barrier(2)
+
+        def stage(partition: str) -> None:
+            with run.stage("documents", partition):
+                both.wait()
+
+        with run.stage("labels", "train"):
+            threads = [
+                threading.Thread(target=stage, args=(p,)) for p in ("dev-0", "test-A")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert [s.name for s in run.stages] == ["labels", "documents", "documents"]
+        assert resets == ["x"]
+        assert run.to_dict()["wall_s"] == pytest.approx(run.stages[0].wall_s)
+
+
+class TestPeakRss:
+    def test_reset_lowers_peak_to_current(self) -> None:
+        if not metrics.reset_peak_rss():
+            pytest.skip("peak RSS cannot be reset on this platform")
+        ballast = bytearray(64 * 1024**2)
+        ballast[::4096] = b"x" * len(ballast[::4096])
+        high = metrics.peak_rss_mb()
+        del ballast
+
+        metrics.reset_peak_rss()
+
+        assert metrics.peak_rss_mb() < high - 32
+
+    def test_falls_back_to_rusage(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(metrics, "PROC_SELF", tmp_path / "missing")
+        assert not metrics.reset_peak_rss()
+        assert metrics.peak_rss_mb() > 0
+
+
+class TestReleaseMemory:
+    def test_releases_arrow_pool(self) -> None:
+        pool = pa.default_memory_pool()
+        array = pa.array(range(1_000_000))
+        assert pool.bytes_allocated() > 0
+        del array
+
+        metrics.release_memory()
+
+        assert pool.bytes_allocated() == 0
+
+    def test_tolerates_libc_without_trim(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        def missing(name: str) -> None:
+            raise OSError(name)
+
+        monkeypatch.setattr(ctypes, "CDLL", missing)
+        metrics.release_memory()
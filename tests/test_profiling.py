@@ -0,0 +1,74 @@
+"""
+Tests for profiling.py
+(StageProfiler: cProfile and tracemalloc reports per stage)
+"""
+
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from nda.metrics import RunMetrics
+from nda.profiling import StageProfiler
+
+
+def _allocate() -> list[bytes]:
+    return [bytes(1024) for _ in range(1000)]
+
+
+class TestStageProfiler:
+    def test_writes_pstats(self, tmp_path: Path) -> None:
+        profiler = StageProfiler(tmp_path / "profiles", ["cpu"])
+        with profiler.profile("load"):
+            _allocate()
+
+        stats = pstats.Stats(str(tmp_path / "profiles" / "load.pstats"))
+
+        assert any(name == "_allocate" for _, _, name in stats.stats)  # type: ignore[attr-defined]
+        assert not (tmp_path / "profiles" / "load-memory.txt").exists()
+
+    def test_writes_memory_report(self, tmp_path: Path) -> None:
+        profiler = StageProfiler(tmp_path, ["memory"], top=3)
+        with profiler.profile("labels"):
+            kept = [
+                _allocate(),
+                [bytearray(512) for _ in range(500)],
+                [str(i) * 50 for i in range(500)],
+                [[i] * 20 for i in range(500)],
+            ]
+
+        report = (tmp_path / "labels-memory.txt").read_text().splitlines()
+
+        assert report[0].startswith("Stage 'labels': peak traced memory")
+        assert len(report) == 2 + 3
+        assert __file__ in report[2]
+        assert not tracemalloc.is_tracing()
+        assert not (tmp_path / "labels.pstats").exists()
+        del kept
+
+    def test_profiles_both(self, tmp_path: Path) -> None:
+        profiler = StageProfiler(tmp_path, ["cpu", "memory"])
+        with pytest.raises(RuntimeError), profiler.profile("store"):
+            raise RuntimeError
+        assert (tmp_path / "store.pstats").exists()
+        assert (tmp_path / "store-memory.txt").exists()
+
+    def test_requires_a_mode(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="mode"):
+            StageProfiler(tmp_path, [])
+
+
+class TestProfiledRun:
+    def test_profiles_every_stage(self, tmp_path: Path) -> None:
+        run = RunMetrics(StageProfiler(tmp_path, ["cpu"]))
+        for name in ("load", "store"):
+            with run.stage(name):
+                _allocate()
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "load.pstats",
+            "store.pstats",
+        ]
+
+    def test_off_by_default(self) -> None:
+        assert RunMetrics().profiler is None
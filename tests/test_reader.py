@@ -0,0 +1,207 @@
+"""
+Tests for reader.py
+(read_prepared: projection, filter pushdown, layouts, shards, table cache)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+import nda
+from nda.data_loader import Partition
+from nda.reader import TableCache
+from nda.utils import Layout, to_parquet
+
+
+@pytest.fixture
+def train() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "filename": ["a.pdf", "b.pdf", "c.pdf"],
+            "keys": ["party", "term", "party"],
+            "labels_schema": [
+                {"jurisdiction": j, "party": [], "effective_date": None, "term": None}
+                for j in ["California", "Oregon", "California"]
+            ],
+            "text_best": ["alpha", "beta", "gamma"],
+        }
+    )
+
+
+@pytest.fixture
+def test_a() -> pd.DataFrame:
+    return pd.DataFrame({"filename": ["z.pdf"], "keys": ["party"], "text_best": ["z"]})
+
+
+def _write(
+    train: pd.DataFrame,
+    test_a: pd.DataFrame,
+    output_dir: Path,
+    layout: Layout = "single",
+    shards: dict[Partition, list[range]] | None = None,
+) -> None:
+    to_parquet(
+        [train, test_a], ["train", "test-A"], output_dir, layout=layout, shards=shards
+    )
+
+
+JURISDICTION = pc.field("labels_schema", "jurisdiction") == "California"
+
+
+class TestReadPrepared:
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_reads_all_partitions(
+        self,
+        train: pd.DataFrame,
+        test_a: pd.DataFrame,
+        tmp_path: Path,
+        layout: Layout,
+    ) -> None:
+        _write(train, test_a, tmp_path, layout)
+
+        df = nda.read_prepared(tmp_path, columns=["filename", "text_best"])
+
+        assert list(df.columns) == ["filename", "text_best", "partition"]
+        assert df["filename"].tolist() == ["a.pdf", "b.pdf", "c.pdf", "z.pdf"]
+        assert df["partition"].tolist() == ["train"] * 3 + ["test-A"]
+
+    def test_reads_every_column_by_default(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        df = nda.read_prepared(tmp_path, partitions=["train"])
+        assert list(df.columns) == [*train.columns, "partition"]
+
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_pushes_down_nested_filter(
+        self,
+        train: pd.DataFrame,
+        test_a: pd.DataFrame,
+        tmp_path: Path,
+        layout: Layout,
+    ) -> None:
+        _write(train, test_a, tmp_path, layout)
+
+        df = nda.read_prepared(
+            tmp_path, columns=["filename", "text_best"], filters=JURISDICTION
+        )
+
+        assert df["filename"].tolist() == ["a.pdf", "c.pdf"]
+        assert df["text_best"].tolist() == ["alpha", "gamma"]
+
+    def test_accepts_tuple_filters(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        df = nda.read_prepared(
+            tmp_path, columns=["filename"], filters=[("keys", "==", "term")]
+        )
+        assert df["filename"].tolist() == ["b.pdf"]
+
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_tuple_filters_reach_nested_fields(
+        self,
+        train: pd.DataFrame,
+        test_a: pd.DataFrame,
+        tmp_path: Path,
+        layout: Layout,
+    ) -> None:
+        _write(train, test_a, tmp_path, layout)
+
+        df = nda.read_prepared(
+            tmp_path,
+            columns=["filename"],
+            filters=[("labels_schema.jurisdiction", "==", "California")],
+        )
+
+        assert df["filename"].tolist() == ["a.pdf", "c.pdf"]
+
+    def test_tuple_filter_disjunction(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        df = nda.read_prepared(
+            tmp_path,
+            partitions=["train"],
+            columns=["filename"],
+            filters=[
+                [("labels_schema.jurisdiction", "==", "Oregon")],
+                [("filename", "==", "c.pdf")],
+            ],
+        )
+        assert df["filename"].tolist() == ["b.pdf", "c.pdf"]
+
+    def test_reads_shards(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path, "split", {"train": [range(0, 2), range(2, 3)]})
+
+        df = nda.read_prepared(tmp_path, partitions=["train"], filters=JURISDICTION)
+
+        assert df["filename"].tolist() == ["a.pdf", "c.pdf"]
+
+    def test_returns_arrow_tables(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        table = nda.read_prepared(tmp_path, columns=["labels_schema"], output="arrow")
+        assert isinstance(table, pa.Table)
+        assert pa.types.is_struct(table.schema.field("labels_schema").type)
+
+    def test_rejects_filter_matching_no_partition(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        with pytest.raises(ValueError, match="do not apply"):
+            nda.read_prepared(tmp_path, filters=pc.field("nope") == 1)
+
+    def test_rejects_unknown_columns(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        with pytest.raises(KeyError, match="nope"):
+            nda.read_prepared(tmp_path, columns=["filename", "nope"])
+
+    def test_rejects_missing_outputs(self, tmp_path: Path) -> None:
+        with pytest.raises(FileNotFoundError):
+            nda.read_prepared(tmp_path)
+
+    def test_rejects_misaligned_split_files(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path, "split")
+        to_parquet([train.iloc[::-1]], ["dev-0"], tmp_path, layout="split")
+        (tmp_path / "dev-0" / "text_best.parquet").replace(
+            tmp_path / "train" / "text_best.parquet"
+        )
+        with pytest.raises(ValueError, match="not aligned"):
+            nda.read_prepared(tmp_path, partitions=["train"], filters=JURISDICTION)
+
+
+class TestTableCache:
+    def test_serves_repeated_reads_from_cache(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        cache = TableCache(8)
+
+        first = nda.read_prepared(tmp_path, columns=["filename"], cache=cache)
+        second = nda.read_prepared(tmp_path, columns=["filename"], cache=cache)
+
+        pd.testing.assert_frame_equal(first, second)
+        assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 0}
+
+    def test_rewritten_outputs_miss(
+        self, train: pd.DataFrame, test_a: pd.DataFrame, tmp_path: Path
+    ) -> None:
+        _write(train, test_a, tmp_path)
+        cache = TableCache(8)
+        nda.read_prepared(tmp_path, partitions=["train"], cache=cache)
+
+        _write(train.assign(keys="term"), test_a, tmp_path)
+        df = nda.read_prepared(tmp_path, partitions=["train"], cache=cache)
+
+        assert set(df["keys"]) == {"term"}
@@ -0,0 +1,103 @@
+"""
+Tests for scheduler.py
+(Task, run_tasks: dependency order, bounded concurrency, deterministic failures)
+"""
+
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from nda.scheduler import Task, run_tasks
+
+
+class TestRunTasks:
+    def test_returns_results_by_name(self) -> None:
+        results = run_tasks([Task("a", lambda: 1), Task("b", lambda: 2)])
+        assert results == {"a": 1, "b": 2}
+
+    def test_single_worker_runs_in_given_order(self) -> None:
+        calls: list[str] = []
+        tasks = [Task(name, partial(calls.append, name)) for name in ("c", "a", "b")]
+        run_tasks(tasks)
+        assert calls == ["c", "a", "b"]
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_dependencies_finish_first(self, workers: int) -> None:
+        finished: list[str] = []
+
+        def work(name: str, delay: float) -> None:
+            time.sleep(delay)
+            finished.append(name)
+
+        tasks = [
+            Task("store", lambda: work("store", 0), after=("labels",)),
+            Task("labels", lambda: work("labels", 0.05)),
+            Task("documents", lambda: work("documents", 0)),
+        ]
+        run_tasks(tasks, workers)
+        assert finished.index("labels") < finished.index("store")
+
+    def test_overlaps_independent_tasks(self) -> None:
+        both = threading.Barrier(2, timeout=5)
+        tasks = [Task("io", both.wait), Task("cpu", both.wait)]
+        run_tasks(tasks, workers=2)
+
+    def test_bounds_concurrency(self) -> None:
+        lock = threading.Lock()
+        running = peak = 0
+
+        def work() -> None:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+
+        run_tasks([Task(str(i), work) for i in range(8)], workers=3)
+        assert peak <= 3
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_raises_earliest_failure(self, workers: int) -> None:
+        started: list[str] = []
+
+        def fail(name: str, delay: float) -> None:
+            started.append(name)
+            time.sleep(delay)
+            raise RuntimeError(name)
+
+        tasks = [
+            Task("first", lambda: fail("first", 0.05)),
+            Task("second", lambda: fail("second", 0)),
+            Task("after", lambda: started.append("after"), after=("first",)),
+        ]
+        with pytest.raises(RuntimeError, match="first"):
+            run_tasks(tasks, workers)
+        assert "after" not in started
+
+    def test_stops_starting_later_tasks_after_failure(self) -> None:
+        started: list[str] = []
+
+        def fail() -> None:
+            raise RuntimeError
+
+        tasks = [
+            Task("fails", fail),
+            *(Task(str(i), partial(started.append, str(i))) for i in range(3)),
+        ]
+        with pytest.raises(RuntimeError):
+            run_tasks(tasks, workers=1)
+        assert started == []
+
+    def test_rejects_invalid_graphs(self) -> None:
+        with pytest.raises(ValueError, match="unique"):
+            run_tasks([Task("a", int), Task("a", int)])
+        with pytest.raises(ValueError, match="unknown"):
+            run_tasks([Task("a", int, after=("b",))])
+        with pytest.raises(ValueError, match="each other"):
+            run_tasks([Task("a", int, after=("b",)), Task("b", int, after=("a",))])
+        with pytest.raises(ValueError, match="workers"):
+            run_tasks([], workers=0)
@@ -0,0 +1,165 @@
+"""
+Tests for shards.py
+(parse_shard_size, plan_shards, prune_shards, write_shard_manifest)
+"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from nda.shards import (
+    ShardSize,
+    parse_shard_size,
+    plan_shards,
+    prune_shards,
+    write_shard_manifest,
+)
+from nda.utils import relocate_documents, to_parquet
+
+
+@pytest.fixture
+def documents_dir(tmp_path: Path) -> Path:
+    """Create a source documents folder with PDFs of 100, 200, 300 and 400 bytes."""
+    docs = tmp_path / "data" / "documents"
+    docs.mkdir(parents=True)
+    for i in range(1, 5):
+        (docs / f"d{i}.pdf").write_bytes(b"x" * 100 * i)
+    return docs
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"filename": [f"d{i}.pdf" for i in range(1, 5)], "text_best": ["ab"] * 4}
+    )
+
+
+class TestParseShardSize:
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            ("500", ShardSize(500, "rows")),
+            ("100B", ShardSize(100, "bytes")),
+            ("64MB", ShardSize(64_000_000, "bytes")),
+            ("1.5GiB", ShardSize(1_610_612_736, "bytes")),
+            ("2kib", ShardSize(2048, "bytes")),
+        ],
+    )
+    def test_parses_rows_and_bytes(self, value: str, expected: ShardSize) -> None:
+        assert parse_shard_size(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "ten", "5TB", "-1", "1.5", "0", "0MB"])
+    def test_rejects_invalid_sizes(self, value: str) -> None:
+        with pytest.raises(ValueError):
+            parse_shard_size(value)
+
+
+class TestPlanShards:
+    def test_splits_by_rows(self, df: pd.DataFrame, documents_dir: Path) -> None:
+        ranges = plan_shards(df, ShardSize(3, "rows"), documents_dir)
+        assert ranges == [range(0, 3), range(3, 4)]
+
+    def test_splits_by_estimated_bytes(
+        self, df: pd.DataFrame, documents_dir: Path
+    ) -> None:
+        # Each row weighs 8 bytes of strings plus its 100 to 400 byte document.
+        ranges = plan_shards(df, ShardSize(400, "bytes"), documents_dir)
+        assert ranges == [range(0, 2), range(2, 3), range(3, 4)]
+
+    def test_oversized_row_gets_own_shard(
+        self, df: pd.DataFrame, documents_dir: Path
+    ) -> None:
+        ranges = plan_shards(df, ShardSize(10, "bytes"), documents_dir)
+        assert ranges == [range(i, i + 1) for i in range(4)]
+
+    def test_missing_documents_count_as_empty(self, tmp_path: Path) -> None:
+        df = pd.DataFrame({"filename": ["gone.pdf", "gone.pdf"]})
+        assert plan_shards(df, ShardSize(1000, "bytes"), tmp_path) == [range(0, 2)]
+
+
+class TestShardedOutputs:
+    def _write(
+        self, df: pd.DataFrame, documents_dir: Path, output_dir: Path
+    ) -> list[range]:
+        ranges = [range(0, 3), range(3, 4)]
+        relocate_documents(
+            [df],
+            ["train"],
+            documents_dir.parent,
+            output_dir,
+            shards={"train": ranges},
+        )
+        to_parquet([df], ["train"], output_dir, shards={"train": ranges})
+        return ranges
+
+    def test_writes_one_folder_per_shard(
+        self, df: pd.DataFrame, documents_dir: Path, tmp_path: Path
+    ) -> None:
+        output_dir = tmp_path / "output"
+        self._write(df, documents_dir, output_dir)
+
+        shard = output_dir / "train" / "shard-00001"
+        assert sorted(p.name for p in (shard / "documents").iterdir()) == ["d4.pdf"]
+        result = pd.read_parquet(shard / "data.parquet")
+        pd.testing.assert_frame_equal(result, df.iloc[3:].reset_index(drop=True))
+
+    def test_manifest_lists_shards(
+        self, df: pd.DataFrame, documents_dir: Path, tmp_path: Path
+    ) -> None:
+        partition_dir = tmp_path / "output" / "train"
+        ranges = self._write(df, documents_dir, tmp_path / "output")
+
+        manifest = write_shard_manifest(df, partition_dir, ranges)
+
+        assert manifest == json.loads((partition_dir / "manifest.json").read_text())
+        assert manifest["rows"] == 4
+        first, second = manifest["shards"]
+        assert first["path"] == "shard-00000"
+        assert first["rows"] == 3
+        assert first["documents"] == ["d1", "d2", "d3"]
+        assert second["documents"] == ["d4"]
+        on_disk = sum(
+            p.stat().st_size
+            for p in (partition_dir / "shard-00001").rglob("*")
+            if p.is_file()
+        )
+        assert second["bytes"] == on_disk >= 400
+
+
+class TestPruneShards:
+    def _layout(self, partition_dir: Path, ranges: list[range]) -> None:
+        df = pd.DataFrame({"filename": [f"d{i}.pdf" for i in range(4)]})
+        for index in range(len(ranges)):
+            (partition_dir / f"shard-{index:05d}").mkdir(parents=True)
+        write_shard_manifest(df, partition_dir, ranges)
+
+    def test_keeps_shards_with_the_same_plan(self, tmp_path: Path) -> None:
+        ranges = [range(0, 2), range(2, 4)]
+        self._layout(tmp_path, ranges)
+        prune_shards(tmp_path, ranges)
+        assert (tmp_path / "shard-00001").is_dir()
+
+    def test_removes_shards_when_plan_changes(self, tmp_path: Path) -> None:
+        self._layout(tmp_path, [range(0, 2), range(2, 4)])
+        prune_shards(tmp_path, [range(0, 4)])
+        assert not list(tmp_path.glob("shard-*"))
+
+    def test_removes_shards_and_manifest_when_unsharded(self, tmp_path: Path) -> None:
+        self._layout(tmp_path, [range(0, 4)])
+        prune_shards(tmp_path, [])
+        assert not list(tmp_path.glob("shard-*"))
+        assert not (tmp_path / "manifest.json").exists()
+
+    def test_removes_unsharded_outputs_when_sharded(self, tmp_path: Path) -> None:
+        for name in [
+            "data.parquet",
+            "layout.json",
+            "documents.json",
+            "documents.bundle",
+        ]:
+            (tmp_path / name).write_text("x")
+        (tmp_path / "documents").mkdir()
+        prune_shards(tmp_path, [range(0, 4)])
+        assert list(tmp_path.iterdir()) == []
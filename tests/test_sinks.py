@@ -0,0 +1,242 @@
+"""
+Tests for sinks.py
+(LocalSink, MemoryStore, ObjectStoreSink: keys, uploads, bounded concurrency,
+errors)
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO
+
+import pytest
+
+from nda import sinks, utils
+from nda.sinks import LocalSink, MemoryStore, ObjectStoreSink
+
+
+class SlowStore(MemoryStore):
+    """A MemoryStore whose uploads take a while and record how many overlap."""
+
+    def __init__(self, delay: float = 0.02) -> None:
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.most_active = 0
+        self._count = threading.Lock()
+
+    def put(self, key: str, body: BinaryIO) -> None:
+        with self._count:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(self.delay)
+        super().put(key, body)
+        with self._count:
+            self.active -= 1
+
+
+class FailingStore(MemoryStore):
+    """A MemoryStore that refuses the keys it is given."""
+
+    def __init__(self, *refused: str) -> None:
+        super().__init__()
+        self.refused = refused
+
+    def put(self, key: str, body: BinaryIO) -> None:
+        if key in self.refused:
+            raise ConnectionError(key)
+        super().put(key, body)
+
+
+class TestLocalSink:
+    def test_writes_through_temporary_files(self, tmp_path: Path) -> None:
+        sink = LocalSink(tmp_path)
+        with sink.open("a/b.bin") as out:
+            out.write(b"abc")
+            assert not (tmp_path / "a" / "b.bin").exists()
+        assert sink.read_bytes("a/b.bin") == b"abc"
+        assert sink.size("a/b.bin") == 3
+        assert sorted(p.name for p in (tmp_path / "a").iterdir()) == ["b.bin"]
+
+    def test_open_keeps_source_metadata(self, tmp_path: Path) -> None:
+        src = tmp_path / "src.pdf"
+        src.write_bytes(b"%PDF")
+        os.utime(src, ns=(0, 1_000_000_000))
+        sink = LocalSink(tmp_path / "out")
+        with sink.open("x.pdf", src) as out:
+            out.write(src.read_bytes())
+        assert (tmp_path / "out" / "x.pdf").stat().st_mtime_ns == 1_000_000_000
+
+    def test_directories_become_local_sinks(self, tmp_path: Path) -> None:
+        sink = utils.as_sink(tmp_path)
+        assert isinstance(sink, LocalSink)
+        assert utils.LocalSink is LocalSink
+        assert utils.as_sink(sink) is sink
+
+    def test_missing_keys(self, tmp_path: Path) -> None:
+        sink = LocalSink(tmp_path)
+        assert sink.read_bytes("nope") is None
+        assert sink.size("nope") is None
+        assert sink.listdir("nope") == []
+        sink.delete("nope")
+
+    def test_listdir_and_delete(self, tmp_path: Path) -> None:
+        sink = LocalSink(tmp_path)
+        for key in ("p/documents/a.pdf", "p/documents.json"):
+            sink.write_bytes(key, b"x")
+        assert sink.listdir("p") == ["documents", "documents.json"]
+        sink.delete("p/documents")
+        sink.delete("p/documents.json")
+        assert sink.listdir("p") == []
+
+
+class TestMemoryStore:
+    def test_round_trip(self, tmp_path: Path) -> None:
+        store = MemoryStore()
+        src = tmp_path / "a.bin"
+        src.write_bytes(b"abc")
+        with src.open("rb") as body:
+            store.put("x/a.bin", body)
+        assert store.get("x/a.bin") == b"abc"
+        assert store.size("x/a.bin") == 3
+        assert store.get("x/b.bin") is None
+        assert store.size("x/b.bin") is None
+
+    def test_list_and_delete(self) -> None:
+        store = MemoryStore()
+        store.objects.update({"a/1": b"", "a/2": b"", "b/1": b""})
+        assert store.list("a/") == ["a/1", "a/2"]
+        store.delete(["a/1", "missing"])
+        assert sorted(store.objects) == ["a/2", "b/1"]
+
+
+class TestObjectStoreSink:
+    def test_writes_under_prefix(self) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store, prefix="/runs/1/") as sink:
+            sink.write_bytes("train/layout.json", b"{}")
+        assert store.objects == {"runs/1/train/layout.json": b"{}"}
+
+    def test_put_file_uploads_source(self, tmp_path: Path) -> None:
+        src = tmp_path / "alpha.pdf"
+        src.write_bytes(b"%PDF-alpha")
+        store = MemoryStore()
+        with ObjectStoreSink(store) as sink:
+            assert sink.put_file("train/documents/alpha.pdf", src) == "upload"
+        assert store.objects == {"train/documents/alpha.pdf": b"%PDF-alpha"}
+
+    def test_reads_see_completed_uploads(self) -> None:
+        sink = ObjectStoreSink(MemoryStore())
+        sink.write_bytes("a/b", b"12345")
+        sink.flush()
+        assert sink.read_bytes("a/b") == b"12345"
+        assert sink.size("a/b") == 5
+        assert sink.read_bytes("a/c") is None
+        sink.close()
+
+    def test_failed_block_is_not_uploaded(self) -> None:
+        store = MemoryStore()
+        sink = ObjectStoreSink(store)
+        with pytest.raises(RuntimeError), sink.open("a/b") as out:
+            out.write(b"partial")
+            raise RuntimeError
+        sink.close()
+        assert store.objects == {}
+
+    def test_large_outputs_spill_to_disk(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(sinks, "SPOOL_SIZE", 16)
+        store = MemoryStore()
+        data = bytes(range(256)) * 64
+        with ObjectStoreSink(store) as sink, sink.open("big.bin") as out:
+            out.write(data)
+        assert store.objects == {"big.bin": data}
+
+    def test_listdir_and_delete(self) -> None:
+        store = MemoryStore()
+        store.objects.update(
+            {
+                "p/train/documents/a.pdf": b"",
+                "p/train/documents/b.pdf": b"",
+                "p/train/documents.json": b"",
+                "p/train/shard-00000/data.parquet": b"",
+            }
+        )
+        sink = ObjectStoreSink(store, prefix="p")
+        assert sink.listdir("train") == ["documents", "documents.json", "shard-00000"]
+        assert sink.listdir("train/documents") == ["a.pdf", "b.pdf"]
+
+        sink.delete("train/documents")
+
+        assert sorted(store.objects) == [
+            "p/train/documents.json",
+            "p/train/shard-00000/data.parquet",
+        ]
+        sink.close()
+
+    def test_uploads_run_concurrently_up_to_the_limit(self) -> None:
+        store = SlowStore()
+        with ObjectStoreSink(store, max_concurrency=3) as sink:
+            for i in range(12):
+                sink.write_bytes(f"k{i}", b"x")
+        assert len(store.objects) == 12
+        assert 1 < store.most_active <= 3
+
+    def test_writers_wait_for_a_free_slot(self) -> None:
+        release = threading.Event()
+
+        class BlockedStore(MemoryStore):
+            def put(self, key: str, body: BinaryIO) -> None:
+                release.wait()
+                super().put(key, body)
+
+        sink = ObjectStoreSink(BlockedStore(), max_concurrency=1, max_pending=1)
+        sink.write_bytes("first", b"1")
+        writer = threading.Thread(target=sink.write_bytes, args=("second", b"2"))
+        writer.start()
+        writer.join(timeout=0.1)
+        assert writer.is_alive()
+
+        release.set()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        sink.close()
+
+    def test_flush_raises_first_upload_error(self) -> None:
+        store = FailingStore("b", "c")
+        sink = ObjectStoreSink(store, max_concurrency=2)
+        for key in "abcd":
+            sink.write_bytes(key, b"x")
+        with pytest.raises(ConnectionError, match="b"):
+            sink.flush()
+        sink.write_bytes("e", b"x")
+        sink.close()
+        assert sorted(store.objects) == ["a", "d", "e"]
+
+    def test_close_raises_upload_error(self) -> None:
+        with pytest.raises(ConnectionError), ObjectStoreSink(FailingStore("a")) as sink:
+            sink.write_bytes("a", b"x")
+
+    def test_block_error_wins_over_upload_error(self) -> None:
+        with (
+            pytest.raises(KeyError),
+            ObjectStoreSink(FailingStore("a")) as sink,
+        ):
+            sink.write_bytes("a", b"x")
+            raise KeyError
+
+    def test_closed_sink_rejects_writes(self, tmp_path: Path) -> None:
+        src = tmp_path / "a.pdf"
+        src.write_bytes(b"%PDF")
+        sink = ObjectStoreSink(MemoryStore(), max_concurrency=1, max_pending=1)
+        sink.close()
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                sink.put_file("a.pdf", src)
+
+    @pytest.mark.parametrize(("max_concurrency", "max_pending"), [(0, None), (4, 2)])
+    def test_rejects_invalid_limits(
+        self, max_concurrency: int, max_pending: int | None
+    ) -> None:
+        with pytest.raises(ValueError, match="max_"):
+            ObjectStoreSink(MemoryStore(), "", max_concurrency, max_pending)
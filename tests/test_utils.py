@@ -1,15 +1,35 @@
 """
 Tests for utils.py
-(relocate_documents, to_parquet)
+(relocate_documents, to_parquet, ParquetOptions, parquet layouts, verification,
+object-store delivery)
 """
 
+import errno
+import hashlib
+import io
+import json
 import logging
+import os
+import sys
 from pathlib import Path
+from typing import BinaryIO
 
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 
-from nda.utils import relocate_documents, to_parquet
+from nda import sinks, utils
+from nda.data_loader import Partition
+from nda.sinks import MemoryStore, ObjectStoreSink
+from nda.utils import (
+    CheckMode,
+    DocumentsFormat,
+    LinkMode,
+    ParquetOptions,
+    RelocationStats,
+    relocate_documents,
+    to_parquet,
+)
 
 
 @pytest.fixture
@@ -53,6 +73,18 @@ class TestRelocateDocuments:
         content = (output_dir / "train" / "documents" / "alpha.pdf").read_bytes()
         assert content == b"%PDF-alpha"
 
+    def test_counts_placed_bytes(
+        self,
+        data_dir: Path,
+        output_dir: Path,
+        single_partition_df: pd.DataFrame,
+    ) -> None:
+        df = single_partition_df
+        first = relocate_documents([df], ["train"], data_dir, output_dir)
+        again = relocate_documents([df], ["train"], data_dir, output_dir)
+        assert first["train"].bytes == len(b"%PDF-alpha") + len(b"%PDF-beta")
+        assert again["train"].bytes == 0
+
     def test_handles_multiple_partitions(
         self, data_dir: Path, output_dir: Path
     ) -> None:
@@ -139,3 +171,584 @@ class TestToParquet:
         to_parquet([df], ["train"], output_dir)
         result = pd.read_parquet(output_dir / "train" / "data.parquet")
         assert list(result.index) == [0, 1]
+
+
+class TestParquetOptions:
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame({"key": ["a", "b"] * 50, "value": range(100)})
+
+    def _metadata(self, output_dir: Path) -> pq.FileMetaData:
+        return pq.ParquetFile(output_dir / "train" / "data.parquet").metadata
+
+    def test_defaults_to_gzip(self, df: pd.DataFrame, output_dir: Path) -> None:
+        to_parquet([df], ["train"], output_dir)
+        assert self._metadata(output_dir).row_group(0).column(0).compression == "GZIP"
+
+    @pytest.mark.parametrize("codec", ["zstd", "snappy", "lz4", "none"])
+    def test_applies_codec(
+        self, df: pd.DataFrame, output_dir: Path, codec: str
+    ) -> None:
+        to_parquet([df], ["train"], output_dir, ParquetOptions(compression=codec))
+        column = self._metadata(output_dir).row_group(0).column(0)
+        expected = {"none": "UNCOMPRESSED"}.get(codec, codec.upper())
+        assert column.compression == expected
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(output_dir / "train" / "data.parquet"), df
+        )
+
+    def test_applies_compression_level(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        options = ParquetOptions(compression="zstd", compression_level=19)
+        to_parquet([df], ["train"], output_dir, options)
+        assert self._metadata(output_dir).row_group(0).column(0).compression == "ZSTD"
+
+    def test_applies_row_group_size(self, df: pd.DataFrame, output_dir: Path) -> None:
+        to_parquet([df], ["train"], output_dir, ParquetOptions(row_group_size=30))
+        assert self._metadata(output_dir).num_row_groups == 4
+
+    def test_restricts_dictionary_encoding_to_columns(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        to_parquet([df], ["train"], output_dir, ParquetOptions(use_dictionary=("key",)))
+        row_group = self._metadata(output_dir).row_group(0)
+        assert "RLE_DICTIONARY" in row_group.column(0).encodings
+        assert "RLE_DICTIONARY" not in row_group.column(1).encodings
+
+    def test_disables_statistics(self, df: pd.DataFrame, output_dir: Path) -> None:
+        to_parquet([df], ["train"], output_dir, ParquetOptions(write_statistics=False))
+        assert not self._metadata(output_dir).row_group(0).column(0).is_stats_set
+
+    def test_writes_page_index(self, df: pd.DataFrame, output_dir: Path) -> None:
+        to_parquet([df], ["train"], output_dir, ParquetOptions(write_page_index=True))
+        column = self._metadata(output_dir).row_group(0).column(0)
+        assert column.has_column_index
+        assert column.has_offset_index
+
+    def test_writes_partitions_concurrently(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        partitions: list[Partition] = ["train", "dev-0", "test-A"]
+        frames = [df.assign(value=df["value"] + i) for i in range(3)]
+        to_parquet(frames, partitions, output_dir, jobs=3)
+        for frame, partition in zip(frames, partitions, strict=True):
+            result = pd.read_parquet(output_dir / partition / "data.parquet")
+            pd.testing.assert_frame_equal(result, frame)
+
+    def test_rejects_non_positive_jobs(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        with pytest.raises(ValueError, match="jobs must be positive"):
+            to_parquet([df], ["train"], output_dir, jobs=0)
+
+
+class TestParquetLayout:
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "filename": ["a.pdf", "b.pdf"],
+                "keys": ["party", "term"],
+                "text_best": ["alpha", "beta"],
+                "text_djvu": ["ALPHA", "BETA"],
+            }
+        )
+
+    def test_single_layout_manifest(self, df: pd.DataFrame, output_dir: Path) -> None:
+        to_parquet([df], ["train"], output_dir)
+        layout = json.loads((output_dir / "train" / "layout.json").read_text())
+        assert layout == {
+            "layout": "single",
+            "join_key": "filename",
+            "rows": 2,
+            "files": {"data.parquet": list(df.columns)},
+        }
+
+    def test_split_writes_one_file_per_text_column(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        to_parquet([df], ["train"], output_dir, layout="split")
+        partition_dir = output_dir / "train"
+
+        assert sorted(p.name for p in partition_dir.glob("*.parquet")) == [
+            "meta.parquet",
+            "text_best.parquet",
+            "text_djvu.parquet",
+        ]
+        meta = pd.read_parquet(partition_dir / "meta.parquet")
+        assert list(meta.columns) == ["filename", "keys"]
+        best = pd.read_parquet(partition_dir / "text_best.parquet")
+        assert list(best.columns) == ["filename", "text_best"]
+
+        layout = json.loads((partition_dir / "layout.json").read_text())
+        assert layout["layout"] == "split"
+        assert layout["files"]["text_djvu.parquet"] == ["filename", "text_djvu"]
+
+    def test_split_files_join_back_to_the_frame(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        to_parquet([df], ["train"], output_dir, layout="split")
+        partition_dir = output_dir / "train"
+        layout = json.loads((partition_dir / "layout.json").read_text())
+
+        joined = pd.read_parquet(partition_dir / "meta.parquet")
+        for name, columns in layout["files"].items():
+            if name != "meta.parquet":
+                part = pd.read_parquet(partition_dir / name)
+                assert part["filename"].equals(joined["filename"])
+                joined[columns[1]] = part[columns[1]]
+        pd.testing.assert_frame_equal(joined, df)
+
+    def test_switching_layout_removes_stale_files(
+        self, df: pd.DataFrame, output_dir: Path
+    ) -> None:
+        to_parquet([df], ["train"], output_dir, layout="split")
+        to_parquet([df], ["train"], output_dir)
+        assert [p.name for p in utils.parquet_outputs(output_dir / "train")] == [
+            "data.parquet",
+            "layout.json",
+        ]
+
+    def test_split_requires_join_key(self, output_dir: Path) -> None:
+        df = pd.DataFrame({"text_best": ["alpha"]})
+        with pytest.raises(ValueError, match="filename"):
+            to_parquet([df], ["train"], output_dir, layout="split")
+
+
+class TestLinkModes:
+    def _relocate(
+        self, data_dir: Path, output_dir: Path, link_mode: LinkMode
+    ) -> RelocationStats:
+        df = pd.DataFrame({"filename": ["alpha.pdf", "beta.pdf"]})
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, link_mode)
+        return stats["train"]
+
+    def test_copy_is_default_and_reported(
+        self, data_dir: Path, output_dir: Path, single_partition_df: pd.DataFrame
+    ) -> None:
+        stats = relocate_documents(
+            [single_partition_df], ["train"], data_dir, output_dir
+        )
+        assert stats["train"].modes == {"copy": 2}
+
+    def test_hardlink_shares_inode(self, data_dir: Path, output_dir: Path) -> None:
+        stats = self._relocate(data_dir, output_dir, "hardlink")
+        dst = output_dir / "train" / "documents" / "alpha.pdf"
+        assert stats.modes == {"hardlink": 2}
+        assert os.path.samefile(dst, data_dir / "documents" / "alpha.pdf")
+
+    def test_symlink_points_at_source(self, data_dir: Path, output_dir: Path) -> None:
+        stats = self._relocate(data_dir, output_dir, "symlink")
+        dst = output_dir / "train" / "documents" / "alpha.pdf"
+        assert stats.modes == {"symlink": 2}
+        assert dst.is_symlink()
+        assert dst.read_bytes() == b"%PDF-alpha"
+
+    def test_reflink_places_identical_content(
+        self, data_dir: Path, output_dir: Path
+    ) -> None:
+        stats = self._relocate(data_dir, output_dir, "reflink")
+        dst = output_dir / "train" / "documents" / "beta.pdf"
+        assert set(stats.modes) <= {"reflink", "copy"}
+        assert not dst.is_symlink()
+        assert dst.read_bytes() == b"%PDF-beta"
+
+    def test_unsupported_mode_falls_back_to_copy(
+        self, data_dir: Path, output_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def cross_device(src: Path, dst: Path) -> None:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(os, "link", cross_device)
+        stats = self._relocate(data_dir, output_dir, "hardlink")
+        dst = output_dir / "train" / "documents" / "alpha.pdf"
+        assert stats.modes == {"copy": 2}
+        assert dst.read_bytes() == b"%PDF-alpha"
+
+    def test_auto_prefers_reflink_then_hardlink(
+        self, data_dir: Path, output_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def unsupported(src: Path, dst: Path) -> None:
+            dst.write_bytes(b"partial")
+            raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+        monkeypatch.setattr(sinks, "_reflink", unsupported)
+        stats = self._relocate(data_dir, output_dir, "auto")
+        assert stats.modes == {"hardlink": 2}
+
+    def test_relink_replaces_previous_symlink_without_touching_source(
+        self, data_dir: Path, output_dir: Path
+    ) -> None:
+        self._relocate(data_dir, output_dir, "symlink")
+        self._relocate(data_dir, output_dir, "copy")
+        dst = output_dir / "train" / "documents" / "alpha.pdf"
+        assert not dst.is_symlink()
+        assert (data_dir / "documents" / "alpha.pdf").read_bytes() == b"%PDF-alpha"
+
+    def test_missing_documents_reported(self, data_dir: Path, output_dir: Path) -> None:
+        df = pd.DataFrame({"filename": ["alpha.pdf", "ghost.pdf"]})
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, "hardlink")
+        assert stats["train"].missing == ["ghost.pdf"]
+        assert stats["train"].modes == {"hardlink": 1}
+
+    def test_logs_modes_used(
+        self, data_dir: Path, output_dir: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        with caplog.at_level(logging.INFO):
+            self._relocate(data_dir, output_dir, "symlink")
+        assert "placed 2 documents (symlink=2)" in caplog.text
+
+    def test_reflink_unavailable_off_linux(
+        self, data_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(sys, "platform", "darwin")
+        with pytest.raises(OSError, match="only supported on Linux"):
+            sinks._reflink(data_dir / "documents" / "alpha.pdf", tmp_path / "x.pdf")
+
+
+class TestIncrementalRelocation:
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame({"filename": ["alpha.pdf", "beta.pdf"]})
+
+    def test_writes_manifest(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir)
+        manifest = json.loads((output_dir / "train" / "documents.json").read_text())
+        assert set(manifest) == {"alpha.pdf", "beta.pdf"}
+        assert manifest["alpha.pdf"]["size"] == len(b"%PDF-alpha")
+
+    def test_rerun_skips_unchanged_files(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir)
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)
+        assert stats["train"].skipped == 2
+        assert stats["train"].modes.total() == 0
+
+    def test_changed_source_is_replaced(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir)
+        (data_dir / "documents" / "alpha.pdf").write_bytes(b"%PDF-alpha-v2")
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)
+        dst = output_dir / "train" / "documents" / "alpha.pdf"
+        assert dst.read_bytes() == b"%PDF-alpha-v2"
+        assert stats["train"].skipped == 1
+
+    def test_deleted_destination_is_restored(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir)
+        (output_dir / "train" / "documents" / "beta.pdf").unlink()
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)
+        assert stats["train"].modes == {"copy": 1}
+        assert (output_dir / "train" / "documents" / "beta.pdf").exists()
+
+    def test_changed_link_mode_is_not_skipped(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir, "symlink")
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, "copy")
+        assert stats["train"].modes == {"copy": 2}
+        assert not (output_dir / "train" / "documents" / "alpha.pdf").is_symlink()
+
+    def test_hash_check_detects_same_size_rewrite(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        src = data_dir / "documents" / "alpha.pdf"
+        relocate_documents([df], ["train"], data_dir, output_dir, check="hash")
+        stat = src.stat()
+        src.write_bytes(b"%PDF-ALPHA")
+        os.utime(src, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, check="hash")
+        assert stats["train"].modes == {"copy": 1}
+        assert (output_dir / "train" / "documents" / "alpha.pdf").read_bytes() == (
+            b"%PDF-ALPHA"
+        )
+
+    def test_hash_check_skips_touched_source(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        src = data_dir / "documents" / "alpha.pdf"
+        relocate_documents([df], ["train"], data_dir, output_dir, check="hash")
+        stat = src.stat()
+        os.utime(src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, check="hash")
+        assert stats["train"].modes == {}
+        assert stats["train"].skipped == 2
+
+    def test_interrupted_run_resumes(
+        self,
+        data_dir: Path,
+        output_dir: Path,
+        df: pd.DataFrame,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        place = sinks._place
+
+        def fail_on_beta(src: Path, dst: Path, link_mode: LinkMode) -> str:
+            if src.name == "beta.pdf":
+                raise KeyboardInterrupt
+            return place(src, dst, link_mode)
+
+        monkeypatch.setattr(sinks, "_place", fail_on_beta)
+        with pytest.raises(KeyboardInterrupt):
+            relocate_documents([df], ["train"], data_dir, output_dir, workers=1)
+        monkeypatch.setattr(sinks, "_place", place)
+
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)
+        assert stats["train"].skipped == 1
+        assert stats["train"].modes == {"copy": 1}
+
+    def test_no_temporary_files_left_behind(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir, workers=4)
+        names = sorted(p.name for p in (output_dir / "train" / "documents").iterdir())
+        assert names == ["alpha.pdf", "beta.pdf"]
+
+    def test_corrupt_manifest_is_ignored(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        (output_dir / "train").mkdir(parents=True)
+        (output_dir / "train" / "documents.json").write_text("{not json")
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)
+        assert stats["train"].modes == {"copy": 2}
+
+    def test_rejects_non_positive_workers(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        with pytest.raises(ValueError, match="workers"):
+            relocate_documents([df], ["train"], data_dir, output_dir, workers=0)
+
+
+class TestVerification:
+    GOOD = b"%PDF-good\n%%EOF\n"
+    TRUNCATED = b"%PDF-cut"
+
+    @pytest.fixture
+    def data_dir(self, tmp_path: Path) -> Path:
+        """Create documents named after their MD5, plus a renamed and a cut one."""
+        docs = tmp_path / "data" / "documents"
+        docs.mkdir(parents=True)
+        for name, content in self._documents().items():
+            (docs / name).write_bytes(content)
+        return tmp_path / "data"
+
+    def _documents(self) -> dict[str, bytes]:
+        md5 = hashlib.md5(self.GOOD).hexdigest()
+        cut = hashlib.md5(self.TRUNCATED).hexdigest()
+        return {
+            f"{md5}.pdf": self.GOOD,
+            "0" * 32 + ".pdf": self.GOOD,
+            f"{cut}.pdf": self.TRUNCATED,
+        }
+
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame({"filename": list(self._documents())})
+
+    @pytest.mark.parametrize("link_mode", ["copy", "hardlink", "symlink"])
+    @pytest.mark.parametrize("documents_format", ["files", "bundle"])
+    def test_flags_mismatched_and_truncated(
+        self,
+        data_dir: Path,
+        output_dir: Path,
+        df: pd.DataFrame,
+        link_mode: LinkMode,
+        documents_format: DocumentsFormat,
+    ) -> None:
+        stats = relocate_documents(
+            [df],
+            ["train"],
+            data_dir,
+            output_dir,
+            link_mode,
+            documents_format=documents_format,
+            verify=True,
+        )["train"]
+        assert stats.verified == 3
+        assert stats.mismatched == ["0" * 32 + ".pdf"]
+        assert stats.truncated == [df["filename"][2]]
+
+    def test_copies_in_the_same_pass(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        stats = relocate_documents([df], ["train"], data_dir, output_dir, verify=True)[
+            "train"
+        ]
+        assert stats.modes == {"copy": 3}
+        for name, content in self._documents().items():
+            placed = output_dir / "train" / "documents" / name
+            assert placed.read_bytes() == content
+            assert placed.stat().st_mtime_ns == (
+                (data_dir / "documents" / name).stat().st_mtime_ns
+            )
+
+    @pytest.mark.parametrize("check", ["stat", "hash"])
+    def test_verifies_skipped_documents(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame, check: CheckMode
+    ) -> None:
+        relocate_documents([df], ["train"], data_dir, output_dir, check=check)
+        stats = relocate_documents(
+            [df], ["train"], data_dir, output_dir, check=check, verify=True
+        )["train"]
+        assert stats.skipped == 3
+        assert (stats.verified, len(stats.mismatched), len(stats.truncated)) == (
+            3,
+            1,
+            1,
+        )
+
+    def test_off_by_default(
+        self, data_dir: Path, output_dir: Path, df: pd.DataFrame
+    ) -> None:
+        stats = relocate_documents([df], ["train"], data_dir, output_dir)["train"]
+        assert (stats.verified, stats.mismatched, stats.truncated) == (0, [], [])
+
+    def test_logs_summary(
+        self,
+        data_dir: Path,
+        output_dir: Path,
+        df: pd.DataFrame,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        with caplog.at_level(logging.WARNING):
+            relocate_documents([df], ["train"], data_dir, output_dir, verify=True)
+        assert "1 of 3 verified documents do not match the MD5" in caplog.text
+        assert "1 of 3 verified documents are truncated" in caplog.text
+
+    def test_detects_files_shrinking_while_read(self) -> None:
+        content = utils._stream(io.BytesIO(self.GOOD), len(self.GOOD) + 1)
+        assert not content.complete
+        assert utils._stream(io.BytesIO(self.GOOD), len(self.GOOD)).complete
+
+    @pytest.mark.parametrize(("padding", "complete"), [(1000, True), (2000, False)])
+    def test_looks_for_marker_in_last_kib(self, padding: int, complete: bool) -> None:
+        data = self.GOOD + b"x" * padding
+        content = utils._stream(io.BytesIO(data), len(data), chunk_size=7)
+        assert content.complete is complete
+
+
+class TestObjectStoreDelivery:
+    """Delivery to an object store writes the same outputs as to a directory."""
+
+    @pytest.fixture
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "filename": ["alpha.pdf", "beta.pdf", "ghost.pdf"],
+                "text_best": list("abc"),
+            }
+        )
+
+    @staticmethod
+    def _local_tree(root: Path) -> dict[str, bytes]:
+        return {
+            path.relative_to(root).as_posix(): path.read_bytes()
+            for path in root.rglob("*")
+            if path.is_file()
+        }
+
+    @pytest.mark.parametrize("documents_format", ["files", "bundle"])
+    @pytest.mark.parametrize("verify", [False, True])
+    def test_documents_match_local_output(
+        self,
+        data_dir: Path,
+        output_dir: Path,
+        df: pd.DataFrame,
+        documents_format: DocumentsFormat,
+        verify: bool,
+    ) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store, max_concurrency=2) as sink:
+            remote = relocate_documents(
+                [df],
+                ["train"],
+                data_dir,
+                sink,
+                documents_format=documents_format,
+                verify=verify,
+                shards={"train": [range(0, 2), range(2, 3)]},
+            )
+        local = relocate_documents(
+            [df],
+            ["train"],
+            data_dir,
+            output_dir,
+            documents_format=documents_format,
+            verify=verify,
+            shards={"train": [range(0, 2), range(2, 3)]},
+        )
+        assert store.objects == self._local_tree(output_dir)
+        assert remote["train"].missing == local["train"].missing == ["ghost.pdf"]
+        assert remote["train"].verified == local["train"].verified
+
+    def test_documents_are_reported_as_uploads(
+        self, data_dir: Path, df: pd.DataFrame
+    ) -> None:
+        with ObjectStoreSink(MemoryStore()) as sink:
+            stats = relocate_documents([df], ["train"], data_dir, sink, "hardlink")
+        assert stats["train"].modes == {"upload": 2}
+
+    def test_rerun_skips_uploaded_documents(
+        self, data_dir: Path, df: pd.DataFrame
+    ) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store) as sink:
+            relocate_documents([df], ["train"], data_dir, sink)
+        del store.objects["train/documents/beta.pdf"]
+        with ObjectStoreSink(store) as sink:
+            stats = relocate_documents([df], ["train"], data_dir, sink)
+        assert stats["train"].skipped == 1
+        assert stats["train"].modes == {"upload": 1}
+
+    def test_switching_format_removes_the_other(
+        self, data_dir: Path, df: pd.DataFrame
+    ) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store) as sink:
+            relocate_documents([df], ["train"], data_dir, sink)
+            relocate_documents(
+                [df], ["train"], data_dir, sink, documents_format="bundle"
+            )
+        assert sorted(store.objects) == [
+            f"train/{utils.BUNDLE_NAME}",
+            f"train/{utils.BUNDLE_INDEX_NAME}",
+        ]
+
+    @pytest.mark.parametrize("layout", ["single", "split"])
+    def test_parquet_matches_local_output(
+        self, output_dir: Path, df: pd.DataFrame, layout: utils.Layout
+    ) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store, prefix="delivery") as sink:
+            to_parquet([df], ["train"], sink, jobs=2, layout=layout)
+        to_parquet([df], ["train"], output_dir, jobs=2, layout=layout)
+        assert store.objects == {
+            f"delivery/{key}": data
+            for key, data in self._local_tree(output_dir).items()
+        }
+
+    def test_parquet_removes_stale_files(self, df: pd.DataFrame) -> None:
+        store = MemoryStore()
+        with ObjectStoreSink(store) as sink:
+            to_parquet([df], ["train"], sink, layout="split")
+            to_parquet([df], ["train"], sink)
+        assert sorted(store.objects) == [
+            "train/data.parquet",
+            f"train/{utils.LAYOUT_NAME}",
+        ]
+
+    def test_upload_errors_fail_the_write(self, df: pd.DataFrame) -> None:
+        class Unreachable(MemoryStore):
+            def put(self, key: str, body: BinaryIO) -> None:
+                raise ConnectionError(key)
+
+        sink = ObjectStoreSink(Unreachable())
+        with pytest.raises(ConnectionError):
+            to_parquet([df], ["train"], sink)
+        sink.close()